@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Offline benchmarks for the Digitide multi-agent system
+Runs create_digitide_system() and the pipelines against StubModel, so
+orchestration changes can be measured on a laptop without credentials
+"""
+
+# python3 benchmarks/run_benchmarks.py                  # compare against baseline.json
+# python3 benchmarks/run_benchmarks.py --save-baseline  # record a new baseline
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCHMARK_DIR))
+sys.path.append(BENCHMARK_DIR)
+
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from digitide_agents import ResponseCache, create_digitide_system, create_pipeline
+from digitide_agents.models import HEAVY, LIGHT, ROUTER, configure_models
+from stub_model import StubModel
+
+BASELINE_FILE = os.path.join(BENCHMARK_DIR, "baseline.json")
+
+# Simulated model profiles, roughly 1/20th of production Gemini latencies
+MODEL_PROFILES = {
+    ROUTER: {"latency_ms": 80, "output_tokens": 150},
+    HEAVY: {"latency_ms": 150, "output_tokens": 600},
+    LIGHT: {"latency_ms": 40, "output_tokens": 250}
+}
+
+FULL_REVIEW = (
+    "Full review with test_case_generator, negative_test_generator, "
+    "compliance_validator and security_test_agent: patient login with MFA"
+)
+
+SCENARIOS = {
+    "single_agent": {
+        "message": "Use test_case_generator: patient login form"
+    },
+    "full_review_sequential": {
+        "message": FULL_REVIEW
+    },
+    "full_review_fan_out": {
+        "message": FULL_REVIEW,
+        "system": {"fan_out": {"test": 2, "compliance": 1, "code_api": 1}}
+    },
+    "full_review_pipeline": {
+        "message": "patient login with MFA",
+        "pipeline": "full_review"
+    },
+    "single_agent_hierarchical": {
+        "message": "Use test_router and test_case_generator for the patient login form",
+        "system": {"routing": "hierarchical"}
+    },
+    "single_agent_cached": {
+        "message": "Use test_case_generator: patient login form",
+        "cache": True
+    }
+}
+
+# Metrics compared against the baseline, and whether higher is better
+COMPARED_METRICS = {
+    "p50_ms": False,
+    "p95_ms": False,
+    "throughput_rps": True,
+    "routing_turns": False,
+    "sub_agent_calls": False,
+    "peak_memory_kb": False
+}
+
+
+def install_stub_models(latency_scale):
+    """Routes every tier to a fresh StubModel and returns them by tier"""
+    models = {
+        tier: StubModel(
+            model=f"stub-{tier}",
+            latency_ms=profile["latency_ms"] * latency_scale,
+            output_tokens=profile["output_tokens"]
+        )
+        for tier, profile in MODEL_PROFILES.items()
+    }
+    configure_models(tiers=models)
+    return models
+
+
+def build_agent(scenario):
+    if "pipeline" in scenario:
+        return create_pipeline(scenario["pipeline"])
+    options = dict(scenario.get("system", {}))
+    if scenario.get("cache"):
+        options["cache"] = ResponseCache()
+    return create_digitide_system(**options)
+
+
+async def run_request(runner, message, user_id):
+    session = await runner.session_service.create_session(app_name=runner.app_name, user_id=user_id)
+    start = time.perf_counter()
+    async for _ in runner.run_async(
+        user_id=user_id,
+        session_id=session.id,
+        new_message=types.Content(role="user", parts=[types.Part(text=message)])
+    ):
+        pass
+    return time.perf_counter() - start
+
+
+async def run_scenario(scenario, requests, concurrency, latency_scale):
+    models = install_stub_models(latency_scale)
+    runner = InMemoryRunner(agent=build_agent(scenario), app_name="digitide_benchmark")
+
+    # Warm-up request so one-time setup is not counted
+    await run_request(runner, scenario["message"], "warmup")
+    for model in models.values():
+        model.calls = 0
+
+    tracemalloc.start()
+    latencies = [await run_request(runner, scenario["message"], "bench") for _ in range(requests)]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    routing_turns = models[ROUTER].calls / requests
+    sub_agent_calls = (models[HEAVY].calls + models[LIGHT].calls) / requests
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        run_request(runner, scenario["message"], f"user-{index}")
+        for index in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+
+    await runner.close()
+
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    return {
+        "p50_ms": round(statistics.median(latencies_ms), 1),
+        "p95_ms": round(latencies_ms[min(len(latencies_ms) - 1, int(len(latencies_ms) * 0.95))], 1),
+        "throughput_rps": round(concurrency / elapsed, 2),
+        "routing_turns": round(routing_turns, 2),
+        "sub_agent_calls": round(sub_agent_calls, 2),
+        "peak_memory_kb": round(peak / 1024)
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Prints results next to the baseline and returns the regressions"""
+    regressions = []
+    for name, metrics in results.items():
+        print(f"\n{name}")
+        for metric, value in metrics.items():
+            previous = baseline.get(name, {}).get(metric)
+            if previous in (None, 0):
+                print(f"  {metric:<16} {value:>10}")
+                continue
+
+            change = (value - previous) / previous * 100
+            worse = change < -tolerance if COMPARED_METRICS[metric] else change > tolerance
+            marker = "❌" if worse else "  "
+            print(f"  {metric:<16} {value:>10}  baseline {previous:>10}  {change:+6.1f}% {marker}")
+            if worse:
+                regressions.append(f"{name}.{metric}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="Run only these scenarios")
+    parser.add_argument("--requests", type=int, default=5, help="Sequential requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent sessions for throughput")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Multiplier for simulated model latency")
+    parser.add_argument("--tolerance", type=float, default=20.0, help="Allowed regression in percent")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results to baseline.json")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit non-zero on regressions")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("DIGITIDE OFFLINE BENCHMARKS")
+    print("=" * 60)
+
+    results = {}
+    for name in args.scenario or SCENARIOS:
+        results[name] = asyncio.run(
+            run_scenario(SCENARIOS[name], args.requests, args.concurrency, args.latency_scale)
+        )
+
+    baseline = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE) as f:
+            baseline = json.load(f)
+
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(baseline, f, indent=2)
+            f.write("\n")
+        print(f"\n📋 Baseline saved to {BASELINE_FILE}")
+
+    if regressions:
+        print(f"\n❌ Regressions: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            sys.exit(1)
+    else:
+        print("\n✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
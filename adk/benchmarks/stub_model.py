@@ -0,0 +1,152 @@
+"""
+Deterministic local stand-in for Gemini used by the benchmarks
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+
+from google.adk.models import BaseLlm, LlmResponse
+from google.genai import types
+
+_WORDS = (
+    "patient record consent audit encryption access clinician vitals dosage "
+    "alert workflow validation hipaa fda traceability scenario expected result"
+).split()
+
+
+def _seed(*parts):
+    digest = hashlib.sha256("|".join(parts).encode()).digest()
+    return int.from_bytes(digest[:8], "little")
+
+
+def _content_text(content):
+    return " ".join(
+        part.text if part.text else json.dumps(
+            part.function_response.response if part.function_response else {}, default=str
+        )
+        for part in content.parts or []
+    )
+
+
+def sample_instance(schema, definitions=None, rng=None):
+    """
+    Builds a small value matching a JSON schema, used for output_schema agents
+    """
+    rng = rng or random.Random(0)
+    definitions = definitions or schema.get("$defs", {})
+    if "$ref" in schema:
+        return sample_instance(definitions[schema["$ref"].split("/")[-1]], definitions, rng)
+    if "anyOf" in schema:
+        options = [option for option in schema["anyOf"] if option.get("type") != "null"]
+        return sample_instance(options[0], definitions, rng) if options else None
+    if "enum" in schema:
+        return schema["enum"][0]
+
+    kind = schema.get("type")
+    if kind == "object":
+        return {
+            name: sample_instance(field, definitions, rng)
+            for name, field in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        return [sample_instance(schema["items"], definitions, rng) for _ in range(2)]
+    if kind == "boolean":
+        return True
+    if kind in ("integer", "number"):
+        return 1
+    return " ".join(rng.choice(_WORDS) for _ in range(4))
+
+
+class StubModel(BaseLlm):
+    """
+    Local model with configurable latency and output size
+
+    Latency is sampled from a log-normal distribution around latency_ms and
+    output size from a normal distribution around output_tokens, both seeded
+    by the request so runs are repeatable. With tools available, the stub
+    calls every tool named in the user message one turn at a time (or all
+    at once through run_agents_in_parallel when offered), then aggregates
+    the tool results.
+    """
+
+    model: str = "stub-model"
+    latency_ms: float = 100.0
+    latency_sigma: float = 0.25
+    output_tokens: int = 300
+    output_tokens_stddev: int = 60
+    calls: int = 0
+
+    async def generate_content_async(self, llm_request, stream=False):
+        self.calls += 1
+        prompt = " ".join(_content_text(content) for content in llm_request.contents)
+        system = str(llm_request.config.system_instruction or "") if llm_request.config else ""
+        rng = random.Random(_seed(self.model, system[:200], prompt))
+
+        await asyncio.sleep(rng.lognormvariate(0, self.latency_sigma) * self.latency_ms / 1000)
+
+        usage = types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=(len(system) + len(prompt)) // 4
+        )
+
+        if llm_request.tools_dict:
+            calls = self._plan(llm_request.contents, list(llm_request.tools_dict))
+            if calls:
+                usage.candidates_token_count = 20 * len(calls)
+                usage.total_token_count = usage.prompt_token_count + usage.candidates_token_count
+                yield LlmResponse(
+                    content=types.Content(role="model", parts=[
+                        types.Part(function_call=types.FunctionCall(name=name, args=args))
+                        for name, args in calls
+                    ]),
+                    usage_metadata=usage
+                )
+                return
+
+        tokens = max(1, int(rng.gauss(self.output_tokens, self.output_tokens_stddev)))
+        schema = llm_request.config.response_schema if llm_request.config else None
+        if schema is not None and hasattr(schema, "model_json_schema"):
+            text = json.dumps(sample_instance(schema.model_json_schema(), rng=rng))
+        else:
+            text = " ".join(rng.choice(_WORDS) for _ in range(tokens))
+
+        usage.candidates_token_count = tokens
+        usage.total_token_count = usage.prompt_token_count + tokens
+
+        if stream:
+            chunk = max(1, len(text) // 4)
+            for start in range(0, len(text), chunk):
+                yield LlmResponse(
+                    content=types.Content(role="model", parts=[types.Part(text=text[start:start + chunk])]),
+                    partial=True
+                )
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+            usage_metadata=usage
+        )
+
+    def _plan(self, contents, tool_names):
+        # Route on the latest user message, one tool per turn like a real router
+        user_turns = [
+            index for index, content in enumerate(contents)
+            if content.role == "user" and any(part.text for part in content.parts or [])
+        ]
+        if not user_turns:
+            return []
+        message = _content_text(contents[user_turns[-1]])
+        request = message.split(":", 1)[-1].strip() or message
+        called = {
+            part.function_call.name
+            for content in contents[user_turns[-1]:]
+            for part in content.parts or []
+            if part.function_call
+        }
+
+        named = [name for name in tool_names if name in message and name != "run_agents_in_parallel"]
+        if "run_agents_in_parallel" in called:
+            return []
+        if len(named) > 1 and not called and "run_agents_in_parallel" in tool_names:
+            return [("run_agents_in_parallel", {"request": request, "agents": named})]
+        remaining = [name for name in named if name not in called]
+        return [(remaining[0], {"request": request})] if remaining else []
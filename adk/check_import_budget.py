@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Checks that importing digitide_agents stays cheap as agents are added
+"""
+
+# python3 check_import_budget.py [budget_ms]
+
+import json
+import os
+import subprocess
+import sys
+
+DEFAULT_BUDGET_MS = 50
+
+# Runs in a fresh interpreter so earlier imports cannot hide the real cost
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import digitide_agents
+from digitide_agents import registry
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "import_ms": elapsed * 1000,
+    "adk_loaded": "google.adk" in sys.modules,
+    "agents_built": len(registry._agents)
+}))
+"""
+
+
+def measure():
+    """Measures the import cost of the package in a fresh interpreter"""
+    output = subprocess.check_output(
+        [sys.executable, "-c", PROBE],
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    return json.loads(output)
+
+
+def main():
+    budget_ms = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BUDGET_MS
+    result = measure()
+
+    print(f"Import time: {result['import_ms']:.1f} ms (budget {budget_ms:.0f} ms)")
+    print(f"google.adk loaded: {result['adk_loaded']}")
+    print(f"Agents built: {result['agents_built']}")
+
+    failures = []
+    if result["import_ms"] > budget_ms:
+        failures.append("import time is over budget")
+    if result["adk_loaded"]:
+        failures.append("importing the package loaded google.adk")
+    if result["agents_built"]:
+        failures.append("importing the package built agents")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print("✅ Import budget met")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,10 @@ Deploy the Digitide multi-agent system to Google Cloud
 """
 
 # export GOOGLE_APPLICATION_CREDENTIALS="../service_account.json" && python3 deploy.py
+# One engine per category: python3 deploy.py --sharded [--categories test compliance] [--settings shards.json]
 
+import argparse
+import json
 import vertexai
 from vertexai import agent_engines
 from google.oauth2 import service_account
@@ -13,7 +16,18 @@ import os
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from digitide_agents import create_digitide_system
+from digitide_agents import HistoryCompactor, create_digitide_app
+from digitide_agents.engine import StreamingAdkApp
+from digitide_agents.orchestrator import static_prefix_report
+from digitide_agents.registry import CATEGORY_TITLES, resolve_categories
+from digitide_agents.sharding import (
+    DEFAULT_MANIFEST_PATH,
+    create_shard_app,
+    load_manifest,
+    shard_display_name,
+    shard_settings,
+    write_manifest
+)
 
 # Configuration
 PROJECT_ID = "cloud-billed-1"
@@ -28,6 +42,17 @@ credentials = service_account.Credentials.from_service_account_file(
     scopes=["https://www.googleapis.com/auth/cloud-platform"]
 )
 
+REQUIREMENTS = [
+    "google-cloud-aiplatform[adk,agent_engines]",
+    "cloudpickle"
+]
+
+# The package is shipped with the engine; run deploy.py from the adk directory
+EXTRA_PACKAGES = ["digitide_agents"]
+
+# Turns between ADK's summaries of a session's older events
+COMPACTION_INTERVAL = 10
+
 # Initialize Vertex AI
 vertexai.init(
     project=PROJECT_ID,
@@ -44,22 +69,31 @@ def deploy():
     print("DEPLOYING DIGITIDE 38-AGENT SYSTEM")
     print("=" * 60)
 
-    # Create the orchestrator
-    orchestrator = create_digitide_system()
+    # Create the app; its context cache config keeps the orchestrator's static prefix cached,
+    # and the history compactor and event compaction keep long sessions from growing each turn
+    history = HistoryCompactor()
+    app = create_digitide_app(history=history, compaction_interval=COMPACTION_INTERVAL)
+    orchestrator = app.root_agent
 
     print(f"\n✅ Created orchestrator: {orchestrator.name}")
-    print(f"📊 Total agents: {len(orchestrator.tools)}")
+    print(f"📊 Total agents: {sum(hasattr(tool, 'agent') for tool in orchestrator.tools)}")
+    print(f"🗄️ Context cache: {app.context_cache_config.ttl_seconds}s TTL, {app.context_cache_config.cache_intervals} intervals")
+    print(f"🗜️ History: {history.token_budget} token budget, events compacted every {COMPACTION_INTERVAL} turns")
+
+    prefix = static_prefix_report(orchestrator)
+    print(
+        f"📏 Static prompt prefix: ~{prefix['total_tokens']} tokens "
+        f"({prefix['instruction_tokens']} instruction, {prefix['tool_tokens']} tool declarations)"
+    )
 
     print("\n🚀 Deploying to Google Cloud...")
 
     try:
-        # Deploy as agent engine
+        # Deploy as agent engine; StreamingAdkApp also streams sub-agent output
         engine = agent_engines.create(
-            agent_engine=orchestrator,
-            requirements=[
-                "google-cloud-aiplatform[adk,agent_engines]",
-                "cloudpickle"
-            ],
+            agent_engine=StreamingAdkApp(app=app),
+            requirements=REQUIREMENTS,
+            extra_packages=EXTRA_PACKAGES,
             display_name="digitide-38-agents",
             description="Healthcare test automation with 38 specialized agents"
         )
@@ -87,5 +121,75 @@ def deploy():
         traceback.print_exc()
 
 
+def deploy_sharded(categories=None, settings=None):
+    """Deploy each category as its own engine with its own replica settings"""
+
+    categories = resolve_categories(categories)
+
+    print("=" * 60)
+    print(f"DEPLOYING DIGITIDE AS {len(categories)} CATEGORY SHARDS")
+    print("=" * 60)
+
+    # Shards deployed earlier stay in the manifest, so categories can be redeployed one at a time
+    shards = load_manifest(DEFAULT_MANIFEST_PATH)["shards"]
+    failed = []
+
+    for category in categories:
+        shard = create_shard_app(category, history=HistoryCompactor(), compaction_interval=COMPACTION_INTERVAL)
+        replicas = shard_settings(category, settings)
+        display_name = shard_display_name(category)
+        print(
+            f"\n🚀 {display_name}: {sum(hasattr(tool, 'agent') for tool in shard.root_agent.tools)} agents, "
+            f"{replicas['min_instances']}-{replicas['max_instances']} instances"
+        )
+
+        try:
+            engine = agent_engines.create(
+                agent_engine=StreamingAdkApp(app=shard),
+                requirements=REQUIREMENTS,
+                extra_packages=EXTRA_PACKAGES,
+                display_name=display_name,
+                description=f"Digitide {CATEGORY_TITLES[category].lower()} agents",
+                **replicas
+            )
+        except Exception as e:
+            print(f"❌ Deployment of {display_name} failed: {e}")
+            failed.append(category)
+            continue
+
+        shards[category] = {
+            "engine_id": engine.resource_name.split('/')[-1],
+            "resource_name": engine.resource_name,
+            "display_name": display_name,
+            "settings": replicas
+        }
+        # Written after every shard so a failure later on does not lose the engines already created
+        write_manifest(shards, DEFAULT_MANIFEST_PATH, project_id=PROJECT_ID, location=LOCATION)
+        print(f"✅ Engine ID: {shards[category]['engine_id']}")
+
+    print(f"\n📋 {len(shards)} shards recorded in {DEFAULT_MANIFEST_PATH}")
+    if failed:
+        print(f"⚠️ Not deployed: {', '.join(failed)}")
+    return not failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sharded", action="store_true", help="Deploy one engine per category")
+    parser.add_argument("--categories", nargs="+", help="Categories to deploy with --sharded (default: all)")
+    parser.add_argument("--settings", help="JSON file of per-category replica settings overrides")
+    args = parser.parse_args()
+
+    if not args.sharded:
+        deploy()
+        return 0
+
+    settings = None
+    if args.settings:
+        with open(args.settings) as f:
+            settings = json.load(f)
+    return 0 if deploy_sharded(args.categories, settings) else 1
+
+
 if __name__ == "__main__":
-    deploy()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -3,9 +3,91 @@ Digitide Healthcare Test Automation - Multi-Agent System
 38 specialized AI agents for comprehensive healthcare test automation
 """
 
+import importlib
+
 __version__ = "1.0.0"
 
-# Import the orchestrator
-from .orchestrator import create_digitide_system
+# Public names and the modules they live in. They are imported on first
+# access so that importing the package does not load ADK or build agents.
+_EXPORTS = {
+    # The orchestrator
+    'create_digitide_system': '.orchestrator',
+    'create_digitide_app': '.orchestrator',
+
+    # Lazy agent registry
+    'get_agent': '.registry',
+    'build_agent': '.registry',
+    'agent_names': '.registry',
+
+    # Named pipelines that bypass the orchestrator
+    'PIPELINES': '.pipelines',
+    'create_pipeline': '.pipelines',
+    'run_pipeline': '.pipelines',
+
+    # Caching of specialist responses
+    'ResponseCache': '.cache',
+    'InMemoryCache': '.cache',
+    'DiskCache': '.cache',
+    'SemanticCache': '.semantic_cache',
+    'HashingEmbedder': '.semantic_cache',
+
+    # Tracing
+    'Tracer': '.tracing',
+    'JsonlSpanExporter': '.tracing',
+
+    # Bulk generation over many requirements
+    'run_batch': '.batch',
+    'BatchRunner': '.batch',
+    'regenerate_project': '.incremental',
+    'IncrementalGenerator': '.incremental',
+    'RegenerationStore': '.incremental',
+    'extract_document_requirements': '.documents',
+    'DocumentPipeline': '.documents',
+
+    # Local knowledge base behind rag_knowledge_engine
+    'KnowledgeIndex': '.knowledge_index',
+
+    # Near-duplicate test cases behind test_optimizer
+    'DuplicateIndex': '.duplicate_index',
+
+    # Seeded synthetic patient datasets behind synthetic_data_generator
+    'PatientScenario': '.synthetic_patients',
+    'generate_dataset': '.synthetic_patients',
+
+    # Tamper-evident audit log behind audit_trail_generator
+    'AuditLog': '.audit_log',
+
+    # Local PHI/PII scanning behind privacy_validator
+    'scan_file': '.phi_scanner',
+    'scan_stream': '.phi_scanner',
+
+    # Shared quota-aware scheduling of model calls
+    'ModelScheduler': '.scheduler',
+
+    # Streaming of sub-agent output
+    'stream_query': '.streaming',
+
+    # Token budget for the orchestrator's re-sent history
+    'HistoryCompactor': '.history',
+
+    # Warm sessions on the deployed engine
+    'SessionPool': '.session_pool',
+
+    # One engine per category behind a thin router
+    'ShardRouter': '.sharding',
+    'LocalShard': '.sharding'
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
 
-__all__ = ['create_digitide_system']
\ No newline at end of file
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
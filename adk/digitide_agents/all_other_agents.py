@@ -3,137 +3,193 @@ All remaining agents (22 agents)
 Categories: Code/API Testing, Risk/Quality, Documentation, Integration, Monitoring, Healthcare, System
 """
 
-from google import adk
+from .registry import AgentSpec, module_agent
 
 # CODE & API TESTING (3 agents)
-api_test_generator = adk.Agent(
+api_test_generator_spec = AgentSpec(
     name="api_test_generator",
-    model="gemini-2.5-pro",
+    category="code_api",
+    summary="Generate API test cases",
     instruction="Generate comprehensive API test cases including authentication, authorization, data validation, error handling, and performance tests."
 )
 
-code_analyzer = adk.Agent(
+code_analyzer_spec = AgentSpec(
     name="code_analyzer",
-    model="gemini-2.5-pro",
+    category="code_api",
+    summary="Analyze code change impact",
     instruction="Analyze code changes for impact on testing. Identify affected modules, estimate test effort, and recommend regression test scope."
 )
 
-security_test_agent = adk.Agent(
+security_test_agent_spec = AgentSpec(
     name="security_test_agent",
-    model="gemini-2.5-pro",
+    category="code_api",
+    summary="Generate security tests",
     instruction="Generate security test cases for OWASP Top 10, penetration testing, vulnerability scanning, and healthcare-specific security requirements."
 )
 
 # RISK & QUALITY (3 agents)
-risk_assessment = adk.Agent(
+risk_assessment_spec = AgentSpec(
     name="risk_assessment",
-    model="gemini-2.5-pro",
+    category="risk_quality",
+    summary="Assess project risks",
     instruction="Assess project risks including technical, compliance, and clinical risks. Provide risk matrices, mitigation strategies, and priority rankings."
 )
 
-quality_predictor = adk.Agent(
+quality_predictor_spec = AgentSpec(
     name="quality_predictor",
-    model="gemini-2.5-pro",
+    category="risk_quality",
+    summary="Predict quality metrics",
     instruction="Predict quality metrics based on test coverage, complexity, and historical data. Forecast defect rates and quality trends."
 )
 
-test_effectiveness = adk.Agent(
+test_effectiveness_spec = AgentSpec(
     name="test_effectiveness",
-    model="gemini-2.5-pro",
+    category="risk_quality",
+    summary="Measure test effectiveness",
     instruction="Measure test effectiveness through coverage analysis, defect detection rates, and test ROI. Identify improvement areas."
 )
 
 # DOCUMENTATION & REPORTING (3 agents)
-documentation_generator = adk.Agent(
+documentation_generator_spec = AgentSpec(
     name="documentation_generator",
-    model="gemini-2.5-pro",
+    category="documentation",
+    summary="Generate test documentation",
     instruction="Generate test plans, test reports, compliance documentation, and user guides. Follow medical device documentation standards."
 )
 
-report_analyzer = adk.Agent(
+report_analyzer_spec = AgentSpec(
     name="report_analyzer",
-    model="gemini-2.5-pro",
+    category="documentation",
+    summary="Analyze test reports",
     instruction="Analyze test reports for trends, patterns, and insights. Identify failure clusters and recommend corrective actions."
 )
 
-knowledge_extractor = adk.Agent(
+knowledge_extractor_spec = AgentSpec(
     name="knowledge_extractor",
-    model="gemini-2.5-pro",
+    category="documentation",
+    summary="Extract patterns from data",
     instruction="Extract knowledge from test results, defects, and documentation. Build knowledge base for future testing."
 )
 
 # INTEGRATION & ORCHESTRATION (3 agents)
-integration_coordinator = adk.Agent(
+integration_coordinator_spec = AgentSpec(
     name="integration_coordinator",
-    model="gemini-2.5-pro",
+    category="integration",
+    summary="Coordinate tool integrations",
     instruction="Coordinate integration with JIRA, GitHub, Slack, and other tools. Manage webhooks and API integrations."
 )
 
-workflow_orchestrator = adk.Agent(
+workflow_orchestrator_spec = AgentSpec(
     name="workflow_orchestrator",
-    model="gemini-2.5-pro",
+    category="integration",
+    summary="Orchestrate test workflows",
     instruction="Orchestrate end-to-end test workflows. Manage dependencies, parallel execution, and conditional flows."
 )
 
-devops_integration = adk.Agent(
+devops_integration_spec = AgentSpec(
     name="devops_integration",
-    model="gemini-2.5-pro",
+    category="integration",
+    summary="Integrate with CI/CD",
     instruction="Integrate with CI/CD pipelines (Jenkins, GitLab, GitHub Actions). Automate test execution and reporting."
 )
 
 # MONITORING & ANALYTICS (3 agents)
-performance_monitor = adk.Agent(
+performance_monitor_spec = AgentSpec(
     name="performance_monitor",
-    model="gemini-2.5-pro",
+    category="monitoring",
+    summary="Monitor system performance",
     instruction="Monitor system performance, response times, and resource usage. Generate performance baselines and alerts."
 )
 
-predictive_analytics = adk.Agent(
+predictive_analytics_spec = AgentSpec(
     name="predictive_analytics",
-    model="gemini-2.5-pro",
+    category="monitoring",
+    summary="Provide predictive insights",
     instruction="Provide predictive insights on defect trends, release quality, and testing timeline. Use ML for forecasting."
 )
 
-anomaly_detection = adk.Agent(
+anomaly_detection_spec = AgentSpec(
     name="anomaly_detection",
-    model="gemini-2.5-pro",
+    category="monitoring",
+    summary="Detect anomalies",
     instruction="Detect anomalies in test results, performance metrics, and system behavior. Alert on unusual patterns."
 )
 
 # SPECIALIZED HEALTHCARE (3 agents)
-medical_standards_interpreter = adk.Agent(
+medical_standards_interpreter_spec = AgentSpec(
     name="medical_standards_interpreter",
-    model="gemini-2.5-pro",
+    category="healthcare",
+    summary="Interpret medical standards",
     instruction="Interpret FDA, IEC 62304, ISO 14971, and other medical standards. Translate requirements into actionable test criteria."
 )
 
-clinical_validation = adk.Agent(
+clinical_validation_spec = AgentSpec(
     name="clinical_validation",
-    model="gemini-2.5-pro",
+    category="healthcare",
+    summary="Validate clinical algorithms",
     instruction="Validate clinical algorithms, decision support systems, and medical calculations. Ensure clinical accuracy and safety."
 )
 
-dicom_hl7_validator = adk.Agent(
+dicom_hl7_validator_spec = AgentSpec(
     name="dicom_hl7_validator",
-    model="gemini-2.5-pro",
-    instruction="Validate DICOM images, HL7 messages, and FHIR resources. Check format compliance and data integrity."
+    category="healthcare",
+    summary="Validate medical data formats",
+    tools=["validate_hl7_messages", "validate_fhir_resource", "validate_dicom_files"],
+    instruction="Validate DICOM images, HL7 messages, and FHIR resources. Check format compliance and data integrity. "
+                "Run the matching validation tool on the data and explain the violations it reports, with their impact "
+                "and fixes; do not check formats yourself or invent issues the tools did not find."
 )
 
 # SYSTEM-LEVEL (3 agents)
-master_coordinator = adk.Agent(
+master_coordinator_spec = AgentSpec(
     name="master_coordinator",
-    model="gemini-2.5-pro",
+    category="system",
+    summary="Coordinate complex multi-agent tasks",
     instruction="Coordinate all agents for complex tasks. Manage agent dependencies and aggregate results from multiple agents."
 )
 
-rag_knowledge_engine = adk.Agent(
+rag_knowledge_engine_spec = AgentSpec(
     name="rag_knowledge_engine",
-    model="gemini-2.5-pro",
-    instruction="Manage knowledge base with RAG. Search and retrieve relevant test cases, defects, and documentation."
+    category="system",
+    summary="Manage knowledge base",
+    tools=["search_knowledge_base"],
+    instruction="Manage knowledge base with RAG. Search and retrieve relevant test cases, defects, and documentation. "
+                "Always call search_knowledge_base first and ground answers in the documents it returns, citing their ids; "
+                "say so when nothing relevant is indexed instead of guessing."
 )
 
-pipeline_integration = adk.Agent(
+pipeline_integration_spec = AgentSpec(
     name="pipeline_integration",
-    model="gemini-2.5-pro",
+    category="system",
+    summary="Manage deployment pipelines",
     instruction="Manage deployment pipelines, environment provisioning, and release automation. Coordinate staging to production flows."
-)
\ No newline at end of file
+)
+
+AGENT_SPECS = [
+    api_test_generator_spec,
+    code_analyzer_spec,
+    security_test_agent_spec,
+    risk_assessment_spec,
+    quality_predictor_spec,
+    test_effectiveness_spec,
+    documentation_generator_spec,
+    report_analyzer_spec,
+    knowledge_extractor_spec,
+    integration_coordinator_spec,
+    workflow_orchestrator_spec,
+    devops_integration_spec,
+    performance_monitor_spec,
+    predictive_analytics_spec,
+    anomaly_detection_spec,
+    medical_standards_interpreter_spec,
+    clinical_validation_spec,
+    dicom_hl7_validator_spec,
+    master_coordinator_spec,
+    rag_knowledge_engine_spec,
+    pipeline_integration_spec
+]
+
+
+def __getattr__(name):
+    # Agents are built from their specs on first access
+    return module_agent(__name__, name)
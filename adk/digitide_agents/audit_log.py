@@ -0,0 +1,471 @@
+"""
+Append-only, tamper-evident audit log behind the audit_trail_generator agent
+Every entry is SHA-256 hash-chained to the one before it and is a leaf of an
+RFC 6962 (Certificate Transparency) Merkle tree, so any entry can be proven
+to be in the log, and any earlier state of the log to be a prefix of the
+current one, with O(log n) hashes. The log lives in a directory:
+
+    head.json              committed size, Merkle root and chain head
+    segment-000000.log     entries, SEGMENT_SIZE per file: length, JSON, chain hash
+    leaves.bin             32-byte leaf hash per entry, memory-mapped
+    roots.bin              32-byte Merkle root per full segment
+
+Appends are batched: one batch is one write per file and one head update.
+Verification re-reads the memory-mapped segments in a single streaming pass
+
+    python -m digitide_agents.audit_log verify audit/log
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import time
+
+# Relative to the working directory. On Agent Engine that is each replica's
+# own disk, which is lost on redeploys and scale-downs, and every replica
+# would keep a separate log; deployed engines need DIGITIDE_AUDIT_LOG set to
+# a directory on persistent storage shared by one writer
+DEFAULT_LOG_PATH = "audit/log"
+
+# Entries per segment file; a power of two, so full segments are Merkle subtrees
+SEGMENT_SIZE = 4096
+
+HASH_SIZE = 32
+
+_LENGTH = struct.Struct("<I")
+
+_EMPTY_ROOT = hashlib.sha256(b"").digest()
+
+_SEGMENT_FILE = re.compile(r"segment-(\d+)\.log$")
+
+
+def leaf_hash(data):
+    return hashlib.sha256(b"\x00" + data).digest()
+
+
+def node_hash(left, right):
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def chain_hash(previous, leaf):
+    return hashlib.sha256(previous + leaf).digest()
+
+
+def _split(size):
+    # Largest power of two smaller than size
+    return 1 << (size - 1).bit_length() - 1
+
+
+def encode_entry(entry):
+    return json.dumps(entry, sort_keys=True, separators=(",", ":")).encode()
+
+
+def verify_inclusion(leaf, index, size, proof, root):
+    """
+    Checks an inclusion proof (RFC 9162 2.1.3.2); leaf, proof and root are raw hashes
+    """
+    if index >= size:
+        return False
+    fn, sn, result = index, size - 1, leaf
+    for sibling in proof:
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            result = node_hash(sibling, result)
+            while not fn & 1 and fn != 0:
+                fn >>= 1
+                sn >>= 1
+        else:
+            result = node_hash(result, sibling)
+        fn >>= 1
+        sn >>= 1
+    return sn == 0 and result == root
+
+
+def verify_consistency(first_size, second_size, proof, first_root, second_root):
+    """
+    Checks a consistency proof (RFC 9162 2.1.4.2); proof and roots are raw hashes
+    """
+    if first_size > second_size:
+        return False
+    if first_size == second_size:
+        return not proof and first_root == second_root
+    if first_size == 0:
+        return not proof
+    if first_size & (first_size - 1) == 0:
+        proof = [first_root, *proof]
+    if not proof:
+        return False
+    fn, sn = first_size - 1, second_size - 1
+    while fn & 1:
+        fn >>= 1
+        sn >>= 1
+    first_result = second_result = proof[0]
+    for node in proof[1:]:
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            first_result = node_hash(node, first_result)
+            second_result = node_hash(node, second_result)
+            while not fn & 1 and fn != 0:
+                fn >>= 1
+                sn >>= 1
+        else:
+            second_result = node_hash(second_result, node)
+        fn >>= 1
+        sn >>= 1
+    return sn == 0 and first_result == first_root and second_result == second_root
+
+
+class AuditLog:
+    """
+    Hash-chained, Merkle-indexed append-only log of JSON entries
+
+    One process should write a log at a time. A batch that was not fully
+    written (a crash mid-append) is rolled back to the last committed head
+    when the log is opened.
+    """
+
+    def __init__(self, path=DEFAULT_LOG_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._leaves_map = None
+        os.makedirs(path, exist_ok=True)
+
+        head_path = os.path.join(path, "head.json")
+        if os.path.exists(head_path):
+            with open(head_path) as f:
+                self.head = json.load(f)
+        else:
+            self.head = {"size": 0, "root": _EMPTY_ROOT.hex(), "chain": _EMPTY_ROOT.hex(), "segment_bytes": 0,
+                         "updated_at": time.time()}
+        self._recover()
+        with open(self._roots_path, "rb") as f:
+            data = f.read()
+        self._roots = [data[i:i + HASH_SIZE] for i in range(0, len(data), HASH_SIZE)]
+        self._remap()
+
+    @property
+    def _leaves_path(self):
+        return os.path.join(self.path, "leaves.bin")
+
+    @property
+    def _roots_path(self):
+        return os.path.join(self.path, "roots.bin")
+
+    def _segment_path(self, segment):
+        return os.path.join(self.path, f"segment-{segment:06d}.log")
+
+    def __len__(self):
+        return self.head["size"]
+
+    def _recover(self):
+        # Drops anything written after the committed head
+        size = self.head["size"]
+        segment = size // SEGMENT_SIZE
+        for file_path, length in (
+            (self._leaves_path, size * HASH_SIZE),
+            (self._roots_path, segment * HASH_SIZE),
+            (self._segment_path(segment), self.head["segment_bytes"])
+        ):
+            with open(file_path, "ab") as f:
+                if f.tell() > length:
+                    f.truncate(length)
+        # A batch can span several segments, so every later segment file goes
+        for name in os.listdir(self.path):
+            match = _SEGMENT_FILE.match(name)
+            if match and int(match.group(1)) > segment:
+                os.remove(os.path.join(self.path, name))
+
+    def _remap(self):
+        if self._leaves_map is not None:
+            self._leaves_map.close()
+            self._leaves_map = None
+        if self.head["size"]:
+            with open(self._leaves_path, "rb") as f:
+                self._leaves_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _leaf(self, index):
+        return self._leaves_map[index * HASH_SIZE:(index + 1) * HASH_SIZE]
+
+    def _subtree(self, start, end):
+        # Merkle tree hash of leaves [start, end); full segments come from roots.bin
+        count = end - start
+        if count == 0:
+            return _EMPTY_ROOT
+        if count == 1:
+            return self._leaf(start)
+        if count == SEGMENT_SIZE and start % SEGMENT_SIZE == 0 and start // SEGMENT_SIZE < len(self._roots):
+            return self._roots[start // SEGMENT_SIZE]
+        k = _split(count)
+        return node_hash(self._subtree(start, start + k), self._subtree(start + k, end))
+
+    def _path(self, index, start, end):
+        if end - start == 1:
+            return []
+        k = _split(end - start)
+        if index < start + k:
+            return self._path(index, start, start + k) + [self._subtree(start + k, end)]
+        return self._path(index, start + k, end) + [self._subtree(start, start + k)]
+
+    def _subproof(self, first, start, end, complete):
+        if first == end - start:
+            return [] if complete else [self._subtree(start, end)]
+        k = _split(end - start)
+        if first <= k:
+            return self._subproof(first, start, start + k, complete) + [self._subtree(start + k, end)]
+        return self._subproof(first - k, start + k, end, False) + [self._subtree(start, start + k)]
+
+    def append_many(self, entries):
+        """
+        Appends JSON-serializable entries as one batch and returns
+        {"first_index", "size", "root"}; entries get a "logged_at" timestamp
+        """
+        with self._lock:
+            size = self.head["size"]
+            chain = bytes.fromhex(self.head["chain"])
+            segment_bytes = self.head["segment_bytes"]
+            first_index = size
+            now = time.time()
+
+            writes = {}
+            leaves = bytearray()
+            new_roots = []
+            for entry in entries:
+                data = encode_entry({"logged_at": now, **entry})
+                leaf = leaf_hash(data)
+                chain = chain_hash(chain, leaf)
+                segment = size // SEGMENT_SIZE
+                writes.setdefault(segment, bytearray()).extend(_LENGTH.pack(len(data)) + data + chain)
+                leaves.extend(leaf)
+                size += 1
+                if size % SEGMENT_SIZE == 0:
+                    new_roots.append(segment)
+
+            for segment, data in writes.items():
+                with open(self._segment_path(segment), "ab") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                segment_bytes = len(data) if segment != first_index // SEGMENT_SIZE else segment_bytes + len(data)
+            if size % SEGMENT_SIZE == 0:
+                segment_bytes = 0
+            with open(self._leaves_path, "ab") as f:
+                f.write(leaves)
+                f.flush()
+                os.fsync(f.fileno())
+
+            self.head["size"] = size
+            self._remap()
+            for segment in new_roots:
+                root = self._subtree(segment * SEGMENT_SIZE, (segment + 1) * SEGMENT_SIZE)
+                self._roots.append(root)
+                with open(self._roots_path, "ab") as f:
+                    f.write(root)
+
+            self.head = {
+                "size": size,
+                "root": self._subtree(0, size).hex(),
+                "chain": chain.hex(),
+                "segment_bytes": segment_bytes,
+                "updated_at": now
+            }
+            temporary = os.path.join(self.path, "head.json.tmp")
+            with open(temporary, "w") as f:
+                json.dump(self.head, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporary, os.path.join(self.path, "head.json"))
+            return {"first_index": first_index, "size": size, "root": self.head["root"]}
+
+    def append(self, entry):
+        return self.append_many([entry])
+
+    def _records(self, segment):
+        # Yields (data, chain hash) of a segment file, read through mmap;
+        # raises OSError if the file is missing and ValueError if it is truncated
+        file_path = self._segment_path(segment)
+        if not os.path.getsize(file_path):
+            return
+        with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            position = 0
+            end = self.head["segment_bytes"] if segment == self.head["size"] // SEGMENT_SIZE else len(data)
+            while position < end:
+                if position + _LENGTH.size > len(data):
+                    raise ValueError(f"{file_path} is truncated at byte {position}")
+                (length,) = _LENGTH.unpack_from(data, position)
+                position += _LENGTH.size
+                if position + length + HASH_SIZE > len(data):
+                    raise ValueError(f"{file_path} is truncated at byte {position}")
+                yield data[position:position + length], data[position + length:position + length + HASH_SIZE]
+                position += length + HASH_SIZE
+
+    def get(self, index):
+        """
+        Returns the entry at an index
+        """
+        if not 0 <= index < self.head["size"]:
+            raise IndexError(index)
+        segment, offset = divmod(index, SEGMENT_SIZE)
+        for position, (data, _) in enumerate(self._records(segment)):
+            if position == offset:
+                return json.loads(data)
+
+    def root(self, size=None):
+        """
+        Merkle root (hex) of the first size entries, the whole log by default
+        """
+        with self._lock:
+            size = self.head["size"] if size is None else size
+            if not 0 <= size <= self.head["size"]:
+                raise ValueError(f"Log has {self.head['size']} entries, not {size}")
+            return self._subtree(0, size).hex()
+
+    def inclusion_proof(self, index, size=None):
+        """
+        Proof that entry index is in the log of the first size entries
+
+        Returns {"index", "size", "leaf_hash", "root", "proof"} with hex hashes,
+        checked with verify_inclusion. Full segments contribute their stored
+        roots, so building a proof hashes at most the leaves of the entry's
+        segment and of the last, partial one.
+        """
+        with self._lock:
+            size = self.head["size"] if size is None else size
+            if not 0 <= index < size <= self.head["size"]:
+                raise ValueError(f"No entry {index} in a log of {size} entries")
+            return {
+                "index": index,
+                "size": size,
+                "leaf_hash": self._leaf(index).hex(),
+                "root": self._subtree(0, size).hex(),
+                "proof": [node.hex() for node in self._path(index, 0, size)]
+            }
+
+    def consistency_proof(self, first_size, second_size=None):
+        """
+        Proof that the log at first_size entries is a prefix of the log at second_size
+
+        Returns {"first_size", "second_size", "first_root", "second_root",
+        "proof"} with hex hashes, checked with verify_consistency.
+        """
+        with self._lock:
+            second_size = self.head["size"] if second_size is None else second_size
+            if not 0 <= first_size <= second_size <= self.head["size"]:
+                raise ValueError(f"Sizes must satisfy 0 <= {first_size} <= {second_size} <= {self.head['size']}")
+            proof = [] if first_size in (0, second_size) else self._subproof(first_size, 0, second_size, True)
+            return {
+                "first_size": first_size,
+                "second_size": second_size,
+                "first_root": self._subtree(0, first_size).hex(),
+                "second_root": self._subtree(0, second_size).hex(),
+                "proof": [node.hex() for node in proof]
+            }
+
+    def verify(self):
+        """
+        Re-reads every entry and checks leaf hashes, the hash chain, segment
+        roots and the committed root
+
+        Returns {"valid", "size", "root", "errors"}; errors name the first
+        entries or segments that do not match or cannot be read, up to 20.
+        """
+        with self._lock:
+            errors = []
+            chain = _EMPTY_ROOT
+            index = 0
+            size = self.head["size"]
+            for segment in range((size + SEGMENT_SIZE - 1) // SEGMENT_SIZE):
+                segment_leaves = []
+                try:
+                    for data, stored_chain in self._records(segment):
+                        leaf = leaf_hash(data)
+                        if index >= size:
+                            errors.append(f"Entry {index} is past the committed size")
+                            break
+                        if leaf != self._leaf(index):
+                            errors.append(f"Entry {index} does not match its leaf hash")
+                        # After an unreadable segment the chain resumes from the stored hashes
+                        chain = stored_chain if chain is None else chain_hash(chain, leaf)
+                        if chain != stored_chain:
+                            errors.append(f"Entry {index} breaks the hash chain")
+                            chain = stored_chain
+                        segment_leaves.append(leaf)
+                        index += 1
+                        if len(errors) >= 20:
+                            break
+                except (OSError, ValueError) as e:
+                    errors.append(f"Segment {segment} could not be read: {e}")
+                    index = min((segment + 1) * SEGMENT_SIZE, size)
+                    chain = None
+                    continue
+                if len(errors) >= 20:
+                    break
+                if segment < len(self._roots) and _tree_hash(segment_leaves) != self._roots[segment]:
+                    errors.append(f"Segment {segment} does not match its Merkle root")
+            if index != size and len(errors) < 20:
+                errors.append(f"Log has {index} entries, head says {size}")
+            if chain is not None and chain.hex() != self.head["chain"]:
+                errors.append("Hash chain does not end at the committed chain head")
+            if self._subtree(0, size).hex() != self.head["root"]:
+                errors.append("Merkle root does not match the committed root")
+            return {"valid": not errors, "size": size, "root": self.head["root"], "errors": errors[:20]}
+
+    def close(self):
+        with self._lock:
+            if self._leaves_map is not None:
+                self._leaves_map.close()
+                self._leaves_map = None
+
+
+def _tree_hash(leaves):
+    # Merkle tree hash of a list of leaf hashes
+    if not leaves:
+        return _EMPTY_ROOT
+    if len(leaves) == 1:
+        return leaves[0]
+    k = _split(len(leaves))
+    return node_hash(_tree_hash(leaves[:k]), _tree_hash(leaves[k:]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m digitide_agents.audit_log")
+    commands = parser.add_subparsers(dest="command", required=True)
+    append_parser = commands.add_parser("append", help="Append entries from a JSON lines file")
+    append_parser.add_argument("log", help="Log directory")
+    append_parser.add_argument("file")
+    verify_parser = commands.add_parser("verify", help="Check every entry against the hash chain and Merkle root")
+    verify_parser.add_argument("log", help="Log directory")
+    prove_parser = commands.add_parser("prove", help="Print the inclusion proof of an entry")
+    prove_parser.add_argument("log", help="Log directory")
+    prove_parser.add_argument("index", type=int)
+    args = parser.parse_args(argv)
+
+    log = AuditLog(args.log)
+    if args.command == "append":
+        with open(args.file) as f:
+            result = log.append_many(json.loads(line) for line in f if line.strip())
+        print(f"✅ Log holds {result['size']} entries, root {result['root']}")
+    elif args.command == "verify":
+        started = time.monotonic()
+        result = log.verify()
+        elapsed = time.monotonic() - started
+        if result["valid"]:
+            print(f"✅ {result['size']} entries verified in {elapsed:.2f}s, root {result['root']}")
+        else:
+            for error in result["errors"]:
+                print(f"❌ {error}")
+            return 1
+    else:
+        print(json.dumps({"entry": log.get(args.index), **log.inclusion_proof(args.index)}, indent=2))
+    log.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+"""
+Batch generation over many requirements
+Sends every requirement of a project straight to the specialists that handle
+it (test_case_generator and compliance_validator by default) instead of one
+orchestrator session per requirement, with bounded concurrency, backoff on
+rate limits and per-item retries. Results are yielded as each item finishes
+
+    python -m digitide_agents.batch requirements.json --context project.md --out results.jsonl
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import sys
+import time
+
+from .registry import build_agent
+from .runtime import DEFAULT_USER_ID, run_agent
+from .scheduler import BATCH, is_rate_limited
+
+DEFAULT_BATCH_AGENTS = ("test_case_generator", "compliance_validator")
+
+DEFAULT_MAX_CONCURRENCY = 8
+
+# Requirements up to this many characters can be packed with others into one call
+DEFAULT_PACK_MAX_CHARS = 800
+
+
+def requirement_id(requirement):
+    """
+    The requirement's own id, or one derived from its content
+
+    Derived ids do not depend on the requirement's position, so inserting or
+    reordering requirements leaves the others' ids, and their cached
+    outputs, unchanged.
+    """
+    if isinstance(requirement, dict) and requirement.get("id"):
+        return str(requirement["id"])
+    digest = hashlib.sha1(json.dumps(requirement, sort_keys=True).encode()).hexdigest()
+    return f"REQ-{digest[:8]}"
+
+
+def render_requirement(requirement_id_, requirement):
+    """
+    Renders one requirement for a prompt; dicts use the Requirement schema fields
+    """
+    if isinstance(requirement, str):
+        return f"[{requirement_id_}] {requirement}"
+    lines = [f"[{requirement_id_}] {requirement.get('title', '')}".rstrip()]
+    if requirement.get("description"):
+        lines.append(requirement["description"])
+    for criterion in requirement.get("acceptanceCriteria", []):
+        lines.append(f"- {criterion}")
+    if requirement.get("compliance"):
+        lines.append(f"Compliance: {', '.join(requirement['compliance'])}")
+    return "\n".join(lines)
+
+
+def pack_requirements(requirements, pack_size=1, pack_max_chars=DEFAULT_PACK_MAX_CHARS):
+    """
+    Groups requirements into work items of [(id, rendered text), ...]
+
+    Consecutive requirements of at most pack_max_chars characters are packed
+    up to pack_size per item; longer ones always get an item of their own.
+    """
+    items = []
+    current = []
+    for requirement in requirements:
+        id_ = requirement_id(requirement)
+        text = render_requirement(id_, requirement)
+        if pack_size <= 1 or len(text) > pack_max_chars:
+            items.append([(id_, text)])
+            continue
+        current.append((id_, text))
+        if len(current) == pack_size:
+            items.append(current)
+            current = []
+    if current:
+        items.append(current)
+    return items
+
+
+def batch_message(context, item):
+    # The shared context goes first so every call starts with the same prefix
+    parts = []
+    if context:
+        parts.append(f"Project context:\n{context}")
+    if len(item) == 1:
+        parts.append(f"Requirement:\n{item[0][1]}")
+    else:
+        parts.append(
+            "Requirements (handle each one separately and tag every result with its requirement id):\n"
+            + "\n\n".join(text for _, text in item)
+        )
+    return "\n\n".join(parts)
+
+
+class BatchRunner:
+    """
+    Runs a fixed set of specialists over many requirements
+
+    At most max_concurrency model calls run at once. A failed call is
+    retried up to max_retries times with exponential backoff and jitter;
+    a rate limit also pauses every other worker until the backoff is over,
+    so the whole batch slows down instead of hammering the quota.
+
+    scheduler is an optional scheduler.ModelScheduler; the batch agents
+    then queue their model calls on it at batch priority, behind
+    interactive traffic sharing the same scheduler.
+    """
+
+    def __init__(self, agents=DEFAULT_BATCH_AGENTS, max_concurrency=DEFAULT_MAX_CONCURRENCY, max_retries=3,
+                 base_delay=1.0, max_delay=60.0, user_id=DEFAULT_USER_ID, scheduler=None):
+        self.agents = {name: build_agent(name) for name in agents}
+        if scheduler:
+            for agent in self.agents.values():
+                scheduler.attach(agent, priority=BATCH)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.user_id = user_id
+        self._paused_until = 0.0
+        self.stats = {"calls": 0, "retries": 0, "rate_limited": 0, "failed": 0}
+
+    def _backoff(self, attempt):
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _wait_for_quota(self):
+        while True:
+            remaining = self._paused_until - time.monotonic()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(remaining)
+
+    async def _call(self, agent, message):
+        text, _ = await run_agent(agent, message, user_id=self.user_id)
+        if agent.output_schema is not None:
+            # Invalid JSON raises here and is retried like any other failure
+            return agent.output_schema.model_validate_json(text).model_dump(exclude_none=True)
+        return text
+
+    async def call(self, agent_name, message, semaphore):
+        """
+        Calls one agent with retries
+
+        Returns (output, error, attempts); error is None on success.
+        """
+        agent = self.agents[agent_name]
+        for attempt in range(self.max_retries + 1):
+            await self._wait_for_quota()
+            try:
+                async with semaphore:
+                    self.stats["calls"] += 1
+                    return await self._call(agent, message), None, attempt + 1
+            except Exception as e:
+                error = e
+                delay = self._backoff(attempt)
+                if is_rate_limited(e):
+                    self.stats["rate_limited"] += 1
+                    self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                if attempt < self.max_retries:
+                    self.stats["retries"] += 1
+                    await asyncio.sleep(delay)
+
+        self.stats["failed"] += 1
+        return None, f"{type(error).__name__}: {error}", self.max_retries + 1
+
+    async def run_item(self, agent_name, item, context, semaphore):
+        """
+        Runs one agent on one work item and returns its result dict
+        """
+        output, error, attempts = await self.call(agent_name, batch_message(context, item), semaphore)
+        return {
+            "agent": agent_name,
+            "requirement_ids": [id_ for id_, _ in item],
+            "output": output,
+            "error": error,
+            "attempts": attempts
+        }
+
+    async def run(self, requirements, context="", pack_size=1, pack_max_chars=DEFAULT_PACK_MAX_CHARS):
+        """
+        Yields one result dict per agent and work item, in completion order
+
+        Each result has "agent", "requirement_ids", "output" (parsed JSON for
+        agents with an output schema, text otherwise), "error" and "attempts".
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        items = pack_requirements(requirements, pack_size, pack_max_chars)
+        tasks = [
+            asyncio.create_task(self.run_item(agent_name, item, context, semaphore))
+            for item in items
+            for agent_name in self.agents
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+async def run_batch(requirements, context="", agents=DEFAULT_BATCH_AGENTS, pack_size=1,
+                    pack_max_chars=DEFAULT_PACK_MAX_CHARS, **options):
+    """
+    Runs the batch agents over a list of requirements, yielding results as they finish
+
+    requirements are strings or dicts with the Requirement schema fields;
+    options go to BatchRunner.
+    """
+    runner = BatchRunner(agents, **options)
+    async for result in runner.run(requirements, context, pack_size, pack_max_chars):
+        yield result
+
+
+async def _write_results(args):
+    with open(args.requirements) as f:
+        requirements = json.load(f)
+    if isinstance(requirements, dict):
+        requirements = requirements.get("requirements", [])
+    context = ""
+    if args.context:
+        with open(args.context) as f:
+            context = f.read()
+
+    out = open(args.out, "w") if args.out else sys.stdout
+    done = failed = 0
+    try:
+        async for result in run_batch(
+            requirements,
+            context,
+            agents=args.agent or DEFAULT_BATCH_AGENTS,
+            pack_size=args.pack_size,
+            max_concurrency=args.concurrency,
+            max_retries=args.retries
+        ):
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            done += 1
+            failed += result["error"] is not None
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"✅ {done} results, {failed} failed", file=sys.stderr)
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m digitide_agents.batch")
+    parser.add_argument("requirements", help="JSON list of requirements, or {\"requirements\": [...]}")
+    parser.add_argument("--context", help="File with the shared project context")
+    parser.add_argument("--out", help="JSON lines output file (default: stdout)")
+    parser.add_argument("--agent", action="append", help="Agent to run, repeatable (default: test_case_generator and compliance_validator)")
+    parser.add_argument("--pack-size", type=int, default=1, help="Small requirements packed per call")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY, help="Model calls at once")
+    parser.add_argument("--retries", type=int, default=3, help="Retries per item")
+    args = parser.parse_args(argv)
+    failed = asyncio.run(_write_results(args))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
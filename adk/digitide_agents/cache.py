@@ -0,0 +1,237 @@
+"""
+Response cache for specialist agent calls
+Repeated AgentTool calls with the same agent, model, instruction and
+normalized request are answered from the cache instead of the model
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from google.adk.tools.agent_tool import AgentTool
+
+from .callbacks import add_callbacks
+from .tracing import annotate
+
+# Errors seen by the model calls of the cached run in progress, if any
+_run_errors = contextvars.ContextVar("digitide_cached_run_errors", default=None)
+
+
+def normalize_request(text):
+    """
+    Normalizes a request so trivial differences share a cache entry
+    """
+    return " ".join(str(text).lower().split())
+
+
+def model_name(agent):
+    return getattr(agent.model, "model", agent.model) or ""
+
+
+def instruction_hash(agent):
+    instruction = agent.instruction
+    if callable(instruction):
+        instruction = f"{instruction.__module__}.{instruction.__qualname__}"
+    return hashlib.sha256(str(instruction).encode()).hexdigest()
+
+
+def cache_key(agent, args):
+    """
+    Builds the cache key for a call of an agent with the given tool args
+    """
+    if "request" in args:
+        request = normalize_request(args["request"])
+    else:
+        request = json.dumps(args, sort_keys=True)
+
+    key = json.dumps([agent.name, model_name(agent), instruction_hash(agent), request])
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class InMemoryCache:
+    """
+    In-process LRU cache with a time to live
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.time() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DiskCache:
+    """
+    Local on-disk cache stored in a SQLite file, shared across processes
+    """
+
+    def __init__(self, path="cache/agent_responses.sqlite", max_entries=100000, ttl_seconds=7 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, used_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+            self._db.execute("UPDATE responses SET used_at = ? WHERE key = ?", (now, key))
+            self._db.commit()
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + self.ttl_seconds, now)
+            )
+            # Drop expired entries, then the least recently used ones over the limit
+            self._db.execute("DELETE FROM responses WHERE expires_at < ?", (now,))
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+
+class ResponseCache:
+    """
+    Cache front end that keeps hit and miss counts per agent
+
+    semantic is an optional SemanticCache consulted when the exact lookup
+    misses, so near-duplicate requests can reuse an answer too.
+    """
+
+    def __init__(self, backend=None, semantic=None):
+        self.backend = backend or InMemoryCache()
+        self.semantic = semantic
+        self.hits = {}
+        self.misses = {}
+        self._lock = threading.Lock()
+
+    def get(self, agent, args):
+        value = self.backend.get(cache_key(agent, args))
+        if value is None and self.semantic:
+            value = self.semantic.lookup(agent, args)
+        with self._lock:
+            counts = self.misses if value is None else self.hits
+            counts[agent.name] = counts.get(agent.name, 0) + 1
+        return value
+
+    def set(self, agent, args, value):
+        self.backend.set(cache_key(agent, args), value)
+        if self.semantic:
+            self.semantic.add(agent, args, value)
+
+    def stats(self):
+        """
+        Returns hit and miss counts overall and per agent
+        """
+        hits = sum(self.hits.values())
+        misses = sum(self.misses.values())
+        stats = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "agents": {
+                name: {"hits": self.hits.get(name, 0), "misses": self.misses.get(name, 0)}
+                for name in sorted(set(self.hits) | set(self.misses))
+            }
+        }
+        if self.semantic:
+            stats["semantic"] = self.semantic.stats()
+        return stats
+
+
+def _record_model_error(callback_context, llm_response):
+    errors = _run_errors.get()
+    if errors is not None and (llm_response.error_code or llm_response.error_message):
+        errors.append(llm_response.error_message or llm_response.error_code)
+
+
+class CachedAgentTool(AgentTool):
+    """
+    AgentTool that answers repeated calls from a ResponseCache
+
+    Only runs whose model calls all succeeded are cached: a failed run
+    answers with its error message, which must not be served again.
+    """
+
+    def __init__(self, agent, cache, **kwargs):
+        super().__init__(agent=agent, **kwargs)
+        self.cache = cache
+        add_callbacks(agent, after_model=_record_model_error)
+
+    async def run_async(self, *, args, tool_context):
+        # Lookups may read the disk or call an embedding model, so they run off the event loop
+        cached = await asyncio.to_thread(self.cache.get, self.agent, args)
+        if cached is not None:
+            annotate(cache_hit=True)
+            if self.skip_summarization:
+                tool_context.actions.skip_summarization = True
+            return cached
+
+        errors = []
+        token = _run_errors.set(errors)
+        try:
+            result = await super().run_async(args=args, tool_context=tool_context)
+        finally:
+            _run_errors.reset(token)
+        # Empty results are how AgentTool reports a run without output
+        if result and not errors:
+            await asyncio.to_thread(self.cache.set, self.agent, args, result)
+        return result
@@ -0,0 +1,32 @@
+"""
+Helpers for attaching callbacks to agents
+Several features hook the same agent, so callbacks are appended instead of replaced
+"""
+
+_FIELDS = {
+    "before_model": "before_model_callback",
+    "after_model": "after_model_callback",
+    "on_model_error": "on_model_error_callback",
+    "before_tool": "before_tool_callback",
+    "after_tool": "after_tool_callback",
+    "on_tool_error": "on_tool_error_callback",
+    "before_agent": "before_agent_callback",
+    "after_agent": "after_agent_callback"
+}
+
+
+def add_callbacks(agent, **callbacks):
+    """
+    Appends callbacks to an agent, e.g. add_callbacks(agent, before_model=fn)
+    """
+    for kind, callback in callbacks.items():
+        if callback is None:
+            continue
+        field = _FIELDS[kind]
+        existing = getattr(agent, field)
+        if existing is None:
+            existing = []
+        elif not isinstance(existing, list):
+            existing = [existing]
+        setattr(agent, field, existing + [callback])
+    return agent
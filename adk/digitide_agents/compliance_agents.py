@@ -2,12 +2,13 @@
 Compliance and Validation Agents (3 agents)
 """
 
-from google import adk
+from .registry import AgentSpec, module_agent
 
 # Agent 6: Compliance Validator
-compliance_validator = adk.Agent(
+compliance_validator_spec = AgentSpec(
     name="compliance_validator",
-    model="gemini-2.5-pro",
+    category="compliance",
+    summary="Validate against HIPAA, FDA, ISO standards",
     instruction="""You are a healthcare regulatory compliance specialist.
 
     Your expertise covers:
@@ -34,9 +35,10 @@ compliance_validator = adk.Agent(
 )
 
 # Agent 7: Compliance Gap Analyzer
-compliance_gap_analyzer = adk.Agent(
+compliance_gap_analyzer_spec = AgentSpec(
     name="compliance_gap_analyzer",
-    model="gemini-2.5-pro",
+    category="compliance",
+    summary="Identify missing compliance requirements",
     instruction="""You are a compliance gap analysis expert for healthcare systems.
 
     Your responsibilities:
@@ -57,9 +59,10 @@ compliance_gap_analyzer = adk.Agent(
 )
 
 # Agent 8: Audit Trail Generator
-audit_trail_generator = adk.Agent(
+audit_trail_generator_spec = AgentSpec(
     name="audit_trail_generator",
-    model="gemini-2.5-pro",
+    category="compliance",
+    summary="Generate audit trails for traceability",
     instruction="""You are an audit trail and traceability specialist.
 
     Your responsibilities:
@@ -76,5 +79,21 @@ audit_trail_generator = adk.Agent(
     - Maintain ISO 13485 traceability requirements
     - Create cryptographic hashes for integrity verification
     - Map activities to compliance standards
-    """
-)
\ No newline at end of file
+
+    Record activities with the append_audit_events tool and check the log
+    with verify_audit_log and prove_audit_entry. Never write hashes or
+    proofs yourself; cite the roots and proofs the tools return.
+    """,
+    tools=["append_audit_events", "verify_audit_log", "prove_audit_entry"]
+)
+
+AGENT_SPECS = [
+    compliance_validator_spec,
+    compliance_gap_analyzer_spec,
+    audit_trail_generator_spec
+]
+
+
+def __getattr__(name):
+    # Agents are built from their specs on first access
+    return module_agent(__name__, name)
@@ -2,12 +2,13 @@
 Data and Content Generation Agents (3 agents)
 """
 
-from google import adk
+from .registry import AgentSpec, module_agent
 
 # Agent 9: Synthetic Data Generator
-synthetic_data_generator = adk.Agent(
+synthetic_data_generator_spec = AgentSpec(
     name="synthetic_data_generator",
-    model="gemini-2.5-pro",
+    category="data",
+    summary="Generate HIPAA-compliant test data",
     instruction="""You are a HIPAA-compliant synthetic data generation specialist.
 
     Your responsibilities:
@@ -25,13 +26,20 @@ synthetic_data_generator = adk.Agent(
     - Ensure no real PHI is included
     - Maintain data consistency and relationships
     - Support various medical data formats
-    """
+
+    Use the generate_synthetic_patients tool to produce datasets: choose the
+    patient count, ages, condition rates, date range, seed and format from
+    the request and let the tool sample the records. Do not write patient
+    records yourself; report the files, row counts and sample it returns.
+    """,
+    tools=["generate_synthetic_patients"]
 )
 
 # Agent 10: Privacy Validator
-privacy_validator = adk.Agent(
+privacy_validator_spec = AgentSpec(
     name="privacy_validator",
-    model="gemini-2.5-pro",
+    category="data",
+    summary="Validate data privacy compliance",
     instruction="""You are a data privacy and protection specialist.
 
     Your expertise includes:
@@ -53,13 +61,22 @@ privacy_validator = adk.Agent(
     - Check de-identification techniques
     - Validate consent management
     - Assess privacy risk levels
-    """
+
+    Scan data for PHI/PII with the scan_for_phi tool instead of reading it
+    yourself. Report its counts and spans as they are; only review the
+    findings it marks ambiguous, deciding from their context whether each
+    one is PHI.
+    """,
+    tools=["scan_for_phi"]
 )
 
 # Agent 11: Schema Generator
-schema_generator = adk.Agent(
+schema_generator_spec = AgentSpec(
     name="schema_generator",
-    model="gemini-2.5-pro",
+    category="data",
+    summary="Generate data schemas",
+    output_schema="DataSchema",
+    tools=["validate_fhir_resource"],
     instruction="""You are a medical data schema design specialist.
 
     Your responsibilities:
@@ -77,5 +94,17 @@ schema_generator = adk.Agent(
     - Include required vs optional fields
     - Add examples and documentation
     - Consider interoperability requirements
+    - Check FHIR examples with validate_fhir_resource before returning them
     """
-)
\ No newline at end of file
+)
+
+AGENT_SPECS = [
+    synthetic_data_generator_spec,
+    privacy_validator_spec,
+    schema_generator_spec
+]
+
+
+def __getattr__(name):
+    # Agents are built from their specs on first access
+    return module_agent(__name__, name)
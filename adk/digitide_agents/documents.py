@@ -0,0 +1,383 @@
+"""
+Map-reduce requirement extraction for long specification documents
+A document is split into section-aware chunks that overlap a little, the
+chunks go to requirement_extractor in parallel, and the per-chunk results are
+merged: requirements seen by two chunks (or stated twice) become one, and
+every requirement keeps the character spans of the text it came from. The
+latency of a long document is that of its slowest chunk
+
+    python -m digitide_agents.documents spec.md --out requirements.json --gaps
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+import time
+
+from .batch import DEFAULT_MAX_CONCURRENCY, BatchRunner
+from .knowledge_index import tokenize
+
+DEFAULT_CHUNK_CHARS = 12000
+
+DEFAULT_OVERLAP_CHARS = 800
+
+# Requirements of neighbouring chunks at least this similar are merged
+DUPLICATE_SIMILARITY = 0.7
+
+# Word overlap (Dice coefficient) a line needs with a requirement to count as its source
+MIN_SOURCE_OVERLAP = 0.3
+
+# Markdown headings and numbered headings such as "3.1 User Authentication"
+_HEADING = re.compile(r"^(?:(#{1,6})\s+(.+?)|((?:\d+\.)*\d+)\.?\s+([A-Z][^\n]{0,100}?))\s*$", re.MULTILINE)
+
+_REQUIREMENT_ID = re.compile(r"\b[A-Z][A-Z0-9]{1,9}[-_]\d{1,5}(?:\.\d+)*\b")
+
+_PRIORITY_RANKS = {"critical": 0, "high": 1, "medium": 2, "low": 3}
+
+_LIST_FIELDS = ("acceptanceCriteria", "compliance", "testScenarios", "dependencies", "risks")
+
+
+def split_sections(text):
+    """
+    Returns the sections of a document as dicts with start, end and the
+    heading path leading to them ("3. Functional > 3.1 Authentication")
+    """
+    sections = []
+    path = []
+    previous = 0
+    for match in _HEADING.finditer(text):
+        if match.start() > previous:
+            sections.append({"start": previous, "end": match.start(), "headings": " > ".join(t for _, t in path)})
+        if match.group(1):
+            level, title = len(match.group(1)), match.group(2)
+        else:
+            level, title = match.group(3).count(".") + 1, f"{match.group(3)} {match.group(4)}"
+        path = [(l, t) for l, t in path if l < level] + [(level, title.strip())]
+        previous = match.start()
+    sections.append({"start": previous, "end": len(text), "headings": " > ".join(t for _, t in path)})
+    return [section for section in sections if text[section["start"]:section["end"]].strip()]
+
+
+def _split_long(text, start, end, max_chars):
+    # Cuts an oversized section at paragraph, then line, then any boundary
+    pieces = []
+    while end - start > max_chars:
+        limit = start + max_chars
+        cut = text.rfind("\n\n", start + max_chars // 2, limit)
+        if cut < 0:
+            cut = text.rfind("\n", start + max_chars // 2, limit)
+        cut = limit if cut < 0 else cut + 1
+        pieces.append((start, cut))
+        start = cut
+    pieces.append((start, end))
+    return pieces
+
+
+def chunk_document(text, max_chars=DEFAULT_CHUNK_CHARS, overlap_chars=DEFAULT_OVERLAP_CHARS):
+    """
+    Packs whole sections into chunks of at most max_chars characters
+
+    A section longer than max_chars is split at paragraph boundaries. Every
+    chunk after the first also starts with up to overlap_chars characters of
+    the text before it (from a line start), so a requirement cut at a chunk
+    boundary is still seen whole. Chunks are dicts with index, start, end,
+    body_start (where the text not shared with the previous chunk begins),
+    headings and text.
+    """
+    pieces = []
+    for section in split_sections(text):
+        for start, end in _split_long(text, section["start"], section["end"], max_chars):
+            pieces.append((start, end, section["headings"]))
+
+    chunks = []
+    current = None
+    for start, end, headings in pieces:
+        if current is not None and end - current["body_start"] <= max_chars:
+            current["end"] = end
+            continue
+        if current is not None:
+            chunks.append(current)
+        overlap_start = start
+        if chunks or current is not None:
+            line_start = text.find("\n", max(0, start - overlap_chars), start)
+            overlap_start = start if line_start < 0 else line_start + 1
+        current = {"start": overlap_start, "end": end, "body_start": start, "headings": headings}
+    if current is not None:
+        chunks.append(current)
+
+    for index, chunk in enumerate(chunks):
+        chunk["index"] = index
+        chunk["text"] = text[chunk["start"]:chunk["end"]]
+    return chunks
+
+
+def chunk_message(chunk, chunk_count, title=""):
+    parts = []
+    if title:
+        parts.append(f"Document: {title}")
+    parts.append(f"Part {chunk['index'] + 1} of {chunk_count}, characters {chunk['start']}-{chunk['end']}")
+    if chunk["headings"]:
+        parts.append(f"Section: {chunk['headings']}")
+    if chunk["body_start"] > chunk["start"]:
+        parts.append(
+            f"The first {chunk['body_start'] - chunk['start']} characters repeat the end of the previous part; "
+            "extract requirements that start there only if they continue into this part."
+        )
+    parts.append(f"---\n{chunk['text']}")
+    return "\n".join(parts)
+
+
+class _SourceLocator:
+    """
+    Finds the line of a chunk a requirement was extracted from
+    """
+
+    def __init__(self, chunk):
+        self.chunk = chunk
+        self.lines = []
+        position = 0
+        for line in chunk["text"].splitlines(keepends=True):
+            words = set(tokenize(line))
+            if words:
+                self.lines.append((position, position + len(line.rstrip()), line, words))
+            position += len(line)
+
+    def locate(self, requirement):
+        """
+        Returns (start, end, document id) in document offsets, or None
+        """
+        words = set(tokenize(f"{requirement.get('title', '')} {requirement.get('description', '')}"))
+        if not words:
+            return None
+
+        def score(line_words):
+            return 2 * len(words & line_words) / (len(words) + len(line_words))
+
+        # The model's id only counts if the line carrying it says the same
+        # thing; models also number requirements themselves
+        requirement_id = requirement.get("id", "")
+        if requirement_id:
+            for start, end, line, line_words in self.lines:
+                if re.search(rf"\b{re.escape(requirement_id)}\b", line) and score(line_words) >= MIN_SOURCE_OVERLAP:
+                    return self.chunk["start"] + start, self.chunk["start"] + end, requirement_id
+
+        best = None
+        best_score = MIN_SOURCE_OVERLAP
+        for start, end, line, line_words in self.lines:
+            if score(line_words) > best_score:
+                best, best_score = (start, end, line), score(line_words)
+        if best is None:
+            return None
+        start, end, line = best
+        ids = _REQUIREMENT_ID.findall(line)
+        return self.chunk["start"] + start, self.chunk["start"] + end, ids[0] if ids else None
+
+
+def _similarity(a, b):
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def _merge(target, requirement):
+    if len(requirement.get("description", "")) > len(target.get("description", "")):
+        target["description"] = requirement["description"]
+    if _PRIORITY_RANKS.get(requirement.get("priority"), 9) < _PRIORITY_RANKS.get(target.get("priority"), 9):
+        target["priority"] = requirement["priority"]
+    for field in _LIST_FIELDS:
+        values = target.setdefault(field, [])
+        values.extend(value for value in requirement.get(field, []) if value not in values)
+    for key, value in requirement.items():
+        target.setdefault(key, value)
+
+
+def merge_requirements(chunk_results):
+    """
+    Reduces [(chunk, [requirement, ...]), ...] to one deduplicated list
+
+    Requirements are the same when they carry the same identifier found in
+    the document text, come from the same source line, or (when one could
+    not be located) have titles and descriptions at least
+    DUPLICATE_SIMILARITY alike in the same or a neighbouring chunk. Each
+    merged requirement gets "sourceSpans" (sorted [start, end] document
+    offsets) and "chunks". Identifiers found in the document are kept; the
+    others are renumbered REQ-001... in document order.
+    """
+    merged = []
+    by_document_id = {}
+    by_span = {}
+    for chunk, requirements in chunk_results:
+        locator = _SourceLocator(chunk)
+        for requirement in requirements:
+            requirement = dict(requirement)
+            located = locator.locate(requirement)
+            span = located[:2] if located else None
+            document_id = located[2] if located else None
+            words = set(tokenize(f"{requirement.get('title', '')} {requirement.get('description', '')}"))
+
+            target = by_document_id.get(document_id) if document_id else None
+            if target is None and span is not None:
+                target = by_span.get(span)
+            if target is None:
+                for candidate in reversed(merged):
+                    if candidate["_last_chunk"] < chunk["index"] - 1:
+                        break
+                    if span is not None and candidate["sourceSpans"]:
+                        # Both located, at different lines: two requirements that read alike
+                        continue
+                    if _similarity(words, candidate["_words"]) >= DUPLICATE_SIMILARITY:
+                        target = candidate
+                        break
+
+            if target is None:
+                target = {**requirement, "sourceSpans": [], "chunks": [], "_words": words, "_document_id": None}
+                merged.append(target)
+            else:
+                _merge(target, requirement)
+            if span is not None and list(span) not in target["sourceSpans"]:
+                target["sourceSpans"].append(list(span))
+                by_span[span] = target
+            if chunk["index"] not in target["chunks"]:
+                target["chunks"].append(chunk["index"])
+            target["_last_chunk"] = chunk["index"]
+            if document_id and not target["_document_id"]:
+                target["_document_id"] = document_id
+                by_document_id[document_id] = target
+
+    merged.sort(key=lambda requirement: min(requirement["sourceSpans"], default=[float("inf")]))
+    used = {requirement["_document_id"] for requirement in merged if requirement["_document_id"]}
+    number = 0
+    for requirement in merged:
+        requirement["sourceSpans"].sort()
+        if requirement["_document_id"]:
+            requirement["id"] = requirement["_document_id"]
+        else:
+            number += 1
+            while f"REQ-{number:03d}" in used:
+                number += 1
+            requirement["id"] = f"REQ-{number:03d}"
+        for key in ("_words", "_document_id", "_last_chunk"):
+            del requirement[key]
+    return merged
+
+
+class DocumentPipeline:
+    """
+    Extracts the requirements of a long document chunk by chunk
+
+    Chunks run through a BatchRunner, so they share its concurrency limit,
+    retries, backoff and optional scheduler (pass scheduler=... in options).
+    With gaps=True document_gap_analyst also reviews every chunk.
+    """
+
+    def __init__(self, max_chunk_chars=DEFAULT_CHUNK_CHARS, overlap_chars=DEFAULT_OVERLAP_CHARS,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY, gaps=False, **options):
+        agents = ["requirement_extractor"] + (["document_gap_analyst"] if gaps else [])
+        self.runner = BatchRunner(agents, max_concurrency=max_concurrency, **options)
+        self.max_chunk_chars = max_chunk_chars
+        self.overlap_chars = overlap_chars
+        self.max_concurrency = max_concurrency
+        self.gaps = gaps
+
+    async def _run_chunk(self, agent_name, message, semaphore, latencies):
+        started = time.monotonic()
+        result = await self.runner.call(agent_name, message, semaphore)
+        latencies.append(time.monotonic() - started)
+        return result
+
+    async def extract(self, text, title=""):
+        """
+        Returns {"requirements", "gaps", "errors", "stats"}
+
+        requirements follow the Requirement schema plus sourceSpans and
+        chunks; gaps (with gaps=True) hold one review per chunk with its
+        offsets and headings; errors list the chunks that failed.
+        """
+        started = time.monotonic()
+        chunks = chunk_document(text, self.max_chunk_chars, self.overlap_chars)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        latencies = []
+        jobs = [
+            (agent_name, chunk)
+            for chunk in chunks
+            for agent_name in self.runner.agents
+        ]
+        results = await asyncio.gather(*(
+            self._run_chunk(agent_name, chunk_message(chunk, len(chunks), title), semaphore, latencies)
+            for agent_name, chunk in jobs
+        ))
+
+        extracted = []
+        gaps = []
+        errors = []
+        for (agent_name, chunk), (output, error, _) in zip(jobs, results):
+            if error is not None:
+                errors.append({"agent": agent_name, "chunk": chunk["index"], "error": error})
+            elif agent_name == "requirement_extractor":
+                extracted.append((chunk, output.get("requirements", [])))
+            else:
+                gaps.append({
+                    "chunk": chunk["index"], "start": chunk["start"], "end": chunk["end"],
+                    "headings": chunk["headings"], "review": output
+                })
+
+        requirements = merge_requirements(extracted)
+        return {
+            "requirements": requirements,
+            "gaps": gaps,
+            "errors": errors,
+            "stats": {
+                "characters": len(text),
+                "chunks": len(chunks),
+                "extracted": sum(len(found) for _, found in extracted),
+                "requirements": len(requirements),
+                "slowest_chunk_seconds": round(max(latencies, default=0.0), 2),
+                "total_seconds": round(time.monotonic() - started, 2)
+            }
+        }
+
+
+async def extract_document_requirements(text, title="", **options):
+    """
+    Splits a document into chunks, extracts from them in parallel and merges the results
+    """
+    pipeline = DocumentPipeline(**options)
+    return await pipeline.extract(text, title)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m digitide_agents.documents")
+    parser.add_argument("document", help="Text or Markdown document")
+    parser.add_argument("--out", help="JSON output file (default: stdout)")
+    parser.add_argument("--chunk-chars", type=int, default=DEFAULT_CHUNK_CHARS)
+    parser.add_argument("--overlap-chars", type=int, default=DEFAULT_OVERLAP_CHARS)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY, help="Model calls at once")
+    parser.add_argument("--gaps", action="store_true", help="Also run document_gap_analyst on every chunk")
+    args = parser.parse_args(argv)
+
+    with open(args.document) as f:
+        text = f.read()
+    result = asyncio.run(extract_document_requirements(
+        text,
+        title=args.document,
+        max_chunk_chars=args.chunk_chars,
+        overlap_chars=args.overlap_chars,
+        max_concurrency=args.concurrency,
+        gaps=args.gaps
+    ))
+    output = json.dumps(result, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+    stats = result["stats"]
+    print(
+        f"✅ {stats['requirements']} requirements ({stats['extracted']} extracted) from {stats['chunks']} chunks "
+        f"in {stats['total_seconds']}s, {len(result['errors'])} failed",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
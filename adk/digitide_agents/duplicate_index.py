@@ -0,0 +1,346 @@
+"""
+Near-duplicate index of test cases for the test_optimizer agent
+Every test case is reduced to a MinHash signature of the word shingles of its
+normalized steps and expected result. LSH banding turns a new test into a
+handful of candidate matches instead of a comparison with the whole suite, so
+inserting a test and listing duplicate clusters stay near-linear. Pairs that
+are clearly duplicates are clustered locally; only borderline pairs are left
+for the model to judge
+
+    python -m digitide_agents.duplicate_index add knowledge/duplicates test_cases.json
+    python -m digitide_agents.duplicate_index clusters knowledge/duplicates
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import threading
+
+from .knowledge_index import tokenize
+
+DEFAULT_INDEX_PATH = "knowledge/duplicates"
+
+# 16 bands of 4 rows: pairs above ~0.5 Jaccard similarity become candidates
+DEFAULT_PERMUTATIONS = 64
+DEFAULT_BANDS = 16
+
+# Estimated similarity at or above which two tests are duplicates
+DUPLICATE_SIMILARITY = 0.85
+
+# Estimated similarity from which a pair is worth a closer look
+BORDERLINE_SIMILARITY = 0.55
+
+# Earlier members of an LSH bucket a new test is compared with
+MAX_BUCKET_COMPARISONS = 50
+
+# a * x + b with a < 2**31 and 32-bit x fits in an unsigned 64-bit integer,
+# so the NumPy and pure Python paths give identical signatures
+_PRIME = (1 << 31) - 1
+
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+
+def normalize_test_case(test_case):
+    """
+    Words of a test case's steps and expected result, numbers replaced by "#"
+
+    Test data values differ between otherwise identical tests, so they are
+    not part of the comparison. Strings are used as they are.
+    """
+    if isinstance(test_case, str):
+        text = test_case
+    else:
+        steps = test_case.get("steps") or []
+        if isinstance(steps, str):
+            steps = [steps]
+        text = "\n".join([*steps, test_case.get("expectedResult", "")])
+    return tokenize(_NUMBER.sub(" # ", text))
+
+
+def shingles(words, size=3):
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def test_case_id(test_case, occurrence=1):
+    """
+    The test's own id, or a stable one derived from its title and steps
+
+    occurrence numbers identical id-less tests within one batch, so they
+    stay apart while adding the same suite again gives the same ids.
+    """
+    if isinstance(test_case, dict) and test_case.get("id"):
+        return str(test_case["id"])
+    title = test_case.get("title", "") if isinstance(test_case, dict) else ""
+    content = json.dumps([title, normalize_test_case(test_case)])
+    test_id = f"TC-{hashlib.sha1(content.encode()).hexdigest()[:10]}"
+    return test_id if occurrence == 1 else f"{test_id}-{occurrence}"
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+class MinHasher:
+    """
+    MinHash signatures from universal hashes (a * x + b) mod p of 32-bit shingle hashes
+    """
+
+    def __init__(self, permutations=DEFAULT_PERMUTATIONS, seed=1):
+        rng = random.Random(seed)
+        self.permutations = permutations
+        self.a = [rng.randrange(1, _PRIME) for _ in range(permutations)]
+        self.b = [rng.randrange(0, _PRIME) for _ in range(permutations)]
+
+    def signature(self, shingle_set):
+        hashes = [
+            int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=4).digest(), "little")
+            for shingle in shingle_set
+        ]
+        if not hashes:
+            return [_PRIME] * self.permutations
+        numpy = _numpy()
+        if numpy is not None:
+            x = numpy.array(hashes, dtype=numpy.uint64)
+            a = numpy.array(self.a, dtype=numpy.uint64)[:, None]
+            b = numpy.array(self.b, dtype=numpy.uint64)[:, None]
+            return ((a * x + b) % numpy.uint64(_PRIME)).min(axis=1).tolist()
+        return [min((a * x + b) % _PRIME for x in hashes) for a, b in zip(self.a, self.b)]
+
+
+def estimated_similarity(first, second):
+    """
+    Estimated Jaccard similarity of the shingle sets behind two signatures
+    """
+    return sum(1 for x, y in zip(first, second) if x == y) / len(first)
+
+
+class DuplicateIndex:
+    """
+    Incrementally updated MinHash/LSH index of test cases
+
+    add() compares a test with the LSH candidates already in the index and
+    records every pair at or above BORDERLINE_SIMILARITY, so clusters() only
+    walks recorded pairs. With a path the index is kept in an append-only
+    signatures.jsonl there and reloaded on open; without one it lives in
+    memory only.
+    """
+
+    def __init__(self, path=None, permutations=DEFAULT_PERMUTATIONS, bands=DEFAULT_BANDS):
+        if permutations % bands:
+            raise ValueError("permutations must be a multiple of bands")
+        self.path = path
+        self.hasher = MinHasher(permutations)
+        self.bands = bands
+        self.rows = permutations // bands
+        self._lock = threading.Lock()
+        self.entries = {}
+        self.buckets = {}
+        self.similar = {}
+
+        if path:
+            os.makedirs(path, exist_ok=True)
+            if os.path.exists(self._log_path):
+                with open(self._log_path) as f:
+                    for line in f:
+                        if line.strip():
+                            self._apply(json.loads(line))
+
+    @property
+    def _log_path(self):
+        return os.path.join(self.path, "signatures.jsonl")
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _band_keys(self, signature):
+        return [
+            (band, tuple(signature[band * self.rows:(band + 1) * self.rows]))
+            for band in range(self.bands)
+        ]
+
+    def _remove(self, test_id):
+        entry = self.entries.pop(test_id, None)
+        if entry is None:
+            return
+        for key in self._band_keys(entry["signature"]):
+            bucket = self.buckets.get(key)
+            if bucket is not None:
+                bucket.remove(test_id)
+                if not bucket:
+                    del self.buckets[key]
+        for other in self.similar.pop(test_id, {}):
+            self.similar[other].pop(test_id, None)
+
+    def _apply(self, record):
+        # Applies one signatures.jsonl record to the in-memory index
+        self._remove(record["id"])
+        if record.get("deleted"):
+            return
+        signature = record["signature"]
+        matches = {}
+        for key in self._band_keys(signature):
+            bucket = self.buckets.setdefault(key, [])
+            for other in bucket[-MAX_BUCKET_COMPARISONS:]:
+                if other not in matches:
+                    matches[other] = estimated_similarity(signature, self.entries[other]["signature"])
+            bucket.append(record["id"])
+        self.entries[record["id"]] = {"title": record.get("title", ""), "signature": signature}
+        self.similar[record["id"]] = {}
+        for other, similarity in matches.items():
+            if similarity >= BORDERLINE_SIMILARITY:
+                self.similar[record["id"]][other] = similarity
+                self.similar[other][record["id"]] = similarity
+
+    def add_many(self, test_cases):
+        """
+        Adds test cases (dicts with the TestCase fields, or strings); returns their ids
+
+        A test case replaces an earlier one with the same id (see
+        test_case_id), so adding a suite again updates it instead of
+        duplicating it. Test cases without steps or expected result have
+        nothing to compare and are skipped; their id is None.
+        """
+        ids = []
+        records = []
+        occurrences = {}
+        for test_case in test_cases:
+            shingle_set = shingles(normalize_test_case(test_case))
+            if not shingle_set:
+                ids.append(None)
+                continue
+            base_id = test_case_id(test_case)
+            occurrences[base_id] = occurrences.get(base_id, 0) + 1
+            test_id = base_id if occurrences[base_id] == 1 else test_case_id(test_case, occurrences[base_id])
+            ids.append(test_id)
+            records.append({
+                "id": test_id,
+                "title": test_case.get("title", "") if isinstance(test_case, dict) else test_case[:80],
+                "signature": self.hasher.signature(shingle_set)
+            })
+
+        with self._lock:
+            if self.path:
+                with open(self._log_path, "a") as f:
+                    for record in records:
+                        f.write(json.dumps(record) + "\n")
+            for record in records:
+                self._apply(record)
+        return ids
+
+    def add(self, test_case):
+        return self.add_many([test_case])[0]
+
+    def delete(self, test_id):
+        with self._lock:
+            if test_id not in self.entries:
+                return False
+            record = {"id": test_id, "deleted": True}
+            if self.path:
+                with open(self._log_path, "a") as f:
+                    f.write(json.dumps(record) + "\n")
+            self._apply(record)
+            return True
+
+    def matches(self, test_id):
+        """
+        Returns [(other id, estimated similarity)] of a test, most similar first
+        """
+        with self._lock:
+            return sorted(self.similar.get(test_id, {}).items(), key=lambda item: -item[1])
+
+    def clusters(self, ids=None, duplicate_similarity=DUPLICATE_SIMILARITY):
+        """
+        Groups duplicates and lists the borderline pairs
+
+        Returns {"clusters": [[id, ...], ...], "borderline": [(id, id,
+        similarity), ...]}. Clusters are connected components of pairs at or
+        above duplicate_similarity, largest first; borderline pairs fall
+        between BORDERLINE_SIMILARITY and that, most similar first. With
+        ids, only clusters and pairs involving those tests are returned.
+        """
+        with self._lock:
+            parent = {}
+
+            def find(item):
+                parent.setdefault(item, item)
+                while parent[item] != item:
+                    parent[item] = parent[parent[item]]
+                    item = parent[item]
+                return item
+
+            borderline = []
+            wanted = None if ids is None else set(ids)
+            for test_id, others in self.similar.items():
+                for other, similarity in others.items():
+                    if other <= test_id:
+                        continue
+                    if similarity >= duplicate_similarity:
+                        parent[find(test_id)] = find(other)
+                    elif wanted is None or test_id in wanted or other in wanted:
+                        borderline.append((test_id, other, round(similarity, 3)))
+
+            groups = {}
+            for item in list(parent):
+                groups.setdefault(find(item), []).append(item)
+            clusters = [
+                sorted(group) for group in groups.values()
+                if len(group) > 1 and (wanted is None or wanted.intersection(group))
+            ]
+            clusters.sort(key=lambda group: (-len(group), group))
+            borderline.sort(key=lambda pair: -pair[2])
+            return {"clusters": clusters, "borderline": borderline}
+
+    def title(self, test_id):
+        entry = self.entries.get(test_id)
+        return entry["title"] if entry else ""
+
+
+def read_test_cases(path):
+    """
+    Reads test cases from a JSON list, {"testCases": [...]} or JSON lines file
+    """
+    with open(path) as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        data = json.load(f)
+    return data.get("testCases", []) if isinstance(data, dict) else data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m digitide_agents.duplicate_index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add_parser = commands.add_parser("add", help="Add or replace test cases from JSON or JSON lines files")
+    add_parser.add_argument("index", help="Index directory")
+    add_parser.add_argument("files", nargs="+")
+    clusters_parser = commands.add_parser("clusters", help="List duplicate clusters and borderline pairs")
+    clusters_parser.add_argument("index", help="Index directory")
+    clusters_parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    index = DuplicateIndex(args.index)
+    if args.command == "add":
+        for path in args.files:
+            added = [test_id for test_id in index.add_many(read_test_cases(path)) if test_id is not None]
+            print(f"✅ Added {len(added)} test cases from {path}")
+        print(f"📊 Index holds {len(index)} test cases")
+    else:
+        result = index.clusters()
+        print(f"📊 {len(result['clusters'])} duplicate clusters, {len(result['borderline'])} borderline pairs")
+        for cluster in result["clusters"][:args.limit]:
+            print(f"🔁 {', '.join(f'{test_id} ({index.title(test_id)})' for test_id in cluster)}")
+        for first, second, similarity in result["borderline"][:args.limit]:
+            print(f"❓ {similarity:.2f}  {index.title(first)}  |  {index.title(second)}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
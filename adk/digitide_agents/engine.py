@@ -0,0 +1,26 @@
+"""
+Agent Engine wrapper of the Digitide app
+StreamingAdkApp is the object deploy.py hands to agent_engines.create(). Its
+stream_query also forwards what the specialists stream while they answer, so
+callers of the deployed engine see the first tokens before the orchestrator's
+turn ends
+"""
+
+from vertexai.agent_engines import AdkApp
+
+from .streaming import _with_listener
+
+
+class StreamingAdkApp(AdkApp):
+    """
+    AdkApp whose async_stream_query interleaves sub-agent partial output
+
+    Besides the usual event dicts it yields {"type": "partial", "agent":
+    name, "text": chunk} and {"type": "agent_done", "agent": name}. Event
+    dicts have no "type" key, so callers that only read events are
+    unaffected.
+    """
+
+    async def async_stream_query(self, **kwargs):
+        async for item in _with_listener(super().async_stream_query(**kwargs), lambda event: event):
+            yield item
@@ -0,0 +1,103 @@
+"""
+Parallel fan-out execution for independent specialist calls
+The orchestrator plans a set of specialists, they run at the same time, and
+their results come back in one tool response for a single aggregation step
+"""
+
+import asyncio
+
+from google.adk.tools import FunctionTool, ToolContext
+
+# Upper bound on specialists running at once for a single fan-out call
+DEFAULT_MAX_CONCURRENCY = 4
+
+# Per-category limit used when a category is enabled without an explicit one
+DEFAULT_CATEGORY_CONCURRENCY = 2
+
+
+def normalize_fan_out(fan_out, categories):
+    """
+    Turns the fan_out argument of create_digitide_system into {category: limit}
+
+    Accepts a list of category names, a dict of category name to concurrency
+    limit, or True for every category.
+    """
+    if fan_out is True:
+        fan_out = list(categories)
+    if not isinstance(fan_out, dict):
+        fan_out = {category: DEFAULT_CATEGORY_CONCURRENCY for category in fan_out}
+
+    unknown = set(fan_out) - set(categories)
+    if unknown:
+        raise ValueError(f"Unknown fan-out categories: {', '.join(sorted(unknown))}")
+
+    return {category: max(1, int(limit)) for category, limit in fan_out.items()}
+
+
+def create_fan_out_tool(agent_tools, categories, fan_out, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+    """
+    Creates the run_agents_in_parallel tool for the orchestrator
+
+    agent_tools maps agent names to the AgentTools already given to the
+    orchestrator, categories maps category names to agent names, and fan_out
+    maps the enabled categories to their concurrency limits.
+    """
+    limits = normalize_fan_out(fan_out, categories)
+    agent_category = {
+        name: category
+        for category in limits
+        for name in categories[category]
+    }
+
+    async def run_agents_in_parallel(request: str, agents: list[str], tool_context: ToolContext) -> dict:
+        # Semaphores are created per call so they bind to the running loop
+        overall = asyncio.Semaphore(max_concurrency)
+        per_category = {category: asyncio.Semaphore(limit) for category, limit in limits.items()}
+
+        async def run_one(name):
+            async with per_category[agent_category[name]], overall:
+                return await agent_tools[name].run_async(
+                    args={"request": request},
+                    tool_context=tool_context
+                )
+
+        selected = list(dict.fromkeys(agents))
+        runnable = [name for name in selected if name in agent_category]
+        errors = {
+            name: "Agent is not available for parallel execution"
+            for name in selected if name not in agent_category
+        }
+
+        outcomes = await asyncio.gather(
+            *(run_one(name) for name in runnable),
+            return_exceptions=True
+        )
+
+        results = {}
+        for name, outcome in zip(runnable, outcomes):
+            # A sub-agent cancelled on its own is reported like a failure; other
+            # BaseExceptions such as KeyboardInterrupt are not swallowed
+            if isinstance(outcome, (Exception, asyncio.CancelledError)):
+                errors[name] = f"{type(outcome).__name__}: {outcome}"
+            elif isinstance(outcome, BaseException):
+                raise outcome
+            else:
+                results[name] = outcome
+
+        return {"results": results, "errors": errors}
+
+    run_agents_in_parallel.__doc__ = f"""Runs several independent specialist agents on the same request at the same time.
+
+    Use this instead of calling the agents one by one whenever none of them
+    needs another one's output. Available agents: {', '.join(agent_category)}.
+
+    Args:
+      request: The request sent to every selected agent.
+      agents: Names of the agents to run.
+
+    Returns:
+      A dict with "results" mapping each agent name to its output and
+      "errors" mapping agent names to the reason they did not run.
+    """
+
+    return FunctionTool(run_agents_in_parallel)
@@ -0,0 +1,231 @@
+"""
+Compaction of the orchestrator's conversation history
+Every orchestrator turn re-sends the earlier sub-agent outputs, so long
+sessions such as questionnaire loops get slower and costlier turn after turn.
+HistoryCompactor keeps the sub-agent outputs in each model request within a
+token budget: the oldest ones are replaced by a short excerpt, structured
+results by a summary of their shape and a reference the orchestrator can
+resolve with the recall_tool_output tool. Only the request is rewritten; the
+session keeps every output in full
+"""
+
+import collections
+import hashlib
+import json
+
+from google.adk.tools import FunctionTool
+from google.genai import types
+
+from .callbacks import add_callbacks
+from .tracing import annotate
+
+# Sub-agent output tokens re-sent with each orchestrator model call
+DEFAULT_TOKEN_BUDGET = 6000
+
+# Most recent user turns whose outputs are always sent in full
+DEFAULT_KEEP_RECENT_TURNS = 1
+
+# Characters of a compacted text output kept as an excerpt
+DEFAULT_EXCERPT_CHARS = 400
+
+# Turns kept in HistoryCompactor.reports
+MAX_REPORTS = 200
+
+COMPACTED_KEY = "compacted"
+
+
+def estimate_tokens(value):
+    """
+    Rough token count of a tool output, about four characters per token
+    """
+    text = value if isinstance(value, str) else json.dumps(value, default=str)
+    return (len(text) + 3) // 4
+
+
+def output_reference(name, response):
+    """
+    Stable reference of a tool output, derived from the tool name and the output
+    """
+    digest = hashlib.sha1(json.dumps(response, sort_keys=True, default=str).encode()).hexdigest()
+    return f"{name}:{digest[:12]}"
+
+
+def _shape(value):
+    # One-line description of a structured value, e.g. "12 items" or "3 fields"
+    if isinstance(value, list):
+        return f"{len(value)} items"
+    if isinstance(value, dict):
+        return f"{len(value)} fields"
+    if isinstance(value, str) and len(value) > 80:
+        return value[:77] + "..."
+    return value
+
+
+def compact_response(name, response, excerpt_chars=DEFAULT_EXCERPT_CHARS):
+    """
+    Compact stand-in for a sub-agent's function response
+
+    Plain text results ({"result": text}) keep an excerpt of their start;
+    structured results keep their fields' shapes. Both carry the reference
+    recall_tool_output resolves to the full output.
+    """
+    compacted = {COMPACTED_KEY: True, "reference": output_reference(name, response)}
+    text = response.get("result") if len(response) == 1 else None
+    if isinstance(text, str):
+        compacted["excerpt"] = text[:excerpt_chars] + ("..." if len(text) > excerpt_chars else "")
+    else:
+        compacted["summary"] = {key: _shape(value) for key, value in response.items()}
+    return compacted
+
+
+def recall_tool_output(reference: str, tool_context) -> dict:
+    """
+    Returns the full output of an earlier agent call that was compacted in the history.
+
+    Args:
+        reference: The reference given in the compacted output, e.g. "test_case_generator:3f2a9c1b7d4e"
+
+    Returns:
+        The agent's original output, or an error if no output has that reference
+    """
+    name = reference.split(":", 1)[0]
+    for event in reversed(tool_context.session.events):
+        for function_response in event.get_function_responses():
+            if function_response.name != name or not function_response.response:
+                continue
+            if function_response.response.get(COMPACTED_KEY):
+                continue
+            if output_reference(name, function_response.response) == reference:
+                return function_response.response
+    return {"error": f"No earlier output with reference {reference}"}
+
+
+COMPACTION_INSTRUCTION = """
+
+Older agent outputs in this conversation may be compacted to an excerpt or a summary with a "reference". When you need the full content of a compacted output, call recall_tool_output with its reference instead of calling the agent again."""
+
+
+class HistoryCompactor:
+    """
+    Keeps sub-agent outputs in an agent's model requests within a token budget
+
+    Before each model call the function responses outside the last
+    keep_recent_turns user turns are compacted oldest first until the
+    outputs still sent in full fit in token_budget. Compaction is
+    deterministic, so an output compacted once stays compacted in later
+    turns and the history prefix stays stable between calls.
+
+    Tokens saved are added up per invocation (one user turn): reports holds
+    the most recent turns, stats the totals, and the traced agent span gets
+    the turn's figures when a Tracer is attached.
+    """
+
+    def __init__(self, token_budget=DEFAULT_TOKEN_BUDGET, keep_recent_turns=DEFAULT_KEEP_RECENT_TURNS,
+                 excerpt_chars=DEFAULT_EXCERPT_CHARS, count_tokens=estimate_tokens):
+        self.token_budget = token_budget
+        self.keep_recent_turns = keep_recent_turns
+        self.excerpt_chars = excerpt_chars
+        self.count_tokens = count_tokens
+        self.reports = collections.OrderedDict()
+        self.stats = {"model_calls": 0, "compacted_outputs": 0, "output_tokens": 0, "tokens_saved": 0}
+
+    def attach(self, agent):
+        """
+        Compacts the history of an agent's model calls and gives it recall_tool_output
+
+        Attach it before other model callbacks so that they see the compacted request.
+        """
+        if isinstance(agent.static_instruction, str) and COMPACTION_INSTRUCTION not in agent.static_instruction:
+            agent.static_instruction += COMPACTION_INSTRUCTION
+        agent.tools = [*agent.tools, FunctionTool(recall_tool_output)]
+        add_callbacks(agent, before_model=self.before_model)
+        return agent
+
+    def _protected_from(self, contents):
+        # Index of the first content of the turns that are always sent in full
+        if self.keep_recent_turns <= 0:
+            return len(contents)
+        turn_starts = [
+            index for index, content in enumerate(contents)
+            if content.role == "user" and any(part.text for part in content.parts or [])
+        ]
+        if len(turn_starts) < self.keep_recent_turns:
+            return 0
+        return turn_starts[-self.keep_recent_turns]
+
+    def compact(self, contents):
+        """
+        Returns (compacted contents, report) for the contents of a model request
+
+        Contents and parts that change are replaced, never modified, as the
+        request shares them with the session's events.
+        """
+        outputs = []
+        for index, content in enumerate(contents):
+            for position, part in enumerate(content.parts or []):
+                response = part.function_response
+                if response is not None and response.response and not response.response.get(COMPACTED_KEY):
+                    outputs.append((index, position, self.count_tokens(response.response)))
+
+        total = sum(tokens for _, _, tokens in outputs)
+        report = {"output_tokens": total, "sent_tokens": total, "tokens_saved": 0, "compacted_outputs": 0}
+        if total <= self.token_budget:
+            return contents, report
+
+        protected_from = self._protected_from(contents)
+        replaced = {}
+        for index, position, tokens in outputs:
+            if report["sent_tokens"] <= self.token_budget or index >= protected_from:
+                break
+            original = contents[index].parts[position].function_response
+            compacted = compact_response(original.name, original.response, self.excerpt_chars)
+            saved = tokens - self.count_tokens(compacted)
+            if saved <= 0:
+                continue
+            replaced[(index, position)] = types.Part(function_response=types.FunctionResponse(
+                id=original.id,
+                name=original.name,
+                response=compacted
+            ))
+            report["sent_tokens"] -= saved
+            report["tokens_saved"] += saved
+            report["compacted_outputs"] += 1
+
+        if not replaced:
+            return contents, report
+        compacted_contents = list(contents)
+        for index in {index for index, _ in replaced}:
+            content = contents[index]
+            compacted_contents[index] = types.Content(role=content.role, parts=[
+                replaced.get((index, position), part) for position, part in enumerate(content.parts)
+            ])
+        return compacted_contents, report
+
+    def before_model(self, callback_context, llm_request):
+        llm_request.contents, report = self.compact(llm_request.contents)
+
+        self.stats["model_calls"] += 1
+        for key in ("compacted_outputs", "output_tokens", "tokens_saved"):
+            self.stats[key] += report[key]
+
+        turn = self.reports.get(callback_context.invocation_id)
+        if turn is None:
+            turn = self.reports[callback_context.invocation_id] = {
+                "agent": callback_context.agent_name,
+                "model_calls": 0,
+                "output_tokens": 0,
+                "sent_tokens": 0,
+                "tokens_saved": 0
+            }
+            while len(self.reports) > MAX_REPORTS:
+                self.reports.popitem(last=False)
+        turn["model_calls"] += 1
+        for key in ("output_tokens", "sent_tokens", "tokens_saved"):
+            turn[key] += report[key]
+        annotate(history_tokens_saved=turn["tokens_saved"], history_sent_tokens=turn["sent_tokens"])
+
+    def turn_report(self, invocation_id):
+        """
+        Tokens of sub-agent outputs sent and saved over one invocation, or None
+        """
+        return self.reports.get(invocation_id)
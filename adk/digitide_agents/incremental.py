@@ -0,0 +1,210 @@
+"""
+Incremental re-generation of a project's requirements
+Every stage of the requirement chain records a hash of the inputs it ran on
+and the output it produced. On the next run a stage is only re-invoked when
+its requirement, the shared context, its agent or an upstream output changed,
+so editing one requirement of a large project re-runs that requirement alone
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from .batch import DEFAULT_MAX_CONCURRENCY, BatchRunner, batch_message, render_requirement, requirement_id
+from .cache import instruction_hash, model_name
+
+# Stages in run order and the stages whose output each one reads
+REGENERATION_STAGES = {
+    "requirement_analyzer": [],
+    "test_case_generator": ["requirement_analyzer"],
+    "compliance_validator": ["requirement_analyzer", "test_case_generator"],
+    "audit_trail_generator": ["test_case_generator", "compliance_validator"]
+}
+
+
+def content_hash(value):
+    """
+    Stable hash of a string or JSON-serializable value
+    """
+    if not isinstance(value, str):
+        value = json.dumps(value, sort_keys=True)
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+def check_stages(stages):
+    """
+    Validates that every stage only reads stages that run before it
+    """
+    seen = set()
+    for stage, upstream in stages.items():
+        missing = [name for name in upstream if name not in seen]
+        if missing:
+            raise ValueError(f"Stage {stage} reads stages that do not run before it: {', '.join(missing)}")
+        seen.add(stage)
+
+
+class RegenerationStore:
+    """
+    SQLite record of the last input hash and output of every stage
+
+    Use path=":memory:" for a store that only lives as long as the process.
+    """
+
+    def __init__(self, path="cache/regeneration.sqlite"):
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS stage_outputs ("
+            "project TEXT NOT NULL, requirement TEXT NOT NULL, stage TEXT NOT NULL, "
+            "input_hash TEXT NOT NULL, output TEXT NOT NULL, updated_at REAL NOT NULL, "
+            "PRIMARY KEY (project, requirement, stage))"
+        )
+        self._db.commit()
+
+    def get(self, project, requirement, stage, input_hash):
+        """
+        Returns the stored output if it was produced from the same inputs
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT output FROM stage_outputs "
+                "WHERE project = ? AND requirement = ? AND stage = ? AND input_hash = ?",
+                (project, requirement, stage, input_hash)
+            ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def set(self, project, requirement, stage, input_hash, output):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO stage_outputs VALUES (?, ?, ?, ?, ?, ?)",
+                (project, requirement, stage, input_hash, json.dumps(output), time.time())
+            )
+            self._db.commit()
+
+    def prune(self, project, keep):
+        """
+        Deletes the records of requirements no longer in the project
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT DISTINCT requirement FROM stage_outputs WHERE project = ?", (project,)
+            ).fetchall()
+            removed = [row[0] for row in rows if row[0] not in keep]
+            self._db.executemany(
+                "DELETE FROM stage_outputs WHERE project = ? AND requirement = ?",
+                [(project, requirement) for requirement in removed]
+            )
+            self._db.commit()
+        return len(removed)
+
+
+class IncrementalGenerator:
+    """
+    Runs the requirement chain for a project, reusing unchanged stage outputs
+
+    A stage's input hash covers the requirement, the shared context, the
+    agent's model and instruction, and the outputs of the stages it reads.
+    A stage that re-runs therefore invalidates everything downstream of it,
+    unless it happens to produce the same output again. Calls go through a
+    BatchRunner, so they share its concurrency limit, retries and backoff.
+    """
+
+    def __init__(self, store=None, stages=REGENERATION_STAGES, max_concurrency=DEFAULT_MAX_CONCURRENCY, **options):
+        check_stages(stages)
+        self.store = store or RegenerationStore()
+        self.stages = stages
+        self.runner = BatchRunner(list(stages), max_concurrency=max_concurrency, **options)
+        self.max_concurrency = max_concurrency
+        self._agent_hashes = {
+            name: content_hash([model_name(agent), instruction_hash(agent)])
+            for name, agent in self.runner.agents.items()
+        }
+
+    def stage_message(self, context, item, upstream_outputs):
+        parts = [batch_message(context, item)]
+        for stage, output in upstream_outputs.items():
+            rendered = output if isinstance(output, str) else json.dumps(output)
+            parts.append(f"Output of {stage}:\n{rendered}")
+        return "\n\n".join(parts)
+
+    async def _run_requirement(self, project, id_, text, context_hash, context, semaphore, stats):
+        outputs = {}
+        errors = {}
+        for stage, upstream in self.stages.items():
+            failed = [name for name in upstream if name in errors]
+            if failed:
+                errors[stage] = f"Skipped because {', '.join(failed)} failed"
+                continue
+
+            upstream_outputs = {name: outputs[name] for name in upstream}
+            input_hash = content_hash([
+                stage,
+                self._agent_hashes[stage],
+                context_hash,
+                content_hash(text),
+                {name: content_hash(output) for name, output in upstream_outputs.items()}
+            ])
+
+            stored = self.store.get(project, id_, stage, input_hash)
+            if stored is not None:
+                outputs[stage] = stored
+                stats["reused"] += 1
+                continue
+
+            message = self.stage_message(context, [(id_, text)], upstream_outputs)
+            output, error, _ = await self.runner.call(stage, message, semaphore)
+            if error is not None:
+                errors[stage] = error
+                continue
+            self.store.set(project, id_, stage, input_hash, output)
+            outputs[stage] = output
+            stats["ran"] += 1
+        return outputs, errors
+
+    async def regenerate(self, project, requirements, context=""):
+        """
+        Brings a project's stage outputs up to date with its requirements
+
+        requirements are strings or dicts with the Requirement schema fields.
+        Returns {"outputs": {requirement id: {stage: output}}, "errors":
+        {requirement id: {stage: error}}, "stats": {"ran", "reused", "removed"}}.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        context_hash = content_hash(context)
+        stats = {"ran": 0, "reused": 0, "removed": 0}
+
+        rendered = {}
+        for requirement in requirements:
+            id_ = requirement_id(requirement)
+            rendered[id_] = render_requirement(id_, requirement)
+
+        results = await asyncio.gather(*(
+            self._run_requirement(project, id_, text, context_hash, context, semaphore, stats)
+            for id_, text in rendered.items()
+        ))
+
+        stats["removed"] = self.store.prune(project, set(rendered))
+        outputs = {}
+        errors = {}
+        for id_, (requirement_outputs, requirement_errors) in zip(rendered, results):
+            outputs[id_] = requirement_outputs
+            if requirement_errors:
+                errors[id_] = requirement_errors
+        return {"outputs": outputs, "errors": errors, "stats": stats}
+
+
+async def regenerate_project(project, requirements, context="", store=None, **options):
+    """
+    Re-runs only the stages whose inputs changed since the last run of a project
+    """
+    generator = IncrementalGenerator(store, **options)
+    return await generator.regenerate(project, requirements, context)
@@ -0,0 +1,376 @@
+"""
+Local hybrid retrieval index for the rag_knowledge_engine agent
+Past requirements, test cases and standards excerpts are indexed both as
+BM25 terms and as embedding vectors and searched with a blend of the two.
+The index lives in a directory that is only ever appended to:
+
+    manifest.json     dimensions and embedder of the vectors
+    documents.jsonl   one record per added or deleted document
+    vectors.f32       float32 vectors, one row per added document, memory-mapped
+
+    python -m digitide_agents.knowledge_index add knowledge/index test_cases.jsonl --kind test_case
+    python -m digitide_agents.knowledge_index search knowledge/index "MFA login lockout"
+"""
+
+import argparse
+import array
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import sys
+import threading
+from collections import Counter
+
+from .semantic_cache import HashingEmbedder
+
+FORMAT_VERSION = 1
+
+DEFAULT_INDEX_PATH = "knowledge/index"
+
+# Documents scored by vector similarity when NumPy is not installed,
+# taken from the best BM25 matches
+PURE_PYTHON_CANDIDATES = 200
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or the to with "
+    "this that these those should must can will all any".split()
+)
+
+
+def tokenize(text):
+    """
+    Lower-cased words without stopwords, with a naive plural strip
+    """
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+class KnowledgeIndex:
+    """
+    Incrementally updatable BM25 + vector index stored in a directory
+
+    add() appends a document (replacing any earlier one with the same id),
+    delete() appends a tombstone and compact() rewrites the files without
+    deleted rows. Vectors are memory-mapped, so opening a large index is
+    cheap; with NumPy installed the vector side scores every document in
+    one matrix product, otherwise only the best BM25 candidates.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH, embedder=None, k1=1.2, b=0.75):
+        self.path = path
+        self.embedder = embedder or HashingEmbedder()
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._mmap = None
+        self._vectors = None
+
+        os.makedirs(path, exist_ok=True)
+        manifest_path = os.path.join(path, "manifest.json")
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                self.manifest = json.load(f)
+            if self.manifest["embedder"] != type(self.embedder).__name__:
+                raise ValueError(
+                    f"Index {path} was built with {self.manifest['embedder']}, not {type(self.embedder).__name__}"
+                )
+        else:
+            self.manifest = {
+                "version": FORMAT_VERSION,
+                "dimensions": len(self.embedder("dimensions probe")),
+                "embedder": type(self.embedder).__name__
+            }
+            with open(manifest_path, "w") as f:
+                json.dump(self.manifest, f)
+        self.dimensions = self.manifest["dimensions"]
+        self._load()
+
+    @property
+    def _documents_path(self):
+        return os.path.join(self.path, "documents.jsonl")
+
+    @property
+    def _vectors_path(self):
+        return os.path.join(self.path, "vectors.f32")
+
+    def _load(self):
+        self.documents = []
+        self.rows = {}
+        self.postings = {}
+        self.lengths = []
+        self.total_length = 0
+        open(self._vectors_path, "ab").close()
+        row_bytes = self.dimensions * 4
+        vector_rows = os.path.getsize(self._vectors_path) // row_bytes
+
+        # add_many() writes vectors before documents, so a crash in between
+        # leaves vectors without documents, and a torn write a partial last
+        # line; both are cut off so rows and vectors stay aligned
+        documents_size = 0
+        if os.path.exists(self._documents_path):
+            with open(self._documents_path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    if line.strip():
+                        record = json.loads(line)
+                        if not record.get("deleted") and len(self.documents) == vector_rows:
+                            break
+                        self._apply(record)
+                    documents_size += len(line)
+            if documents_size < os.path.getsize(self._documents_path):
+                os.truncate(self._documents_path, documents_size)
+        if vector_rows * row_bytes != os.path.getsize(self._vectors_path) or vector_rows > len(self.documents):
+            os.truncate(self._vectors_path, len(self.documents) * row_bytes)
+        self._remap()
+
+    def _apply(self, record):
+        # Replays one documents.jsonl record into the in-memory term index
+        previous = self.rows.pop(record["id"], None)
+        if previous is not None:
+            self.documents[previous] = None
+            self.total_length -= self.lengths[previous]
+        if record.get("deleted"):
+            return
+
+        row = len(self.documents)
+        terms = Counter(tokenize(record["text"]))
+        for term, count in terms.items():
+            self.postings.setdefault(term, []).append((row, count))
+        length = sum(terms.values())
+        self.documents.append(record)
+        self.lengths.append(length)
+        self.total_length += length
+        self.rows[record["id"]] = row
+
+    def _remap(self):
+        if self._mmap is not None:
+            self._vectors = None
+            self._mmap.close()
+            self._mmap = None
+        if os.path.getsize(self._vectors_path) == 0:
+            return
+        with open(self._vectors_path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        numpy = _numpy()
+        if numpy is not None:
+            self._vectors = numpy.frombuffer(self._mmap, dtype=numpy.float32).reshape(-1, self.dimensions)
+        else:
+            self._vectors = memoryview(self._mmap).cast("f")
+
+    def _embed(self, text):
+        vector = self.embedder(text)
+        norm = math.sqrt(sum(value * value for value in vector))
+        return [value / norm for value in vector] if norm else list(vector)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add(self, doc_id, text, kind="document", metadata=None):
+        """
+        Adds a document, replacing an earlier one with the same id
+        """
+        self.add_many([{"id": doc_id, "text": text, "kind": kind, "metadata": metadata or {}}])
+
+    def add_many(self, documents):
+        """
+        Adds dicts with "id", "text" and optional "kind" and "metadata" in one write
+        """
+        records = [
+            {
+                "id": str(document["id"]),
+                "kind": document.get("kind", "document"),
+                "text": document["text"],
+                "metadata": document.get("metadata", {})
+            }
+            for document in documents
+        ]
+        vectors = array.array("f")
+        for record in records:
+            vectors.extend(self._embed(record["text"]))
+
+        with self._lock:
+            # Vectors first: documents are what commits the rows, see _load()
+            with open(self._vectors_path, "ab") as f:
+                vectors.tofile(f)
+            with open(self._documents_path, "a") as f:
+                for record in records:
+                    f.write(json.dumps(record) + "\n")
+            for record in records:
+                self._apply(record)
+            self._remap()
+
+    def delete(self, doc_id):
+        """
+        Removes a document; its row stays on disk until compact()
+        """
+        with self._lock:
+            if doc_id not in self.rows:
+                return False
+            record = {"id": doc_id, "deleted": True}
+            with open(self._documents_path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+            self._apply(record)
+            return True
+
+    def compact(self):
+        """
+        Rewrites the index files without deleted or replaced rows
+        """
+        with self._lock:
+            live = sorted(self.rows.values())
+            vectors = array.array("f")
+            for row in live:
+                vectors.extend(self._row_vector(row))
+            for name, write in (
+                ("documents.jsonl", lambda f: f.writelines(json.dumps(self.documents[row]) + "\n" for row in live)),
+                ("vectors.f32", vectors.tofile)
+            ):
+                temporary = os.path.join(self.path, name + ".tmp")
+                with open(temporary, "w" if name.endswith(".jsonl") else "wb") as f:
+                    write(f)
+                os.replace(temporary, os.path.join(self.path, name))
+            self._load()
+
+    def _row_vector(self, row):
+        if _numpy() is not None:
+            return self._vectors[row].tolist()
+        return self._vectors[row * self.dimensions:(row + 1) * self.dimensions].tolist()
+
+    def _bm25(self, query_terms):
+        scores = {}
+        count = len(self.rows)
+        if not count:
+            return scores
+        average_length = self.total_length / count
+        for term in set(query_terms):
+            postings = [(row, tf) for row, tf in self.postings.get(term, ()) if self.documents[row] is not None]
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for row, tf in postings:
+                norm = tf + self.k1 * (1 - self.b + self.b * self.lengths[row] / average_length)
+                scores[row] = scores.get(row, 0.0) + idf * tf * (self.k1 + 1) / norm
+        return scores
+
+    def _vector_scores(self, query_vector, candidates):
+        numpy = _numpy()
+        if numpy is not None and self._vectors is not None:
+            similarities = self._vectors @ numpy.asarray(query_vector, dtype=numpy.float32)
+            return {row: float(similarities[row]) for row in range(len(self.documents)) if self.documents[row] is not None}
+        return {
+            row: sum(x * y for x, y in zip(query_vector, self._row_vector(row)))
+            for row in candidates
+        }
+
+    def search(self, query, top_k=5, kind=None, alpha=0.5):
+        """
+        Returns the top_k documents for a query, best first
+
+        alpha weighs vector similarity against BM25 (each scaled to [0, 1]);
+        kind restricts results to one document kind.
+        """
+        with self._lock:
+            bm25 = self._bm25(tokenize(query))
+            candidates = heapq.nlargest(PURE_PYTHON_CANDIDATES, bm25, key=bm25.get)
+            vector = self._vector_scores(self._embed(query), candidates) if alpha > 0 else {}
+
+            top_bm25 = max(bm25.values(), default=0.0) or 1.0
+            scored = []
+            for row in set(bm25) | set(vector):
+                document = self.documents[row]
+                if document is None or (kind and document["kind"] != kind):
+                    continue
+                score = alpha * max(0.0, vector.get(row, 0.0)) + (1 - alpha) * bm25.get(row, 0.0) / top_bm25
+                scored.append((score, row))
+
+            return [
+                {
+                    "id": self.documents[row]["id"],
+                    "kind": self.documents[row]["kind"],
+                    "score": round(score, 4),
+                    "text": self.documents[row]["text"],
+                    "metadata": self.documents[row]["metadata"]
+                }
+                for score, row in heapq.nlargest(top_k, scored)
+                if score > 0
+            ]
+
+    def close(self):
+        with self._lock:
+            self._vectors = None
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+
+
+def _read_documents(path, kind):
+    with open(path) as f:
+        if path.endswith(".jsonl"):
+            documents = [json.loads(line) for line in f if line.strip()]
+        else:
+            documents = json.load(f)
+    for index, document in enumerate(documents):
+        document.setdefault("id", f"{os.path.basename(path)}:{index}")
+        document.setdefault("kind", kind)
+        if "text" not in document:
+            # Requirement and test case records: index their readable fields
+            document["text"] = "\n".join(
+                str(document[field]) for field in ("title", "description", "expectedResult") if document.get(field)
+            )
+    return documents
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m digitide_agents.knowledge_index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add_parser = commands.add_parser("add", help="Add or replace documents from JSON or JSON lines files")
+    add_parser.add_argument("index", help="Index directory")
+    add_parser.add_argument("files", nargs="+")
+    add_parser.add_argument("--kind", default="document", help="Kind for documents without one")
+    search_parser = commands.add_parser("search", help="Search the index")
+    search_parser.add_argument("index", help="Index directory")
+    search_parser.add_argument("query")
+    search_parser.add_argument("--top-k", type=int, default=5)
+    search_parser.add_argument("--kind")
+    compact_parser = commands.add_parser("compact", help="Drop deleted rows from the index files")
+    compact_parser.add_argument("index", help="Index directory")
+    args = parser.parse_args(argv)
+
+    index = KnowledgeIndex(args.index)
+    if args.command == "add":
+        for path in args.files:
+            documents = _read_documents(path, args.kind)
+            index.add_many(documents)
+            print(f"✅ Added {len(documents)} documents from {path}")
+        print(f"📊 Index holds {len(index)} documents")
+    elif args.command == "search":
+        for result in index.search(args.query, args.top_k, args.kind):
+            print(f"{result['score']:.3f}  [{result['kind']}] {result['id']}: {result['text'][:100]}")
+    else:
+        index.compact()
+        print(f"✅ Compacted, {len(index)} documents")
+    index.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,507 @@
+"""
+Deterministic validators for healthcare data formats
+HL7 v2 messages are parsed segment by segment from a stream, FHIR resources
+are checked structurally (or against the official JSON schema when one is
+configured) and DICOM headers are read from memory-mapped files without
+touching the pixel data. Each check returns a list of issues like
+
+    {"severity": "error", "location": "PID-8", "message": "..."}
+"""
+
+import json
+import mmap
+import os
+import re
+import struct
+from collections import Counter
+
+# Issues returned per validation call; the counts still cover every issue
+MAX_REPORTED_ISSUES = 200
+
+
+def issue(location, message, severity="error"):
+    return {"severity": severity, "location": location, "message": message}
+
+
+# HL7 v2
+
+HL7_SEGMENT_ID = re.compile(r"^[A-Z][A-Z0-9]{2}$")
+
+# TS/DTM: YYYY[MM[DD[HH[MM[SS[.S{1,4}]]]]]][+/-ZZZZ]
+HL7_TIMESTAMP = re.compile(r"^\d{4}(\d{2}(\d{2}(\d{2}(\d{2}(\d{2}(\.\d{1,4})?)?)?)?)?)?([+-]\d{4})?$")
+
+HL7_ADMINISTRATIVE_SEX = {"A", "F", "M", "N", "O", "U"}
+
+# Segments every message of a type must contain, after MSH
+HL7_REQUIRED_SEGMENTS = {
+    "ADT^A01": ["EVN", "PID", "PV1"],
+    "ADT^A03": ["EVN", "PID", "PV1"],
+    "ADT^A04": ["EVN", "PID", "PV1"],
+    "ADT^A08": ["EVN", "PID", "PV1"],
+    "ORM^O01": ["PID", "ORC"],
+    "ORU^R01": ["PID", "OBR", "OBX"],
+    "SIU^S12": ["SCH", "PID"],
+    "MDM^T02": ["EVN", "PID", "PV1", "TXA", "OBX"]
+}
+
+
+def iter_hl7_messages(stream, chunk_size=1 << 16):
+    """
+    Yields each HL7 message of a text stream as a list of segment strings
+
+    Segments may end in \\r, \\n or \\r\\n; every MSH segment starts a new
+    message. Only one chunk and one message are held in memory at a time.
+    """
+    segments = []
+    pending = ""
+    while True:
+        chunk = stream.read(chunk_size)
+        data = pending + (chunk or "")
+        lines = re.split(r"\r\n|\r|\n", data)
+        pending = lines.pop() if chunk else ""
+        for line in lines + ([pending] if not chunk and pending else []):
+            line = line.strip("\x0b\x1c")
+            if not line.strip():
+                continue
+            if line.startswith("MSH") and segments:
+                yield segments
+                segments = []
+            segments.append(line)
+        if not chunk:
+            break
+    if segments:
+        yield segments
+
+
+def hl7_fields(segment, field_separator="|"):
+    """
+    Splits a segment into fields numbered like the HL7 spec
+
+    For MSH, field 1 is the field separator itself, so fields[n] is MSH-n
+    everywhere; for other segments fields[0] is the segment id.
+    """
+    fields = segment.split(field_separator)
+    if fields[0] == "MSH":
+        fields.insert(1, field_separator)
+    return fields
+
+
+def _field(fields, number):
+    return fields[number] if number < len(fields) else ""
+
+
+def validate_hl7_message(segments):
+    """
+    Checks one HL7 v2 message and returns (message type, control id, issues)
+    """
+    issues = []
+    if not segments or not segments[0].startswith("MSH") or len(segments[0]) < 8:
+        return "", "", [issue("MSH", "Message does not start with an MSH segment")]
+
+    field_separator = segments[0][3]
+    msh = hl7_fields(segments[0], field_separator)
+    encoding = _field(msh, 2)
+    component = encoding[0] if encoding else "^"
+    if len(encoding) not in (4, 5):
+        issues.append(issue("MSH-2", f"Encoding characters should be 4 characters, got {encoding!r}"))
+
+    message_type = component.join(_field(msh, 9).split(component)[:2])
+    control_id = _field(msh, 10)
+    for number, name in ((7, "date/time of message"), (9, "message type"), (10, "message control id"),
+                         (11, "processing id"), (12, "version id")):
+        if not _field(msh, number):
+            issues.append(issue(f"MSH-{number}", f"Missing {name}"))
+    if _field(msh, 7) and not HL7_TIMESTAMP.match(_field(msh, 7)):
+        issues.append(issue("MSH-7", f"Invalid timestamp {_field(msh, 7)!r}"))
+
+    present = Counter()
+    for index, segment in enumerate(segments[1:], start=2):
+        fields = hl7_fields(segment, field_separator)
+        segment_id = fields[0]
+        present[segment_id] += 1
+        if not HL7_SEGMENT_ID.match(segment_id):
+            issues.append(issue(f"segment {index}", f"Invalid segment id {segment_id!r}"))
+            continue
+        if segment_id == "PID":
+            if not _field(fields, 3):
+                issues.append(issue("PID-3", "Missing patient identifier list"))
+            if not _field(fields, 5):
+                issues.append(issue("PID-5", "Missing patient name"))
+            birth = _field(fields, 7)
+            if birth and not HL7_TIMESTAMP.match(birth):
+                issues.append(issue("PID-7", f"Invalid date of birth {birth!r}"))
+            sex = _field(fields, 8)
+            if sex and sex not in HL7_ADMINISTRATIVE_SEX:
+                issues.append(issue("PID-8", f"Unknown administrative sex {sex!r}"))
+        elif segment_id == "OBX":
+            if not _field(fields, 3):
+                issues.append(issue(f"OBX-3 (segment {index})", "Missing observation identifier"))
+            if not _field(fields, 11):
+                issues.append(issue(f"OBX-11 (segment {index})", "Missing observation result status"))
+        elif segment_id == "EVN":
+            recorded = _field(fields, 2)
+            if recorded and not HL7_TIMESTAMP.match(recorded):
+                issues.append(issue("EVN-2", f"Invalid timestamp {recorded!r}"))
+
+    for required in HL7_REQUIRED_SEGMENTS.get(message_type, []):
+        if not present[required]:
+            issues.append(issue(required, f"{message_type} requires a {required} segment"))
+
+    return message_type, control_id, issues
+
+
+def validate_hl7_stream(stream):
+    """
+    Validates every message of an HL7 v2 stream
+
+    Returns message counts, issue counts per location and the first
+    MAX_REPORTED_ISSUES issues tagged with their message index and control id.
+    """
+    summary = {"messages": 0, "valid": 0, "invalid": 0, "message_types": Counter(), "issue_counts": Counter()}
+    reported = []
+    for number, segments in enumerate(iter_hl7_messages(stream), start=1):
+        message_type, control_id, issues = validate_hl7_message(segments)
+        summary["messages"] += 1
+        summary["message_types"][message_type or "unknown"] += 1
+        summary["valid" if not issues else "invalid"] += 1
+        for found in issues:
+            summary["issue_counts"][f"{found['location'].split(' ')[0]}: {found['message'].split(' ')[0]}"] += 1
+            if len(reported) < MAX_REPORTED_ISSUES:
+                reported.append({**found, "message_index": number, "control_id": control_id})
+    summary["message_types"] = dict(summary["message_types"])
+    summary["issue_counts"] = dict(summary["issue_counts"].most_common())
+    summary["issues"] = reported
+    return summary
+
+
+# FHIR
+
+FHIR_PATTERNS = {
+    "id": re.compile(r"^[A-Za-z0-9\-.]{1,64}$"),
+    "date": re.compile(r"^\d{4}(-(0[1-9]|1[0-2])(-(0[1-9]|[12]\d|3[01]))?)?$"),
+    "dateTime": re.compile(
+        r"^\d{4}(-(0[1-9]|1[0-2])(-(0[1-9]|[12]\d|3[01])"
+        r"(T([01]\d|2[0-3]):[0-5]\d:([0-5]\d|60)(\.\d{1,9})?(Z|[+-]((0\d|1[0-3]):[0-5]\d|14:00)))?)?)?$"
+    ),
+    "instant": re.compile(
+        r"^\d{4}-(0[1-9]|1[0-2])-(0[1-9]|[12]\d|3[01])T([01]\d|2[0-3]):[0-5]\d:([0-5]\d|60)"
+        r"(\.\d{1,9})?(Z|[+-]((0\d|1[0-3]):[0-5]\d|14:00))$"
+    ),
+    "reference": re.compile(r"^(#.*|urn:(uuid|oid):.+|([a-z]+://.+/)?[A-Z][A-Za-z]+/[A-Za-z0-9\-.]{1,64}(/_history/.+)?)$")
+}
+
+# Required elements, coded values and primitive formats of common resources
+FHIR_RESOURCES = {
+    "Patient": {
+        "codes": {"gender": {"male", "female", "other", "unknown"}},
+        "formats": {"birthDate": "date", "deceasedDateTime": "dateTime"}
+    },
+    "Practitioner": {},
+    "Organization": {},
+    "Encounter": {
+        "required": ["status"],
+        "codes": {"status": {"planned", "arrived", "triaged", "in-progress", "onleave", "finished",
+                             "cancelled", "entered-in-error", "unknown"}},
+        "references": ["subject"]
+    },
+    "Observation": {
+        "required": ["status", "code"],
+        "codes": {"status": {"registered", "preliminary", "final", "amended", "corrected", "cancelled",
+                             "entered-in-error", "unknown"}},
+        "formats": {"effectiveDateTime": "dateTime", "issued": "instant"},
+        "references": ["subject", "encounter"]
+    },
+    "Condition": {
+        "required": ["subject"],
+        "formats": {"onsetDateTime": "dateTime", "recordedDate": "dateTime"},
+        "references": ["subject", "encounter"]
+    },
+    "MedicationRequest": {
+        "required": ["status", "intent", "subject"],
+        "codes": {
+            "status": {"active", "on-hold", "cancelled", "completed", "entered-in-error", "stopped", "draft",
+                       "unknown"},
+            "intent": {"proposal", "plan", "order", "original-order", "reflex-order", "filler-order",
+                       "instance-order", "option"}
+        },
+        "formats": {"authoredOn": "dateTime"},
+        "references": ["subject", "encounter", "requester"]
+    },
+    "DiagnosticReport": {
+        "required": ["status", "code"],
+        "codes": {"status": {"registered", "partial", "preliminary", "final", "amended", "corrected",
+                             "appended", "cancelled", "entered-in-error", "unknown"}},
+        "formats": {"effectiveDateTime": "dateTime", "issued": "instant"},
+        "references": ["subject", "encounter"]
+    },
+    "AllergyIntolerance": {
+        "required": ["patient"],
+        "references": ["patient", "encounter"]
+    },
+    "Immunization": {
+        "required": ["status", "vaccineCode", "patient"],
+        "codes": {"status": {"completed", "entered-in-error", "not-done"}},
+        "formats": {"occurrenceDateTime": "dateTime"},
+        "references": ["patient", "encounter"]
+    },
+    "Bundle": {
+        "required": ["type"],
+        "codes": {"type": {"document", "message", "transaction", "transaction-response", "batch",
+                           "batch-response", "history", "searchset", "collection"}},
+        "formats": {"timestamp": "instant"}
+    }
+}
+
+
+def _check_fhir(resource, location, issues):
+    if not isinstance(resource, dict):
+        issues.append(issue(location, "Resource is not a JSON object"))
+        return
+    resource_type = resource.get("resourceType")
+    if not resource_type:
+        issues.append(issue(location, "Missing resourceType"))
+        return
+    if not isinstance(resource_type, str):
+        issues.append(issue(location, f"Invalid resourceType {resource_type!r}"))
+        return
+    location = f"{location}{resource_type}" if location.endswith(".") or not location else location
+    rules = FHIR_RESOURCES.get(resource_type)
+    if rules is None:
+        issues.append(issue(location, f"No local rules for {resource_type}; only generic checks applied", "warning"))
+        rules = {}
+
+    if "id" in resource and not FHIR_PATTERNS["id"].match(str(resource["id"])):
+        issues.append(issue(f"{location}.id", f"Invalid id {resource['id']!r}"))
+    for element in rules.get("required", []):
+        if resource.get(element) in (None, "", [], {}):
+            issues.append(issue(f"{location}.{element}", "Required element is missing"))
+    for element, allowed in rules.get("codes", {}).items():
+        if element in resource and not (isinstance(resource[element], str) and resource[element] in allowed):
+            issues.append(issue(f"{location}.{element}", f"{resource[element]!r} is not one of {sorted(allowed)}"))
+    for element, kind in rules.get("formats", {}).items():
+        value = resource.get(element)
+        if value is not None and not (isinstance(value, str) and FHIR_PATTERNS[kind].match(value)):
+            issues.append(issue(f"{location}.{element}", f"Invalid {kind} {value!r}"))
+    for element in rules.get("references", []):
+        value = resource.get(element)
+        if isinstance(value, dict) and "reference" in value and not FHIR_PATTERNS["reference"].match(str(value["reference"])):
+            issues.append(issue(f"{location}.{element}.reference", f"Invalid reference {value['reference']!r}"))
+
+    if resource_type == "Bundle":
+        entries = resource.get("entry", [])
+        if not isinstance(entries, list):
+            issues.append(issue(f"{location}.entry", "Bundle entry is not a list"))
+            entries = []
+        full_urls = set()
+        for index, entry in enumerate(entries):
+            entry_location = f"{location}.entry[{index}]"
+            if not isinstance(entry, dict):
+                issues.append(issue(entry_location, "Entry is not a JSON object"))
+                continue
+            if "fullUrl" in entry:
+                full_url = entry["fullUrl"]
+                if not isinstance(full_url, str):
+                    issues.append(issue(f"{entry_location}.fullUrl", f"Invalid fullUrl {full_url!r}"))
+                elif full_url in full_urls:
+                    issues.append(issue(f"{entry_location}.fullUrl", f"Duplicate fullUrl {full_url!r}"))
+                else:
+                    full_urls.add(full_url)
+            if "resource" in entry:
+                _check_fhir(entry["resource"], f"{entry_location}.resource.", issues)
+            elif resource.get("type") not in ("transaction-response", "batch-response", "history"):
+                issues.append(issue(entry_location, "Entry has no resource"))
+
+
+def fhir_schema_validator(schema_path=None):
+    """
+    Loads the official fhir.schema.json from schema_path or DIGITIDE_FHIR_SCHEMA
+
+    Returns None when neither is set. Needs jsonschema; raises ImportError
+    without it, and OSError or ValueError when the schema cannot be read.
+    """
+    schema_path = schema_path or os.environ.get("DIGITIDE_FHIR_SCHEMA")
+    if not schema_path:
+        return None
+    import jsonschema
+
+    with open(schema_path) as f:
+        return jsonschema.Draft6Validator(json.load(f))
+
+
+def validate_fhir(resource, schema_path=None, validator=None):
+    """
+    Validates a FHIR resource (dict) and returns its issues
+
+    Without a schema, required elements, coded values, primitive formats and
+    references of the resources in FHIR_RESOURCES are checked, recursing
+    into Bundle entries. For full validation against the official schema
+    pass a validator from fhir_schema_validator(), loaded once for many
+    resources, or schema_path; DIGITIDE_FHIR_SCHEMA is the default path.
+    """
+    issues = []
+    _check_fhir(resource, "", issues)
+
+    if validator is None:
+        validator = fhir_schema_validator(schema_path)
+    if validator is not None:
+        for error in validator.iter_errors(resource):
+            path = ".".join(str(part) for part in error.absolute_path)
+            issues.append(issue(path or "$", error.message))
+    return issues
+
+
+# DICOM
+
+# Tags read from headers, by keyword
+DICOM_TAGS = {
+    (0x0002, 0x0002): "MediaStorageSOPClassUID",
+    (0x0002, 0x0003): "MediaStorageSOPInstanceUID",
+    (0x0002, 0x0010): "TransferSyntaxUID",
+    (0x0008, 0x0016): "SOPClassUID",
+    (0x0008, 0x0018): "SOPInstanceUID",
+    (0x0008, 0x0020): "StudyDate",
+    (0x0008, 0x0030): "StudyTime",
+    (0x0008, 0x0060): "Modality",
+    (0x0008, 0x0070): "Manufacturer",
+    (0x0010, 0x0010): "PatientName",
+    (0x0010, 0x0020): "PatientID",
+    (0x0010, 0x0030): "PatientBirthDate",
+    (0x0010, 0x0040): "PatientSex",
+    (0x0020, 0x000D): "StudyInstanceUID",
+    (0x0020, 0x000E): "SeriesInstanceUID",
+    (0x0020, 0x0013): "InstanceNumber",
+    (0x0028, 0x0010): "Rows",
+    (0x0028, 0x0011): "Columns",
+    (0x0028, 0x0100): "BitsAllocated"
+}
+
+# Value representations of the tags above, for implicit VR files
+_IMPLICIT_VRS = {
+    (0x0008, 0x0020): "DA", (0x0010, 0x0030): "DA", (0x0008, 0x0030): "TM",
+    (0x0020, 0x0013): "IS", (0x0028, 0x0010): "US", (0x0028, 0x0011): "US", (0x0028, 0x0100): "US",
+    (0x0010, 0x0010): "PN", (0x0010, 0x0040): "CS", (0x0008, 0x0060): "CS"
+}
+
+_LONG_VRS = {b"OB", b"OD", b"OF", b"OL", b"OV", b"OW", b"SQ", b"SV", b"UC", b"UN", b"UR", b"UT", b"UV"}
+
+_PIXEL_DATA = (0x7FE0, 0x0010)
+_ITEM = (0xFFFE, 0xE000)
+_SEQUENCE_DELIMITER = (0xFFFE, 0xE0DD)
+_UNDEFINED_LENGTH = 0xFFFFFFFF
+
+IMPLICIT_VR_LITTLE_ENDIAN = "1.2.840.10008.1.2"
+EXPLICIT_VR_BIG_ENDIAN = "1.2.840.10008.1.2.2"
+DEFLATED_EXPLICIT_VR_LITTLE_ENDIAN = "1.2.840.10008.1.2.1.99"
+
+# Type 1 attributes every composite instance must carry
+DICOM_REQUIRED = ["SOPClassUID", "SOPInstanceUID", "StudyInstanceUID", "SeriesInstanceUID", "Modality"]
+
+DICOM_UID = re.compile(r"^(0|[1-9]\d*)(\.(0|[1-9]\d*))*$")
+DICOM_DATE = re.compile(r"^\d{4}(0[1-9]|1[0-2])(0[1-9]|[12]\d|3[01])$")
+
+
+def _decode(vr, raw, endian):
+    if vr == "US" and len(raw) >= 2:
+        return struct.unpack(f"{endian}H", raw[:2])[0]
+    if vr == "UL" and len(raw) >= 4:
+        return struct.unpack(f"{endian}I", raw[:4])[0]
+    return raw.decode("latin-1").rstrip("\x00 ")
+
+
+def _skip_sequence(data, offset, explicit, endian):
+    # Skips the items of an undefined-length sequence, through its delimiter
+    while offset + 8 <= len(data):
+        group, element, length = struct.unpack_from(f"{endian}HHI", data, offset)
+        offset += 8
+        if (group, element) == _SEQUENCE_DELIMITER:
+            return offset
+        if (group, element) == _ITEM:
+            if length == _UNDEFINED_LENGTH:
+                # Nested elements go to a throwaway dict so they cannot shadow top-level ones
+                offset = _read_elements(data, offset, explicit, endian, {})
+            else:
+                offset += length
+    return len(data)
+
+
+def _read_elements(data, offset, explicit, endian, header, stop_group=None):
+    while offset + 8 <= len(data):
+        group, element = struct.unpack_from(f"{endian}HH", data, offset)
+        if group == 0xFFFE:
+            # Item delimiter closing an undefined-length item
+            return offset + 8
+        if stop_group is not None and group != stop_group:
+            return offset
+        if (group, element) == _PIXEL_DATA:
+            return offset
+        if explicit:
+            vr_bytes = bytes(data[offset + 4:offset + 6])
+            if vr_bytes in _LONG_VRS:
+                length = struct.unpack_from(f"{endian}I", data, offset + 8)[0]
+                offset += 12
+            else:
+                length = struct.unpack_from(f"{endian}H", data, offset + 6)[0]
+                offset += 8
+            vr = vr_bytes.decode("latin-1")
+        else:
+            length = struct.unpack_from(f"{endian}I", data, offset + 4)[0]
+            offset += 8
+            vr = _IMPLICIT_VRS.get((group, element), "UI" if group in (0x0002, 0x0008, 0x0020) else "UN")
+
+        if length == _UNDEFINED_LENGTH:
+            offset = _skip_sequence(data, offset, explicit, endian)
+            continue
+        keyword = DICOM_TAGS.get((group, element))
+        if keyword:
+            header[keyword] = _decode(vr, bytes(data[offset:offset + length]), endian)
+        offset += length
+    return offset
+
+
+def read_dicom_header(path):
+    """
+    Reads the DICOM header of a Part 10 file through a memory map
+
+    Parsing stops at the pixel data, so only the header pages are touched
+    even for large images. Returns (header dict by keyword, issues).
+    """
+    issues = []
+    header = {}
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < 132:
+            return header, [issue("preamble", "File is too short to be DICOM Part 10")]
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if data[128:132] != b"DICM":
+                return header, [issue("preamble", "Missing DICM prefix at offset 128")]
+
+            # File meta information is always explicit VR little endian
+            try:
+                offset = _read_elements(data, 132, True, "<", header, stop_group=0x0002)
+            except struct.error:
+                return header, [issue("file_meta", "File meta information is truncated")]
+            syntax = header.get("TransferSyntaxUID", "")
+            if syntax == DEFLATED_EXPLICIT_VR_LITTLE_ENDIAN:
+                issues.append(issue("TransferSyntaxUID", "Deflated datasets are not read; header only covers file meta", "warning"))
+            else:
+                explicit = syntax != IMPLICIT_VR_LITTLE_ENDIAN
+                endian = ">" if syntax == EXPLICIT_VR_BIG_ENDIAN else "<"
+                try:
+                    _read_elements(data, offset, explicit, endian, header)
+                except struct.error:
+                    issues.append(issue("dataset", "Dataset is truncated"))
+
+    if not header.get("TransferSyntaxUID"):
+        issues.append(issue("TransferSyntaxUID", "Missing transfer syntax in file meta"))
+    if "SOPClassUID" in header or "SOPInstanceUID" in header:
+        for element in DICOM_REQUIRED:
+            if not header.get(element):
+                issues.append(issue(element, "Required type 1 attribute is missing"))
+    for keyword, value in header.items():
+        if keyword.endswith("UID") and value and (len(value) > 64 or not DICOM_UID.match(value)):
+            issues.append(issue(keyword, f"Invalid UID {value!r}"))
+        if keyword.endswith("Date") and value and not DICOM_DATE.match(value):
+            issues.append(issue(keyword, f"Invalid date {value!r}"))
+    if header.get("MediaStorageSOPInstanceUID") and header.get("SOPInstanceUID") \
+            and header["MediaStorageSOPInstanceUID"] != header["SOPInstanceUID"]:
+        issues.append(issue("SOPInstanceUID", "Does not match MediaStorageSOPInstanceUID in file meta"))
+    return header, issues
@@ -0,0 +1,261 @@
+"""
+Model tiers for the Digitide agents
+Every agent is assigned a tier (router, heavy or light) and each tier maps to a
+model. Tiers and per-agent choices can be overridden at deploy time through
+environment variables or a JSON config file, e.g.
+
+    DIGITIDE_MODEL_LIGHT=gemini-2.5-flash
+    DIGITIDE_TIER_SCHEMA_GENERATOR=heavy
+    DIGITIDE_MODEL_TEST_CASE_GENERATOR=gemini-2.5-flash
+    DIGITIDE_MODEL_CONFIG=models.json   # {"tiers": {...}, "agent_tiers": {...}, "agents": {...}}
+"""
+
+import json
+import os
+import time
+
+from .callbacks import add_callbacks
+
+ROUTER = "router"
+HEAVY = "heavy"
+LIGHT = "light"
+
+DEFAULT_TIER_MODELS = {
+    ROUTER: "gemini-2.5-pro",
+    HEAVY: "gemini-2.5-pro",
+    LIGHT: "gemini-2.5-flash-lite"
+}
+
+# Tier of every agent; agents not listed here use DEFAULT_TIER
+AGENT_TIERS = {
+    "digitide_orchestrator": ROUTER,
+
+    # Category routers used by hierarchical routing
+    "test_router": ROUTER,
+    "compliance_router": ROUTER,
+    "data_router": ROUTER,
+    "requirement_router": ROUTER,
+    "code_api_router": ROUTER,
+    "risk_quality_router": ROUTER,
+    "documentation_router": ROUTER,
+    "integration_router": ROUTER,
+    "monitoring_router": ROUTER,
+    "healthcare_router": ROUTER,
+    "system_router": ROUTER,
+
+    # Test Case Generation
+    "test_case_generator": HEAVY,
+    "negative_test_generator": HEAVY,
+    "test_optimizer": HEAVY,
+    "test_update_validator": HEAVY,
+    "test_improvement_suggester": LIGHT,
+
+    # Compliance & Validation
+    "compliance_validator": HEAVY,
+    "compliance_gap_analyzer": HEAVY,
+    "audit_trail_generator": LIGHT,
+
+    # Data & Content
+    "synthetic_data_generator": LIGHT,
+    "privacy_validator": HEAVY,
+    "schema_generator": LIGHT,
+
+    # Requirement Analysis
+    "requirement_extractor": HEAVY,
+    "requirement_analyzer": HEAVY,
+    "user_story_generator": LIGHT,
+    "document_gap_analyst": HEAVY,
+    "adaptive_questionnaire": LIGHT,
+    "requirement_synthesis": HEAVY,
+
+    # Code & API Testing
+    "api_test_generator": HEAVY,
+    "code_analyzer": HEAVY,
+    "security_test_agent": HEAVY,
+
+    # Risk & Quality
+    "risk_assessment": HEAVY,
+    "quality_predictor": LIGHT,
+    "test_effectiveness": LIGHT,
+
+    # Documentation & Reporting
+    "documentation_generator": LIGHT,
+    "report_analyzer": LIGHT,
+    "knowledge_extractor": LIGHT,
+
+    # Integration & Orchestration
+    "integration_coordinator": LIGHT,
+    "workflow_orchestrator": LIGHT,
+    "devops_integration": LIGHT,
+
+    # Monitoring & Analytics
+    "performance_monitor": LIGHT,
+    "predictive_analytics": LIGHT,
+    "anomaly_detection": LIGHT,
+
+    # Specialized Healthcare
+    "medical_standards_interpreter": HEAVY,
+    "clinical_validation": HEAVY,
+    "dicom_hl7_validator": LIGHT,
+
+    # System-Level
+    "master_coordinator": LIGHT,
+    "rag_knowledge_engine": LIGHT,
+    "pipeline_integration": LIGHT
+}
+
+DEFAULT_TIER = HEAVY
+
+# Next lighter model to use when an agent runs over its latency budget
+MODEL_FALLBACKS = {
+    "gemini-2.5-pro": "gemini-2.5-flash",
+    "gemini-2.5-flash": "gemini-2.5-flash-lite"
+}
+
+# Overrides set in code through configure_models()
+_overrides = {"tiers": {}, "agent_tiers": {}, "agents": {}}
+
+# Parsed DIGITIDE_MODEL_CONFIG files by path; a file is read once per process
+_config_files = {}
+
+
+def _env_key(name):
+    return name.upper().replace("-", "_")
+
+
+def _config_file():
+    path = os.environ.get("DIGITIDE_MODEL_CONFIG")
+    if not path:
+        return {}
+    if path not in _config_files:
+        with open(path) as f:
+            _config_files[path] = json.load(f)
+    return _config_files[path]
+
+
+def configure_models(tiers=None, agent_tiers=None, agents=None):
+    """
+    Overrides tier models, agent tiers or agent models from code
+
+    Code overrides win over environment variables and the config file.
+    Agents pick up their model when they are built.
+    """
+    _overrides["tiers"].update(tiers or {})
+    _overrides["agent_tiers"].update(agent_tiers or {})
+    _overrides["agents"].update(agents or {})
+
+
+def tier_for(agent_name):
+    """
+    Returns the tier an agent runs on
+    """
+    config = _config_file()
+    return (
+        _overrides["agent_tiers"].get(agent_name)
+        or os.environ.get(f"DIGITIDE_TIER_{_env_key(agent_name)}")
+        or config.get("agent_tiers", {}).get(agent_name)
+        or AGENT_TIERS.get(agent_name, DEFAULT_TIER)
+    )
+
+
+def model_for(agent_name):
+    """
+    Returns the model for an agent
+
+    A model set for the agent itself wins, then the model of its tier.
+    """
+    config = _config_file()
+    model = (
+        _overrides["agents"].get(agent_name)
+        or os.environ.get(f"DIGITIDE_MODEL_{_env_key(agent_name)}")
+        or config.get("agents", {}).get(agent_name)
+    )
+    if model:
+        return model
+
+    tier = tier_for(agent_name)
+    return (
+        _overrides["tiers"].get(tier)
+        or os.environ.get(f"DIGITIDE_MODEL_{_env_key(tier)}")
+        or config.get("tiers", {}).get(tier)
+        or DEFAULT_TIER_MODELS[tier]
+    )
+
+
+class LatencyFallback:
+    """
+    Moves an agent to a lighter model while it runs over its latency budget
+
+    Model call latency is tracked per agent as an exponential moving average.
+    When the average goes over the budget, the agent's calls are sent to the
+    next model in MODEL_FALLBACKS for cooldown_seconds, then the primary
+    model is tried again. Calls that fail or time out count with the time
+    they took before failing, so a model that keeps timing out also
+    triggers the fallback.
+    """
+
+    def __init__(self, budgets, default_budget=None, cooldown_seconds=300, smoothing=0.3):
+        # budgets maps agent names or tiers to a latency budget in seconds
+        self.budgets = budgets
+        self.default_budget = default_budget
+        self.cooldown_seconds = cooldown_seconds
+        self.smoothing = smoothing
+        self.latency = {}
+        self.fallback_until = {}
+        self._started = {}
+
+    def budget_for(self, agent_name):
+        return self.budgets.get(agent_name, self.budgets.get(tier_for(agent_name), self.default_budget))
+
+    def model_for_call(self, agent_name, model):
+        """
+        Returns the model to use for the next call of an agent
+        """
+        if time.monotonic() < self.fallback_until.get(agent_name, 0):
+            return MODEL_FALLBACKS.get(model, model)
+        return model
+
+    def record(self, agent_name, seconds):
+        """
+        Records the latency of one model call
+        """
+        previous = self.latency.get(agent_name, seconds)
+        average = previous + self.smoothing * (seconds - previous)
+        self.latency[agent_name] = average
+
+        budget = self.budget_for(agent_name)
+        if budget is not None and average > budget:
+            self.fallback_until[agent_name] = time.monotonic() + self.cooldown_seconds
+            # Start the primary model from a clean slate after the cooldown
+            self.latency.pop(agent_name)
+
+    def before_model(self, callback_context, llm_request):
+        agent_name = callback_context.agent_name
+        if isinstance(llm_request.model, str):
+            llm_request.model = self.model_for_call(agent_name, llm_request.model)
+        self._started[(callback_context.invocation_id, agent_name)] = time.monotonic()
+
+    def after_model(self, callback_context, llm_response):
+        if llm_response.partial:
+            return
+        started = self._started.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        if started is not None:
+            self.record(callback_context.agent_name, time.monotonic() - started)
+
+    def on_model_error(self, callback_context, llm_request, error):
+        started = self._started.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        if started is not None:
+            self.record(callback_context.agent_name, time.monotonic() - started)
+        # Let the error propagate to the caller's retry logic
+
+    def attach(self, agent):
+        """
+        Adds the fallback callbacks to an agent
+        """
+        add_callbacks(
+            agent,
+            before_model=self.before_model,
+            after_model=self.after_model,
+            on_model_error=self.on_model_error
+        )
+        return agent
@@ -2,214 +2,358 @@
 Main Orchestrator that coordinates all 38 agents using AgentTools
 """
 
+import json
+
 from google import adk
-from google.adk.tools.agent_tool import AgentTool
-
-# Import all agents
-from .test_agents import (
-    test_case_generator,
-    negative_test_generator,
-    test_optimizer,
-    test_update_validator,
-    test_improvement_suggester
-)
-
-from .compliance_agents import (
-    compliance_validator,
-    compliance_gap_analyzer,
-    audit_trail_generator
-)
-
-from .data_agents import (
-    synthetic_data_generator,
-    privacy_validator,
-    schema_generator
-)
-
-from .requirement_agents import (
-    requirement_extractor,
-    requirement_analyzer,
-    user_story_generator,
-    document_gap_analyst,
-    adaptive_questionnaire,
-    requirement_synthesis
-)
-
-from .all_other_agents import (
-    api_test_generator,
-    code_analyzer,
-    security_test_agent,
-    risk_assessment,
-    quality_predictor,
-    test_effectiveness,
-    documentation_generator,
-    report_analyzer,
-    knowledge_extractor,
-    integration_coordinator,
-    workflow_orchestrator,
-    devops_integration,
-    performance_monitor,
-    predictive_analytics,
-    anomaly_detection,
-    medical_standards_interpreter,
-    clinical_validation,
-    dicom_hl7_validator,
-    master_coordinator,
-    rag_knowledge_engine,
-    pipeline_integration
-)
-
-
-def create_digitide_system():
+from google.adk.agents.context_cache_config import ContextCacheConfig
+from google.adk.apps import App
+from google.adk.apps.app import EventsCompactionConfig
+
+from .fanout import create_fan_out_tool
+from .models import LatencyFallback, model_for
+from .registry import CATEGORY_TITLES, agent_names, agent_specs, build_agent
+from .streaming import CachedStreamingAgentTool, StreamingAgentTool
+
+ORCHESTRATOR_INSTRUCTION = """You are the master orchestrator for the Digitide Healthcare Test Automation Platform.
+
+    You coordinate {agent_count} specialized agents to provide comprehensive test automation for healthcare applications.
+
+    Available Agent Categories:
+
+{agent_catalog}
+    Your role:
+    - Understand user requests
+    - Determine which agents are needed
+    - Coordinate agent execution
+    - Aggregate and present results
+    - Handle complex workflows requiring multiple agents
+
+    For each request:
+    1. Analyze what needs to be done
+    2. Select appropriate agents
+    3. Coordinate their execution
+    4. Combine results into a comprehensive response
+    5. Ensure all compliance and quality standards are met
+    """
+
+STRUCTURED_OUTPUT_INSTRUCTION = """
+    Structured results:
+    - {structured_agents} return structured JSON
+    - Pass their JSON through unchanged in a ```json block; do not rewrite,
+      summarize or re-format it, only add a short note around it if needed
+    """
+
+FAN_OUT_INSTRUCTION = """
+    Parallel execution:
+    - When a request needs several specialists that do not depend on each
+      other's output (for example a full review of one requirement with
+      test_case_generator, negative_test_generator, compliance_validator and
+      security_test_agent), call run_agents_in_parallel once with all of them
+      instead of calling them one after another
+    - Combine the returned results in a single response
+    """
+
+# Compact routing prompt: the same catalog and rules in a fraction of the tokens
+COMPACT_ORCHESTRATOR_INSTRUCTION = """You orchestrate {agent_count} Digitide healthcare test automation specialists, available as tools.
+Call only the specialists a request needs, give each the full relevant context, and combine their results into one answer that meets healthcare compliance and quality standards.
+
+Specialists by category:
+{agent_catalog}
+"""
+
+COMPACT_STRUCTURED_OUTPUT_INSTRUCTION = """{structured_agents} return JSON: pass it through unchanged in a ```json block.
+"""
+
+COMPACT_FAN_OUT_INSTRUCTION = """Call run_agents_in_parallel once for specialists that do not need each other's output, then combine the results.
+"""
+
+# Hierarchical routing: the top router picks categories, category routers pick specialists
+HIERARCHICAL_ORCHESTRATOR_INSTRUCTION = """You orchestrate Digitide healthcare test automation specialists through {category_count} category routers, available as tools.
+Call only the category routers a request needs, give each the full relevant context, and combine their results into one answer that meets healthcare compliance and quality standards.
+
+Category routers:
+{category_catalog}
+"""
+
+CATEGORY_ROUTER_INSTRUCTION = """You route {category_title} requests for the Digitide healthcare test automation platform.
+Call the specialists below that the request needs, give each the full relevant context, and return their results without dropping details.
+
+{agent_catalog}
+"""
+
+# Coordinator agents have no tools of their own, so routing to them only adds a hop
+COORDINATOR_AGENTS = ("master_coordinator", "workflow_orchestrator")
+
+ROUTING_MODES = ("flat", "hierarchical")
+
+
+def render_agent_catalog(specs):
+    """
+    Renders the numbered category listing of the orchestrator instruction
+    """
+    lines = []
+    for number, (category, category_specs) in enumerate(specs.items(), start=1):
+        lines.append(f"    {number}. {CATEGORY_TITLES[category]} ({len(category_specs)} agents):")
+        for spec in category_specs:
+            lines.append(f"       - {spec.name}: {spec.summary}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def render_compact_catalog(specs):
+    """
+    Renders the catalog as one line per category
+    """
+    return "\n".join(
+        f"{CATEGORY_TITLES[category]}: " + "; ".join(f"{spec.name} - {spec.summary}" for spec in category_specs)
+        for category, category_specs in specs.items()
+    )
+
+
+def render_category_catalog(specs):
+    """
+    Renders one line per category router with the specialists behind it
+    """
+    return "\n".join(
+        f"- {category_router_name(category)}: {CATEGORY_TITLES[category]} "
+        f"({', '.join(spec.name for spec in category_specs)})"
+        for category, category_specs in specs.items()
+    )
+
+
+def category_router_name(category):
+    return f"{category}_router"
+
+
+PROMPT_STYLES = {
+    "full": (ORCHESTRATOR_INSTRUCTION, render_agent_catalog, STRUCTURED_OUTPUT_INSTRUCTION, FAN_OUT_INSTRUCTION),
+    "compact": (
+        COMPACT_ORCHESTRATOR_INSTRUCTION,
+        render_compact_catalog,
+        COMPACT_STRUCTURED_OUTPUT_INSTRUCTION,
+        COMPACT_FAN_OUT_INSTRUCTION
+    )
+}
+
+
+def estimate_tokens(text):
+    """
+    Rough token count for Gemini models, about four characters per token
+    """
+    return (len(text) + 3) // 4
+
+
+def static_prefix_report(orchestrator, count_tokens=estimate_tokens):
+    """
+    Reports the token cost of the orchestrator's static prefix
+
+    The prefix is the static instruction plus the tool declarations that are
+    re-sent on every turn. count_tokens can be swapped for an exact counter,
+    e.g. one calling the Gemini count_tokens API.
+    """
+    declarations = [
+        tool._get_declaration().model_dump(exclude_none=True, mode="json")
+        for tool in orchestrator.tools
+    ]
+    instruction_tokens = count_tokens(str(orchestrator.static_instruction or orchestrator.instruction))
+    tool_tokens = count_tokens(json.dumps(declarations))
+    return {
+        "instruction_tokens": instruction_tokens,
+        "tool_count": len(declarations),
+        "tool_tokens": tool_tokens,
+        "total_tokens": instruction_tokens + tool_tokens
+    }
+
+
+def create_category_router(category, category_specs, category_tools):
+    """
+    Builds the router agent of one category around its specialists' tools
+    """
+    catalog = "\n".join(f"- {spec.name}: {spec.summary}" for spec in category_specs)
+    instruction = CATEGORY_ROUTER_INSTRUCTION.format(
+        category_title=CATEGORY_TITLES[category],
+        agent_catalog=catalog
+    )
+    structured_agents = [tool.name for tool in category_tools if tool.agent.output_schema is not None]
+    if structured_agents:
+        instruction += COMPACT_STRUCTURED_OUTPUT_INSTRUCTION.format(structured_agents=", ".join(structured_agents))
+
+    name = category_router_name(category)
+    return adk.Agent(
+        name=name,
+        model=model_for(name),
+        description=f"{CATEGORY_TITLES[category]}: " + ", ".join(tool.name for tool in category_tools),
+        static_instruction=instruction,
+        tools=list(category_tools)
+    )
+
+
+def create_digitide_system(categories=None, fan_out=None, latency_budgets=None, cache=None,
+                           structured_passthrough=False, tracer=None, prompt_style="compact",
+                           routing="flat", scheduler=None, history=None):
     """
     Creates the complete Digitide multi-agent system with orchestrator
+
+    categories limits the system to some agent categories, e.g.
+    ["test", "compliance"]; only those agents are built. All categories in
+    registry.CATEGORY_TITLES are used by default.
+
+    fan_out enables parallel execution of independent specialists. It takes a
+    list of category names or a dict mapping category names to how many of
+    that category's agents may run at the same time,
+    e.g. {"test": 2, "compliance": 1, "code_api": 1}.
+
+    latency_budgets maps agent names or model tiers to a latency budget in
+    seconds, e.g. {"heavy": 20, "light": 5}. Agents that run over their
+    budget are moved to a lighter model for a while (see LatencyFallback).
+
+    cache is a ResponseCache; when given, repeated specialist calls with the
+    same normalized request are answered from it instead of the model.
+
+    Agents with an output schema return structured JSON that the orchestrator
+    is told to pass through unchanged. With structured_passthrough=True their
+    tool results also skip the orchestrator's summarization turn and end the
+    turn directly; use it when callers only store the structured data.
+
+    tracer is a tracing.Tracer attached to the orchestrator and every agent
+    it builds, recording spans for orchestrator turns, sub-agent calls and
+    model calls with tokens, latency and cache hits.
+
+    prompt_style is "compact" (default) for a one-line-per-category routing
+    prompt built from the registry, or "full" for the original verbose one.
+    The prompt is set as the orchestrator's static instruction, so it forms
+    a stable prefix that create_digitide_app() can put in a context cache;
+    static_prefix_report() gives its token cost.
+
+    routing="hierarchical" gives the orchestrator one tool per category
+    instead of one per specialist. Each category tool is a small router
+    agent holding only that category's specialists, so every routing turn
+    sees 3-6 tools. master_coordinator and workflow_orchestrator are left
+    out in this mode since they have no tools and only add a hop. fan_out
+    and prompt_style apply to flat routing only.
+
+    scheduler is a scheduler.ModelScheduler that every model call of the
+    system waits on at interactive priority, sharing per-model quota lanes
+    with anything else attached to the same scheduler.
+
+    history is a history.HistoryCompactor that keeps the earlier sub-agent
+    outputs the orchestrator re-sends every turn within a token budget, so
+    long sessions do not get slower and costlier with each turn.
+
+    Specialists are wrapped in StreamingAgentTools, so running the system
+    through streaming.stream_query() also streams their partial output.
     """
 
-    # Create the main orchestrator agent
+    if routing not in ROUTING_MODES:
+        raise ValueError(f"Unknown routing mode: {routing}")
+    if routing == "hierarchical" and fan_out:
+        raise ValueError("fan_out is only supported with flat routing")
+
+    specs = agent_specs(categories)
+    if routing == "hierarchical":
+        specs = {
+            category: [spec for spec in category_specs if spec.name not in COORDINATOR_AGENTS]
+            for category, category_specs in specs.items()
+        }
+    fallback = LatencyFallback(latency_budgets) if latency_budgets else None
+
+    def instrument(agent):
+        # The scheduler goes after the fallback so it queues on the model actually called
+        if fallback:
+            fallback.attach(agent)
+        if scheduler:
+            scheduler.attach(agent)
+        if tracer:
+            tracer.attach(agent, tools=True)
+        return agent
+
+    def prepare(name):
+        return instrument(build_agent(name))
+
+    def agent_tool(agent):
+        skip_summarization = structured_passthrough and agent.output_schema is not None
+        if cache:
+            return CachedStreamingAgentTool(agent=agent, cache=cache, skip_summarization=skip_summarization)
+        return StreamingAgentTool(agent=agent, skip_summarization=skip_summarization)
+
+    agent_tools = {
+        spec.name: agent_tool(prepare(spec.name))
+        for category_specs in specs.values()
+        for spec in category_specs
+    }
+
+    if routing == "hierarchical":
+        tools = []
+        for category, category_specs in specs.items():
+            router = instrument(create_category_router(
+                category, category_specs, [agent_tools[spec.name] for spec in category_specs]
+            ))
+            tools.append(StreamingAgentTool(agent=router))
+        instruction = HIERARCHICAL_ORCHESTRATOR_INSTRUCTION.format(
+            category_count=len(tools),
+            category_catalog=render_category_catalog(specs)
+        )
+    else:
+        if prompt_style not in PROMPT_STYLES:
+            raise ValueError(f"Unknown prompt style: {prompt_style}")
+        template, render_catalog, structured_template, fan_out_instruction = PROMPT_STYLES[prompt_style]
+
+        tools = list(agent_tools.values())
+        instruction = template.format(
+            agent_count=len(agent_tools),
+            agent_catalog=render_catalog(specs)
+        )
+
+        structured_agents = [tool.name for tool in tools if tool.agent.output_schema is not None]
+        if structured_agents:
+            instruction += structured_template.format(structured_agents=", ".join(structured_agents))
+
+        if fan_out:
+            tools.append(create_fan_out_tool(agent_tools, agent_names(categories), fan_out))
+            instruction += fan_out_instruction
+
+    # Create the main orchestrator agent; the static instruction is the cacheable prefix
     orchestrator = adk.Agent(
         name="digitide_orchestrator",
-        model="gemini-2.5-pro",
-        instruction="""You are the master orchestrator for the Digitide Healthcare Test Automation Platform.
-
-        You coordinate 38 specialized agents to provide comprehensive test automation for healthcare applications.
-
-        Available Agent Categories:
-
-        1. TEST CASE GENERATION (5 agents):
-           - test_case_generator: Generate comprehensive test cases
-           - negative_test_generator: Create edge cases and failure scenarios
-           - test_optimizer: Optimize test coverage and reduce redundancy
-           - test_update_validator: Validate test updates against compliance
-           - test_improvement_suggester: Suggest test improvements
-
-        2. COMPLIANCE & VALIDATION (3 agents):
-           - compliance_validator: Validate against HIPAA, FDA, ISO standards
-           - compliance_gap_analyzer: Identify missing compliance requirements
-           - audit_trail_generator: Generate audit trails for traceability
-
-        3. DATA & CONTENT (3 agents):
-           - synthetic_data_generator: Generate HIPAA-compliant test data
-           - privacy_validator: Validate data privacy compliance
-           - schema_generator: Generate data schemas
-
-        4. REQUIREMENT ANALYSIS (6 agents):
-           - requirement_extractor: Extract requirements from documents
-           - requirement_analyzer: Analyze requirement quality
-           - user_story_generator: Convert requirements to user stories
-           - document_gap_analyst: Find documentation gaps
-           - adaptive_questionnaire: Generate questions for gaps
-           - requirement_synthesis: Combine requirements from multiple sources
-
-        5. CODE & API TESTING (3 agents):
-           - api_test_generator: Generate API test cases
-           - code_analyzer: Analyze code change impact
-           - security_test_agent: Generate security tests
-
-        6. RISK & QUALITY (3 agents):
-           - risk_assessment: Assess project risks
-           - quality_predictor: Predict quality metrics
-           - test_effectiveness: Measure test effectiveness
-
-        7. DOCUMENTATION & REPORTING (3 agents):
-           - documentation_generator: Generate test documentation
-           - report_analyzer: Analyze test reports
-           - knowledge_extractor: Extract patterns from data
-
-        8. INTEGRATION & ORCHESTRATION (3 agents):
-           - integration_coordinator: Coordinate tool integrations
-           - workflow_orchestrator: Orchestrate test workflows
-           - devops_integration: Integrate with CI/CD
-
-        9. MONITORING & ANALYTICS (3 agents):
-           - performance_monitor: Monitor system performance
-           - predictive_analytics: Provide predictive insights
-           - anomaly_detection: Detect anomalies
-
-        10. SPECIALIZED HEALTHCARE (3 agents):
-            - medical_standards_interpreter: Interpret medical standards
-            - clinical_validation: Validate clinical algorithms
-            - dicom_hl7_validator: Validate medical data formats
-
-        11. SYSTEM-LEVEL (3 agents):
-            - master_coordinator: Coordinate complex multi-agent tasks
-            - rag_knowledge_engine: Manage knowledge base
-            - pipeline_integration: Manage deployment pipelines
-
-        Your role:
-        - Understand user requests
-        - Determine which agents are needed
-        - Coordinate agent execution
-        - Aggregate and present results
-        - Handle complex workflows requiring multiple agents
-
-        For each request:
-        1. Analyze what needs to be done
-        2. Select appropriate agents
-        3. Coordinate their execution
-        4. Combine results into a comprehensive response
-        5. Ensure all compliance and quality standards are met
-        """,
-        tools=[
-            # Test Case Generation AgentTools
-            AgentTool(agent=test_case_generator),
-            AgentTool(agent=negative_test_generator),
-            AgentTool(agent=test_optimizer),
-            AgentTool(agent=test_update_validator),
-            AgentTool(agent=test_improvement_suggester),
-
-            # Compliance AgentTools
-            AgentTool(agent=compliance_validator),
-            AgentTool(agent=compliance_gap_analyzer),
-            AgentTool(agent=audit_trail_generator),
-
-            # Data Generation AgentTools
-            AgentTool(agent=synthetic_data_generator),
-            AgentTool(agent=privacy_validator),
-            AgentTool(agent=schema_generator),
-
-            # Requirement Analysis AgentTools
-            AgentTool(agent=requirement_extractor),
-            AgentTool(agent=requirement_analyzer),
-            AgentTool(agent=user_story_generator),
-            AgentTool(agent=document_gap_analyst),
-            AgentTool(agent=adaptive_questionnaire),
-            AgentTool(agent=requirement_synthesis),
-
-            # Code & API Testing AgentTools
-            AgentTool(agent=api_test_generator),
-            AgentTool(agent=code_analyzer),
-            AgentTool(agent=security_test_agent),
-
-            # Risk & Quality AgentTools
-            AgentTool(agent=risk_assessment),
-            AgentTool(agent=quality_predictor),
-            AgentTool(agent=test_effectiveness),
-
-            # Documentation & Reporting AgentTools
-            AgentTool(agent=documentation_generator),
-            AgentTool(agent=report_analyzer),
-            AgentTool(agent=knowledge_extractor),
-
-            # Integration & Orchestration AgentTools
-            AgentTool(agent=integration_coordinator),
-            AgentTool(agent=workflow_orchestrator),
-            AgentTool(agent=devops_integration),
-
-            # Monitoring & Analytics AgentTools
-            AgentTool(agent=performance_monitor),
-            AgentTool(agent=predictive_analytics),
-            AgentTool(agent=anomaly_detection),
-
-            # Specialized Healthcare AgentTools
-            AgentTool(agent=medical_standards_interpreter),
-            AgentTool(agent=clinical_validation),
-            AgentTool(agent=dicom_hl7_validator),
-
-            # System-Level AgentTools
-            AgentTool(agent=master_coordinator),
-            AgentTool(agent=rag_knowledge_engine),
-            AgentTool(agent=pipeline_integration)
-        ]
+        model=model_for("digitide_orchestrator"),
+        static_instruction=instruction,
+        tools=tools
     )
 
-    return orchestrator
\ No newline at end of file
+    # Before the other callbacks, so the scheduler and tracer see the compacted request
+    if history:
+        history.attach(orchestrator)
+
+    return instrument(orchestrator)
+
+
+def create_digitide_app(context_cache=True, cache_ttl_seconds=1800, cache_intervals=10, min_tokens=0,
+                        compaction_interval=None, compaction_overlap=1, **system_options):
+    """
+    Wraps the Digitide system in an ADK App with context caching
+
+    The orchestrator's static prefix (routing prompt and tool declarations)
+    is cached by Gemini for cache_ttl_seconds and reused for up to
+    cache_intervals invocations, so follow-up turns only pay for the cached
+    tokens at the reduced rate.
+
+    compaction_interval turns on ADK's event compaction: every
+    compaction_interval turns the older events of a session are summarized
+    by the model, keeping compaction_overlap turns of overlap. It shortens
+    the stored history itself, where a HistoryCompactor passed as history
+    only trims what each request re-sends. Other keyword arguments go to
+    create_digitide_system().
+    """
+    return App(
+        name="digitide",
+        root_agent=create_digitide_system(**system_options),
+        context_cache_config=ContextCacheConfig(
+            cache_intervals=cache_intervals,
+            ttl_seconds=cache_ttl_seconds,
+            min_tokens=min_tokens
+        ) if context_cache else None,
+        events_compaction_config=EventsCompactionConfig(
+            compaction_interval=compaction_interval,
+            overlap_size=compaction_overlap
+        ) if compaction_interval else None
+    )
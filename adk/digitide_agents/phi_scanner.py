@@ -0,0 +1,326 @@
+"""
+Local PHI/PII scanner for the privacy_validator agent
+Identifiers (SSN, MRN, phone, email, dates, street addresses) are matched by
+one compiled pattern in a single pass; names by dictionary lookup of
+capitalized words. Text is scanned in overlapping chunks, optionally across
+worker processes, so memory stays bounded for any input size. Findings that
+need judgement (a lone name that is also a common word, a bare nine-digit
+number) are marked ambiguous; only those are meant to reach the model
+
+    python -m digitide_agents.phi_scanner export.csv --workers 4
+"""
+
+import argparse
+import bisect
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_CHUNK_CHARS = 1 << 20
+
+# Characters carried over between chunks; longer than any single match
+CHUNK_OVERLAP = 256
+
+# Findings and ambiguous findings kept in a report; counts are always complete
+MAX_FINDINGS = 500
+
+# Characters around an ambiguous finding shown for review
+CONTEXT_CHARS = 40
+
+HIGH = "high"
+AMBIGUOUS = "ambiguous"
+
+_MONTHS = "Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:t(?:ember)?)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?"
+_STREET_SUFFIXES = "St|Street|Ave|Avenue|Rd|Road|Blvd|Boulevard|Dr|Drive|Ln|Lane|Way|Ct|Court|Pl|Place|Ter|Terrace|Pkwy|Parkway|Hwy|Highway"
+
+# One alternation with a named group per identifier type, so a chunk is
+# matched in a single pass. Order matters where patterns overlap: the first
+# alternative that matches at a position wins. MRN values are upper case
+# and contain a digit, so prose after "medical record" is not one.
+IDENTIFIER_PATTERN = re.compile(
+    r"(?P<email>\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b)"
+    r"|(?P<ssn>\b(?!000|666|9\d\d)\d{3}-(?!00)\d{2}-(?!0000)\d{4}\b)"
+    r"|(?P<mrn>\b(?:MRN|MR#|Medical Record(?: Number| No\.?)?)[\s:#-]*(?-i:(?=[A-Z0-9-]*\d)[A-Z0-9][A-Z0-9-]{3,19})\b)"
+    r"|(?P<date>\b(?:19|20)\d{2}-(?:0[1-9]|1[0-2])-(?:0[1-9]|[12]\d|3[01])\b"
+    r"|\b(?:0?[1-9]|1[0-2])/(?:0?[1-9]|[12]\d|3[01])/(?:19|20)?\d{2}\b"
+    rf"|\b(?:{_MONTHS})\.? (?:0?[1-9]|[12]\d|3[01]),? (?:19|20)\d{{2}}\b)"
+    r"|(?P<phone>(?<![\d-])(?:\+1[\s.-]?)?(?:\(\d{3}\)\s?|\d{3}[\s.-])\d{3}[\s.-]\d{4}(?![\d-]))"
+    rf"|(?P<address>(?-i:\b\d{{1,5}} (?:[A-Z][a-z]+ ){{1,3}}(?:{_STREET_SUFFIXES})\b\.?))"
+    r"|(?P<ssn_candidate>\b(?<!-)\d{9}\b(?!-))",
+    re.IGNORECASE
+)
+
+_CAPITALIZED_WORD = re.compile(r"\b[A-Z][a-z]+(?:['-][A-Z][a-z]+)?\b")
+
+# Between the words of one name, including CSV fields and HL7 components
+_NAME_SEPARATORS = frozenset((" ", ", ", ",", "^"))
+
+# Words before a bare nine-digit number or a lone name that make it an identifier
+_SSN_CONTEXT = re.compile(r"(?:ssn|social security|soc sec)\W{0,10}$", re.IGNORECASE)
+_NAME_CONTEXT = re.compile(
+    r"(?:\b(?:mr|mrs|ms|miss|dr|patient|pt|name|member|guarantor|insured)\b\.?[:\s]*)$", re.IGNORECASE
+)
+
+GIVEN_NAMES = frozenset("""
+James Mary John Patricia Robert Jennifer Michael Linda David Elizabeth William Barbara Richard Susan Joseph
+Jessica Thomas Sarah Christopher Karen Charles Lisa Daniel Nancy Matthew Betty Anthony Sandra Mark Margaret
+Donald Ashley Steven Kimberly Andrew Emily Paul Donna Joshua Michelle Kenneth Carol Kevin Amanda Brian Melissa
+George Deborah Timothy Stephanie Ronald Rebecca Jason Sharon Edward Laura Jeffrey Cynthia Ryan Dorothy Jacob
+Amy Gary Kathleen Nicholas Angela Eric Shirley Jonathan Emma Stephen Brenda Larry Pamela Justin Nicole Scott
+Anna Brandon Samantha Benjamin Katherine Samuel Christine Gregory Debra Alexander Rachel Patrick Carolyn Frank
+Janet Raymond Maria Jack Olivia Dennis Heather Jerry Helen Tyler Catherine Aaron Diane Jose Julie Adam Victoria
+Nathan Joyce Henry Lauren Zachary Kelly Douglas Christina Peter Ruth Kyle Joan Noah Virginia Ethan Judith Jeremy
+Evelyn Christian Hannah Walter Andrea Keith Megan Austin Cheryl Roger Jacqueline Terry Madison Sean Teresa Gerald
+Abigail Carl Sophia Dylan Martha Harold Sara Jordan Gloria Jesse Janice Bryan Kathryn Lawrence Ann Arthur Isabella
+Gabriel Judy Bruce Charlotte Logan Julia Billy Grace Joe Amber Alan Alice Juan Jean Elijah Denise Willie Frances
+Albert Danielle Wayne Marilyn Randy Natalie Mason Beverly Vincent Diana Liam Brittany Roy Theresa Bobby Kayla
+Caleb Alexis Bradley Doris Russell Lori Lucas Tiffany Oliver Ava Mia Amelia Harper Ella Chloe Priya Mei Fatima
+Lucia Aaliyah Zoe Nora Mateo Arjun Wei Omar Diego Malik Leo Isaac Ahmed Mohammed Raj Ana Carlos Luis Miguel
+""".split())
+
+FAMILY_NAMES = frozenset("""
+Smith Johnson Williams Brown Jones Garcia Miller Davis Rodriguez Martinez Hernandez Lopez Gonzalez Wilson
+Anderson Thomas Taylor Moore Jackson Martin Lee Perez Thompson White Harris Sanchez Clark Ramirez Lewis Robinson
+Walker Young Allen King Wright Scott Torres Nguyen Hill Flores Green Adams Nelson Baker Hall Rivera Campbell
+Mitchell Carter Roberts Gomez Phillips Evans Turner Diaz Parker Cruz Edwards Collins Reyes Stewart Morris
+Morales Murphy Cook Rogers Gutierrez Ortiz Morgan Cooper Peterson Bailey Reed Kelly Howard Ramos Kim Cox Ward
+Richardson Watson Brooks Chavez Wood James Bennett Gray Mendoza Ruiz Hughes Price Alvarez Castillo Sanders Patel
+Myers Long Ross Foster Jimenez Powell Jenkins Perry Russell Sullivan Bell Coleman Butler Henderson Barnes
+Gonzales Fisher Vasquez Simmons Romero Jordan Patterson Alexander Hamilton Graham Reynolds Griffin Wallace
+Moreno West Cole Hayes Bryant Herrera Gibson Ellis Tran Medina Aguilar Stevens Murray Ford Castro Marshall Owens
+Harrison Fernandez McDonald Woods Washington Kennedy Wells Vargas Henry Chen Freeman Webb Tucker Guzman Burns
+Crawford Olson Simpson Porter Hunter Gordon Mendez Silva Shaw Snyder Mason Dixon Munoz Hunt Hicks Holmes Palmer
+Wagner Black Robertson Boyd Rose Stone Salazar Fox Warren Mills Meyer Rice Schmidt Garza Daniels Ferguson Nichols
+Stephens Soto Weaver Ryan Gardner Payne Grant Dunn Kelley Spencer Hawkins Arnold Pierce Vazquez Hansen Peters
+Santos Hart Bradley Knight Elliott Cunningham Duncan Armstrong Hudson Carroll Lane Riley Andrews Alvarado Ray
+Delgado Berry Perkins Hoffman Johnston Matthews Pena Richards Contreras Willis Carpenter Lawrence Sandoval
+Wang Li Zhang Liu Singh Kumar Shah Khan Ali Ahmed Cohen Nakamura Tanaka Kowalski Novak Muller Schneider Rossi
+""".split())
+
+# Names that are also everyday words; found alone they are ambiguous
+COMMON_WORD_NAMES = frozenset("""
+Will Mark May June April August Grace Hope Faith Joy Rose Bill Art Bell Dean Miles Page Price Long Young White
+Brown Green Black Gray King Hall Hill Wood Woods Rice Stone Fox Rich Ray Lane Hunt Ford Cook Baker Carter
+Mason Parker Turner Porter Hunter Cole Grant Wells West Knight Spencer Payne Jordan Kelly Carol Frank Henry
+James Thomas Martin Scott Lee Lewis Allen Ross Perry Bailey Reed Webb Holmes Palmer Shaw Dixon Ward Brooks
+Mills Marshall Washington Gordon Daniels Chase Bush Ash Lily
+""".split())
+
+_LOADED_NAMES = None
+
+
+def name_dictionary():
+    """
+    Returns the built-in names plus those in DIGITIDE_NAME_DICTIONARY (one per line)
+    """
+    global _LOADED_NAMES
+    if _LOADED_NAMES is None:
+        names = set(GIVEN_NAMES) | set(FAMILY_NAMES)
+        path = os.environ.get("DIGITIDE_NAME_DICTIONARY")
+        if path:
+            with open(path) as f:
+                names.update(line.strip().title() for line in f if line.strip())
+        _LOADED_NAMES = frozenset(names)
+    return _LOADED_NAMES
+
+
+def mask(value):
+    """
+    Masks a found value down to its last two characters
+    """
+    return "*" * max(0, len(value) - 2) + value[-2:] if len(value) > 4 else "*" * len(value)
+
+
+def _finding(kind, start, end, value, confidence, text, offset):
+    finding = {"type": kind, "start": offset + start, "end": offset + end, "masked": mask(value), "confidence": confidence}
+    if confidence == AMBIGUOUS:
+        finding["context"] = text[max(0, start - CONTEXT_CHARS):end + CONTEXT_CHARS]
+    return finding
+
+
+def scan_chunk(text, offset=0, start=0, cut=None, names=None):
+    """
+    Finds PHI in text; offset is added to spans and only matches starting
+    in [start, cut) are returned. The text before start and after cut is
+    context shared with the neighbouring chunks.
+
+    Returns findings ordered by position, each {type, start, end, masked,
+    confidence} plus the surrounding context when ambiguous.
+    """
+    cut = len(text) if cut is None else cut
+    names = name_dictionary() if names is None else names
+    findings = []
+    taken_starts = []
+    taken_ends = []
+
+    for match in IDENTIFIER_PATTERN.finditer(text):
+        if match.start() >= cut:
+            break
+        taken_starts.append(match.start())
+        taken_ends.append(match.end())
+        if match.start() < start:
+            continue
+        kind = match.lastgroup
+        confidence = HIGH
+        if kind == "ssn_candidate":
+            kind = "ssn"
+            confidence = HIGH if _SSN_CONTEXT.search(text, max(0, match.start() - 30), match.start()) else AMBIGUOUS
+        findings.append(_finding(kind, match.start(), match.end(), match.group(), confidence, text, offset))
+
+    # Names: runs of dictionary words, not inside an identifier match
+    words = [
+        match for match in _CAPITALIZED_WORD.finditer(text)
+        if match.group() in names
+    ]
+    index = 0
+    while index < len(words):
+        first = words[index]
+        last = first
+        index += 1
+        while index < len(words) and text[last.end():words[index].start()] in _NAME_SEPARATORS:
+            last = words[index]
+            index += 1
+        if first.start() >= cut:
+            break
+        if first.start() < start:
+            continue
+        # Identifier matches do not overlap, so only the last one starting before the run can
+        overlapping = bisect.bisect_left(taken_starts, last.end()) - 1
+        if overlapping >= 0 and taken_ends[overlapping] > first.start():
+            continue
+        value = text[first.start():last.end()]
+        if last is not first or _NAME_CONTEXT.search(text, max(0, first.start() - 20), first.start()):
+            confidence = HIGH
+        elif first.group() in COMMON_WORD_NAMES or text[:first.start()].rstrip(" ")[-1:] in ("", ".", "\n"):
+            # Alone, a common word or sentence-initial capital is likely not a name
+            confidence = AMBIGUOUS
+        else:
+            confidence = HIGH
+        findings.append(_finding("name", first.start(), last.end(), value, confidence, text, offset))
+
+    findings.sort(key=lambda finding: finding["start"])
+    return findings
+
+
+def iter_chunks(stream, chunk_chars=DEFAULT_CHUNK_CHARS):
+    """
+    Yields (offset, text, start, cut) chunks of a text stream
+
+    Matches starting in text[start:cut] belong to the chunk. Up to
+    CHUNK_OVERLAP characters on either side are shared with the previous and
+    next chunks, so a match across a boundary is seen whole, and only once.
+    """
+    carry = ""
+    start = 0
+    offset = 0
+    while True:
+        data = stream.read(chunk_chars)
+        text = carry + data
+        if not data:
+            if len(text) > start:
+                yield offset, text, start, len(text)
+            return
+        cut = len(text) - CHUNK_OVERLAP
+        if cut <= start:
+            carry = text
+            continue
+        yield offset, text, start, cut
+        lead = max(0, cut - CHUNK_OVERLAP)
+        carry = text[lead:]
+        start = cut - lead
+        offset += lead
+
+
+def _scan_job(job):
+    offset, text, start, cut = job
+    return scan_chunk(text, offset, start, cut)
+
+
+class ScanReport:
+    """
+    Counts of all findings plus the first MAX_FINDINGS of each confidence
+    """
+
+    def __init__(self, max_findings=MAX_FINDINGS):
+        self.max_findings = max_findings
+        self.counts = {}
+        self.ambiguous_count = 0
+        self.findings = []
+        self.ambiguous = []
+        self.characters = 0
+
+    def add(self, findings):
+        for finding in findings:
+            self.counts[finding["type"]] = self.counts.get(finding["type"], 0) + 1
+            if finding["confidence"] == AMBIGUOUS:
+                self.ambiguous_count += 1
+                kept = self.ambiguous
+            else:
+                kept = self.findings
+            if len(kept) < self.max_findings:
+                kept.append(finding)
+
+    def to_dict(self):
+        return {
+            "characters": self.characters,
+            "counts": self.counts,
+            "total": sum(self.counts.values()),
+            "ambiguous_total": self.ambiguous_count,
+            "findings": self.findings,
+            "ambiguous": self.ambiguous
+        }
+
+
+def scan_stream(stream, workers=1, chunk_chars=DEFAULT_CHUNK_CHARS, max_findings=MAX_FINDINGS):
+    """
+    Scans a text stream chunk by chunk and returns a report dict
+
+    With workers > 1 chunks are scanned in that many processes, at most two
+    per worker in flight. Spans are character offsets into the stream.
+    """
+    report = ScanReport(max_findings)
+    jobs = iter_chunks(stream, chunk_chars)
+    if workers <= 1:
+        for job in jobs:
+            report.add(_scan_job(job))
+            report.characters = job[0] + job[3]
+        return report.to_dict()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = []
+        for job in jobs:
+            pending.append(executor.submit(_scan_job, job))
+            report.characters = job[0] + job[3]
+            if len(pending) >= 2 * workers:
+                report.add(pending.pop(0).result())
+        for future in pending:
+            report.add(future.result())
+    return report.to_dict()
+
+
+def scan_file(path, workers=1, chunk_chars=DEFAULT_CHUNK_CHARS, max_findings=MAX_FINDINGS):
+    """
+    Scans a text file; undecodable bytes are replaced rather than failing the scan
+    """
+    with open(path, encoding="utf-8", errors="replace", newline="") as f:
+        return scan_stream(f, workers, chunk_chars, max_findings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m digitide_agents.phi_scanner")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    found = 0
+    for path in args.files:
+        report = scan_file(path, args.workers)
+        found += report["total"]
+        counts = ", ".join(f"{kind}: {count}" for kind, count in sorted(report["counts"].items())) or "none"
+        print(f"{'⚠️' if report['total'] else '✅'} {path}: {counts} ({report['ambiguous_total']} ambiguous)")
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Deterministic workflow pipelines for known request types
+Pipelines chain the existing specialists directly and skip the LLM routing turn
+"""
+
+from google.adk.agents import ParallelAgent, SequentialAgent
+
+from .registry import build_agent
+from .runtime import DEFAULT_USER_ID, run_agent
+
+
+def sequential(*steps):
+    """Runs steps one after another, each seeing the previous outputs"""
+    return {"mode": "sequential", "steps": steps}
+
+
+def parallel(*steps):
+    """Runs steps at the same time on the same input"""
+    return {"mode": "parallel", "steps": steps}
+
+
+# Named pipelines; steps are agent names or nested sequential/parallel groups
+PIPELINES = {
+    # Document to validated test cases
+    "requirement_to_tests": sequential(
+        "requirement_extractor",
+        "requirement_analyzer",
+        "test_case_generator",
+        "compliance_validator"
+    ),
+
+    # Documentation gaps to follow-up questions
+    "gap_questionnaire": sequential(
+        "document_gap_analyst",
+        "adaptive_questionnaire"
+    ),
+
+    # Full review of a single requirement
+    "full_review": parallel(
+        "test_case_generator",
+        "negative_test_generator",
+        "compliance_validator",
+        "security_test_agent"
+    ),
+
+    # Analyze a requirement, then review it from every angle at once
+    "requirement_review": sequential(
+        "requirement_analyzer",
+        parallel(
+            "test_case_generator",
+            "negative_test_generator",
+            "compliance_validator",
+            "security_test_agent"
+        )
+    )
+}
+
+
+def _build_step(step, name):
+    if isinstance(step, str):
+        # Agents can only have one parent, so every pipeline builds its own.
+        # The output_key keeps each stage's result in the session state.
+        return build_agent(step, output_key=step)
+
+    workflow = SequentialAgent if step["mode"] == "sequential" else ParallelAgent
+    sub_agents = [
+        _build_step(sub_step, f"{name}_{index}")
+        for index, sub_step in enumerate(step["steps"], start=1)
+    ]
+    return workflow(name=name, sub_agents=sub_agents)
+
+
+def _stage_names(step):
+    if isinstance(step, str):
+        return [step]
+    return [name for sub_step in step["steps"] for name in _stage_names(sub_step)]
+
+
+def _get_definition(name):
+    if name not in PIPELINES:
+        raise ValueError(f"Unknown pipeline: {name}. Available: {', '.join(PIPELINES)}")
+    return PIPELINES[name]
+
+
+def pipeline_stages(name):
+    """
+    Lists the agent names a pipeline runs, in definition order
+    """
+    return _stage_names(_get_definition(name))
+
+
+def create_pipeline(name):
+    """
+    Builds the workflow agent for a named pipeline
+    """
+    return _build_step(_get_definition(name), name)
+
+
+async def run_pipeline(name, message, user_id=DEFAULT_USER_ID):
+    """
+    Runs a named pipeline without the orchestrator
+
+    Returns a dict mapping each stage's agent name to its output.
+    """
+    _, state = await run_agent(create_pipeline(name), message, user_id=user_id)
+    return {stage: state.get(stage) for stage in pipeline_stages(name)}
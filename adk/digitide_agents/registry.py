@@ -0,0 +1,166 @@
+"""
+Lazy registry of the Digitide agents
+Agents are described by AgentSpec entries in the category modules and are only
+turned into adk.Agent objects when first used, so importing the package stays cheap
+"""
+
+import importlib
+
+# Category keys and the titles the orchestrator knows them by, in routing order
+CATEGORY_TITLES = {
+    "test": "TEST CASE GENERATION",
+    "compliance": "COMPLIANCE & VALIDATION",
+    "data": "DATA & CONTENT",
+    "requirement": "REQUIREMENT ANALYSIS",
+    "code_api": "CODE & API TESTING",
+    "risk_quality": "RISK & QUALITY",
+    "documentation": "DOCUMENTATION & REPORTING",
+    "integration": "INTEGRATION & ORCHESTRATION",
+    "monitoring": "MONITORING & ANALYTICS",
+    "healthcare": "SPECIALIZED HEALTHCARE",
+    "system": "SYSTEM-LEVEL"
+}
+
+# Modules holding the AGENT_SPECS lists; they only contain data
+SPEC_MODULES = [
+    "test_agents",
+    "compliance_agents",
+    "data_agents",
+    "requirement_agents",
+    "all_other_agents"
+]
+
+_specs = None
+_agents = {}
+
+
+class AgentSpec:
+    """
+    Declarative description of an agent
+
+    summary is the one-line description the orchestrator routes on.
+    output_schema names a model in schemas.py the agent must answer with,
+    and tools names functions in tools.py the agent can call; both are
+    resolved when the agent is built.
+    """
+
+    def __init__(self, name, category, instruction, summary="", output_schema=None, tools=()):
+        if category not in CATEGORY_TITLES:
+            raise ValueError(f"Unknown category for {name}: {category}")
+        self.name = name
+        self.category = category
+        self.instruction = instruction
+        self.summary = summary
+        self.output_schema = output_schema
+        self.tools = tuple(tools)
+        self.module = None
+
+    def __repr__(self):
+        return f"AgentSpec(name={self.name!r}, category={self.category!r})"
+
+
+def _load_specs():
+    global _specs
+    if _specs is None:
+        specs = {}
+        for module_name in SPEC_MODULES:
+            module = importlib.import_module(f".{module_name}", __package__)
+            for spec in module.AGENT_SPECS:
+                spec.module = module.__name__
+                specs[spec.name] = spec
+        _specs = specs
+    return _specs
+
+
+def get_spec(name):
+    """
+    Returns the AgentSpec of an agent
+    """
+    specs = _load_specs()
+    if name not in specs:
+        raise KeyError(f"Unknown agent: {name}")
+    return specs[name]
+
+
+def resolve_categories(categories=None):
+    """
+    Returns category keys in routing order, validating a requested subset
+    """
+    if categories is None:
+        return list(CATEGORY_TITLES)
+    unknown = set(categories) - set(CATEGORY_TITLES)
+    if unknown:
+        raise ValueError(f"Unknown categories: {', '.join(sorted(unknown))}")
+    return [category for category in CATEGORY_TITLES if category in categories]
+
+
+def agent_specs(categories=None):
+    """
+    Returns {category: [AgentSpec, ...]} for all or some categories
+    """
+    selected = resolve_categories(categories)
+    grouped = {category: [] for category in selected}
+    for spec in _load_specs().values():
+        if spec.category in grouped:
+            grouped[spec.category].append(spec)
+    return grouped
+
+
+def agent_names(categories=None):
+    """
+    Returns {category: [agent name, ...]} for all or some categories
+    """
+    return {
+        category: [spec.name for spec in specs]
+        for category, specs in agent_specs(categories).items()
+    }
+
+
+def build_agent(name, **overrides):
+    """
+    Builds a new adk.Agent from its spec
+
+    Every call returns a fresh agent, so callers can attach callbacks or
+    parent it in a workflow without affecting other users.
+    """
+    from google import adk
+
+    from .models import model_for
+
+    spec = get_spec(name)
+    settings = {
+        "name": spec.name,
+        "model": model_for(spec.name),
+        "instruction": spec.instruction
+    }
+    if spec.output_schema:
+        from . import schemas
+
+        settings["output_schema"] = getattr(schemas, spec.output_schema)
+    if spec.tools:
+        from . import tools
+
+        settings["tools"] = [getattr(tools, tool) for tool in spec.tools]
+    settings.update(overrides)
+    return adk.Agent(**settings)
+
+
+def get_agent(name):
+    """
+    Returns the shared instance of an agent, building it on first use
+    """
+    if name not in _agents:
+        _agents[name] = build_agent(name)
+    return _agents[name]
+
+
+def module_agent(module_name, attribute):
+    """
+    Module __getattr__ helper so agents can still be imported by name
+    """
+    # Dunder and constant lookups happen while the spec modules import
+    if not attribute.startswith("_") and not attribute.isupper():
+        spec = _load_specs().get(attribute)
+        if spec is not None and spec.module == module_name:
+            return get_agent(attribute)
+    raise AttributeError(f"module {module_name!r} has no attribute {attribute!r}")
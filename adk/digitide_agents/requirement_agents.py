@@ -2,52 +2,75 @@
 Requirement Analysis Agents (6 agents)
 """
 
-from google import adk
+from .registry import AgentSpec, module_agent
 
 # Agent 12: Requirement Extractor
-requirement_extractor = adk.Agent(
+requirement_extractor_spec = AgentSpec(
     name="requirement_extractor",
-    model="gemini-2.5-pro",
+    category="requirement",
+    summary="Extract requirements from documents",
+    output_schema="RequirementList",
     instruction="""Extract and structure requirements from documents. Identify functional, non-functional,
-    compliance, and technical requirements. Parse user stories, specifications, and regulatory documents."""
+    compliance, and technical requirements. Parse user stories, specifications, and regulatory documents.
+    When given one part of a longer document, extract only what that part states, keep identifiers the
+    document uses, and quote its wording in titles and descriptions so results can be traced and merged."""
 )
 
 # Agent 13: Requirement Analyzer
-requirement_analyzer = adk.Agent(
+requirement_analyzer_spec = AgentSpec(
     name="requirement_analyzer",
-    model="gemini-2.5-pro",
+    category="requirement",
+    summary="Analyze requirement quality",
     instruction="""Analyze requirements for completeness, consistency, testability, and ambiguity.
     Identify conflicts, dependencies, and missing details. Enhance requirements with acceptance criteria."""
 )
 
 # Agent 14: User Story Generator
-user_story_generator = adk.Agent(
+user_story_generator_spec = AgentSpec(
     name="user_story_generator",
-    model="gemini-2.5-pro",
+    category="requirement",
+    summary="Convert requirements to user stories",
     instruction="""Convert requirements into user stories with acceptance criteria. Follow format:
     As a [role], I want [feature], so that [benefit]. Include definition of done and test scenarios."""
 )
 
 # Agent 15: Document Gap Analyst
-document_gap_analyst = adk.Agent(
+document_gap_analyst_spec = AgentSpec(
     name="document_gap_analyst",
-    model="gemini-2.5-pro",
+    category="requirement",
+    summary="Find documentation gaps",
     instruction="""Analyze documentation for missing information, incomplete sections, and gaps.
     Identify areas needing clarification. Focus on technical specifications and compliance documentation."""
 )
 
 # Agent 16: Adaptive Questionnaire
-adaptive_questionnaire = adk.Agent(
+adaptive_questionnaire_spec = AgentSpec(
     name="adaptive_questionnaire",
-    model="gemini-2.5-pro",
+    category="requirement",
+    summary="Generate questions for gaps",
     instruction="""Generate targeted questions to fill requirement gaps. Create context-aware questions
     based on missing information. Prioritize questions by criticality and impact."""
 )
 
 # Agent 17: Requirement Synthesis
-requirement_synthesis = adk.Agent(
+requirement_synthesis_spec = AgentSpec(
     name="requirement_synthesis",
-    model="gemini-2.5-pro",
+    category="requirement",
+    summary="Combine requirements from multiple sources",
     instruction="""Synthesize requirements from multiple sources. Resolve conflicts, combine related requirements,
     and create unified requirement sets. Maintain traceability to original sources."""
-)
\ No newline at end of file
+)
+
+AGENT_SPECS = [
+    requirement_extractor_spec,
+    requirement_analyzer_spec,
+    user_story_generator_spec,
+    document_gap_analyst_spec,
+    adaptive_questionnaire_spec,
+    requirement_synthesis_spec
+]
+
+
+def __getattr__(name):
+    # Agents are built from their specs on first access
+    return module_agent(__name__, name)
@@ -0,0 +1,51 @@
+"""
+Helpers for running agents directly, without going through the orchestrator
+"""
+
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+DEFAULT_USER_ID = "digitide"
+
+
+def final_text(event):
+    """
+    Returns the visible text of an event, skipping thought parts
+    """
+    if not event.content or not event.content.parts:
+        return ""
+    return "".join(part.text or "" for part in event.content.parts if not part.thought)
+
+
+async def run_agent(agent, message, user_id=DEFAULT_USER_ID, state=None):
+    """
+    Runs an agent once in a fresh in-memory session
+
+    Returns the last final response text and the session state after the run.
+    """
+    runner = InMemoryRunner(agent=agent, app_name=agent.name)
+    session = await runner.session_service.create_session(
+        app_name=agent.name,
+        user_id=user_id,
+        state=state or {}
+    )
+
+    text = ""
+    try:
+        async for event in runner.run_async(
+            user_id=user_id,
+            session_id=session.id,
+            new_message=types.Content(role="user", parts=[types.Part(text=message)])
+        ):
+            if event.is_final_response() and final_text(event):
+                text = final_text(event)
+
+        session = await runner.session_service.get_session(
+            app_name=agent.name,
+            user_id=user_id,
+            session_id=session.id
+        )
+    finally:
+        await runner.close()
+
+    return text, session.state
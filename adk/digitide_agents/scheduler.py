@@ -0,0 +1,320 @@
+"""
+Shared scheduler for Gemini calls
+Every model call of the agents it is attached to waits for a slot on its
+model's lane. A lane enforces token-bucket limits on requests and input
+tokens per minute, adapts its concurrency with AIMD (grow slowly while calls
+succeed, halve on rate limits, shrink on slow calls) and serves interactive
+calls before batch ones, so a saturated quota slows everyone down instead of
+turning into a pile of 429s
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+
+from .callbacks import add_callbacks
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+# Lower rank is served first
+PRIORITY_RANKS = {INTERACTIVE: 0, BATCH: 1}
+
+# Per-model limits; models not listed here use DEFAULT_LIMITS
+MODEL_LIMITS = {
+    "gemini-2.5-pro": {"rpm": 150, "tpm": 2_000_000, "max_concurrency": 16},
+    "gemini-2.5-flash": {"rpm": 1000, "tpm": 4_000_000, "max_concurrency": 32},
+    "gemini-2.5-flash-lite": {"rpm": 4000, "tpm": 4_000_000, "max_concurrency": 64}
+}
+
+DEFAULT_LIMITS = {"rpm": 150, "tpm": 1_000_000, "max_concurrency": 16}
+
+
+def is_rate_limited(error):
+    """
+    Tells whether an error is a model rate limit (HTTP 429 / RESOURCE_EXHAUSTED)
+    """
+    return getattr(error, "code", None) == 429 or "RESOURCE_EXHAUSTED" in str(error)
+
+
+def request_tokens(llm_request):
+    """
+    Rough input token count of a model request, about four characters per token
+    """
+    characters = 0
+    config = llm_request.config
+    if config is not None and config.system_instruction:
+        characters += len(str(config.system_instruction))
+    for content in llm_request.contents or []:
+        for part in content.parts or []:
+            characters += len(part.text or "")
+            if part.function_response is not None:
+                characters += len(str(part.function_response.response))
+    return characters // 4
+
+
+class TokenBucket:
+    """
+    Refills at rate_per_minute up to capacity (one minute's worth by default)
+    """
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        """
+        Seconds until amount can be taken; 0 if it can be taken now
+        """
+        self._refill()
+        # Requests bigger than the bucket only wait for a full bucket
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.tokens) / self.rate)
+
+    def take(self, amount):
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+
+class AdaptiveLimit:
+    """
+    AIMD concurrency limit
+
+    Grows by one per window of successful calls, halves on a rate limit and
+    shrinks by decrease_factor when latency goes over latency_target. At
+    most one decrease per cooldown_seconds, so a burst of failures from one
+    window only counts once.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=16, latency_target=None,
+                 backoff_factor=0.5, decrease_factor=0.9, cooldown_seconds=2.0):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.backoff_factor = backoff_factor
+        self.decrease_factor = decrease_factor
+        self.cooldown_seconds = cooldown_seconds
+        self._last_decrease = 0.0
+
+    @property
+    def value(self):
+        return max(self.minimum, int(self.limit))
+
+    def _decrease(self, factor):
+        now = time.monotonic()
+        if now - self._last_decrease >= self.cooldown_seconds:
+            self.limit = max(self.minimum, self.limit * factor)
+            self._last_decrease = now
+
+    def on_success(self, latency):
+        if self.latency_target is not None and latency > self.latency_target:
+            self._decrease(self.decrease_factor)
+        else:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def on_rate_limited(self):
+        self._decrease(self.backoff_factor)
+
+
+class _Lane:
+
+    def __init__(self, limits, latency_target):
+        self.requests = TokenBucket(limits["rpm"])
+        self.tokens = TokenBucket(limits["tpm"])
+        self.concurrency = AdaptiveLimit(
+            initial=min(4, limits["max_concurrency"]),
+            maximum=limits["max_concurrency"],
+            latency_target=latency_target
+        )
+        self.waiting = []
+        self.leases = {}
+        self.paused_until = 0.0
+        self.timer = None
+        self.stats = {
+            "granted": 0,
+            "completed": 0,
+            "rate_limited": 0,
+            "errors": 0,
+            "throttled": 0,
+            "expired_leases": 0,
+            "peak_queue_depth": 0,
+            "total_wait_seconds": 0.0
+        }
+
+
+class ModelScheduler:
+    """
+    Queues model calls per model and releases them within quota
+
+    limits maps model names to {"rpm", "tpm", "max_concurrency"}, merged
+    over MODEL_LIMITS. latency_target (seconds) makes a lane shrink when
+    calls get slower than that. A rate-limited call also pauses its lane
+    for pause_seconds. Leases not released within lease_timeout_seconds
+    (e.g. a cancelled run) are reclaimed.
+
+    Attach it with create_digitide_system(scheduler=...) for interactive
+    traffic and BatchRunner(scheduler=...) for batch jobs; both share the
+    same lanes when given the same scheduler.
+    """
+
+    def __init__(self, limits=None, latency_target=None, pause_seconds=5.0, lease_timeout_seconds=600):
+        self.limits = {**MODEL_LIMITS, **(limits or {})}
+        self.latency_target = latency_target
+        self.pause_seconds = pause_seconds
+        self.lease_timeout_seconds = lease_timeout_seconds
+        self._lanes = {}
+        self._sequence = itertools.count()
+        self._calls = {}
+
+    def _lane(self, model):
+        if model not in self._lanes:
+            self._lanes[model] = _Lane(self.limits.get(model, DEFAULT_LIMITS), self.latency_target)
+        return self._lanes[model]
+
+    def _reclaim(self, lane):
+        cutoff = time.monotonic() - self.lease_timeout_seconds
+        for key, started in list(lane.leases.items()):
+            if started < cutoff:
+                del lane.leases[key]
+                lane.stats["expired_leases"] += 1
+
+    def _schedule(self, model, lane, delay):
+        if lane.timer is None:
+            def wake():
+                lane.timer = None
+                self._dispatch(model)
+
+            lane.timer = asyncio.get_running_loop().call_later(delay, wake)
+
+    def _dispatch(self, model):
+        lane = self._lane(model)
+        self._reclaim(lane)
+        while lane.waiting:
+            _, _, key, tokens, future = lane.waiting[0]
+            if future.done():
+                # Cancelled while queued
+                heapq.heappop(lane.waiting)
+                continue
+            if len(lane.leases) >= lane.concurrency.value:
+                return
+
+            wait = max(
+                lane.paused_until - time.monotonic(),
+                lane.requests.wait_time(1),
+                lane.tokens.wait_time(tokens)
+            )
+            if wait > 0:
+                lane.stats["throttled"] += 1
+                self._schedule(model, lane, wait)
+                return
+
+            heapq.heappop(lane.waiting)
+            lane.requests.take(1)
+            lane.tokens.take(tokens)
+            lane.leases[key] = time.monotonic()
+            lane.stats["granted"] += 1
+            future.set_result(None)
+
+    async def acquire(self, model, key, priority=INTERACTIVE, tokens=0):
+        """
+        Waits for a slot on a model's lane; key identifies the lease for release()
+        """
+        lane = self._lane(model)
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(lane.waiting, (PRIORITY_RANKS[priority], next(self._sequence), key, tokens, future))
+        lane.stats["peak_queue_depth"] = max(lane.stats["peak_queue_depth"], len(lane.waiting))
+
+        started = time.monotonic()
+        self._dispatch(model)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if lane.leases.pop(key, None) is not None:
+                self._dispatch(model)
+            raise
+        lane.stats["total_wait_seconds"] += time.monotonic() - started
+
+    def release(self, model, key, latency=None, error=None):
+        """
+        Frees a slot and feeds the outcome of the call into the lane's limit
+        """
+        lane = self._lane(model)
+        if lane.leases.pop(key, None) is None:
+            return
+        if error is None:
+            lane.stats["completed"] += 1
+            lane.concurrency.on_success(latency or 0.0)
+        elif is_rate_limited(error):
+            lane.stats["rate_limited"] += 1
+            lane.concurrency.on_rate_limited()
+            lane.paused_until = max(lane.paused_until, time.monotonic() + self.pause_seconds)
+        else:
+            lane.stats["errors"] += 1
+        self._dispatch(model)
+
+    # Model callbacks
+
+    def _callbacks(self, priority):
+        async def before_model(callback_context, llm_request):
+            key = (callback_context.invocation_id, callback_context.agent_name)
+            model = str(llm_request.model)
+            await self.acquire(model, key, priority, request_tokens(llm_request))
+            self._calls[key] = (model, time.monotonic())
+
+        def after_model(callback_context, llm_response):
+            if llm_response.partial:
+                return
+            key = (callback_context.invocation_id, callback_context.agent_name)
+            call = self._calls.pop(key, None)
+            if call is not None:
+                self.release(call[0], key, latency=time.monotonic() - call[1])
+
+        def on_model_error(callback_context, llm_request, error):
+            key = (callback_context.invocation_id, callback_context.agent_name)
+            call = self._calls.pop(key, None)
+            if call is not None:
+                self.release(call[0], key, error=error)
+            # Let the error propagate to the caller's retry logic
+
+        return before_model, after_model, on_model_error
+
+    def attach(self, agent, priority=INTERACTIVE):
+        """
+        Routes an agent's model calls through the scheduler at a priority
+        """
+        if priority not in PRIORITY_RANKS:
+            raise ValueError(f"Unknown priority: {priority}")
+        before_model, after_model, on_model_error = self._callbacks(priority)
+        add_callbacks(agent, before_model=before_model, after_model=after_model, on_model_error=on_model_error)
+        return agent
+
+    def stats(self):
+        """
+        Returns limit, in-flight calls, queue depth per priority and counters per model
+        """
+        stats = {}
+        for model, lane in self._lanes.items():
+            queued = {priority: 0 for priority in PRIORITY_RANKS}
+            ranks = {rank: priority for priority, rank in PRIORITY_RANKS.items()}
+            for rank, _, _, _, future in lane.waiting:
+                if not future.done():
+                    queued[ranks[rank]] += 1
+            counters = dict(lane.stats)
+            wait = counters.pop("total_wait_seconds")
+            stats[model] = {
+                "limit": lane.concurrency.value,
+                "in_flight": len(lane.leases),
+                "queue_depth": queued,
+                "mean_wait_ms": round(wait / counters["granted"] * 1000, 1) if counters["granted"] else 0.0,
+                **counters
+            }
+        return stats
@@ -0,0 +1,65 @@
+"""
+Structured output schemas for the generator agents
+Field names match what the Next.js app stores (see lib/document-processors),
+so responses can be saved without regex or JSON clean-up
+"""
+
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
+
+Priority = Literal["critical", "high", "medium", "low"]
+
+
+class TestCase(BaseModel):
+    title: str
+    description: str
+    type: Literal["functional", "integration", "performance", "security", "usability", "regression"]
+    priority: Priority
+    preconditions: str
+    steps: list[str]
+    expectedResult: str
+    testData: Optional[str] = None
+    requirementId: Optional[str] = None
+    compliance: list[str] = Field(default_factory=list, description="Standards covered, e.g. HIPAA")
+
+
+class TestCaseList(BaseModel):
+    testCases: list[TestCase]
+
+
+class Requirement(BaseModel):
+    id: str = Field(description="Identifier such as REQ-001")
+    title: str
+    description: str
+    category: Literal["functional", "non-functional", "technical", "business"]
+    priority: Priority
+    source: str = Field(description="Reference to the document section")
+    acceptanceCriteria: list[str]
+    compliance: list[str] = Field(default_factory=list)
+    userStory: Optional[str] = None
+    testScenarios: list[str] = Field(default_factory=list)
+    dependencies: list[str] = Field(default_factory=list)
+    risks: list[str] = Field(default_factory=list)
+
+
+class RequirementList(BaseModel):
+    requirements: list[Requirement]
+
+
+class SchemaField(BaseModel):
+    name: str
+    type: str = Field(description="Data type, e.g. string, date, CodeableConcept")
+    required: bool
+    description: str
+    constraints: Optional[str] = Field(default=None, description="Clinical ranges, patterns or value sets")
+    example: Optional[str] = None
+
+
+class DataSchema(BaseModel):
+    name: str
+    standard: Literal["json_schema", "fhir", "hl7v2", "sql", "other"]
+    description: str
+    fields: list[SchemaField]
+    validationRules: list[str] = Field(default_factory=list)
+    jsonSchema: Optional[str] = Field(default=None, description="Full JSON Schema document as a JSON string")
@@ -0,0 +1,173 @@
+"""
+Semantic cache tier for near-duplicate specialist requests
+Past requests are embedded into a small local vector index per agent; a new
+request close enough to a past one reuses its answer instead of calling the model
+"""
+
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+
+from .cache import instruction_hash, model_name
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or the to with "
+    "this that these those should must can will all any".split()
+)
+
+
+class HashingEmbedder:
+    """
+    Deterministic local embedder based on hashed words and character trigrams
+
+    Word order and common stopwords are ignored, so reworded requests such as
+    "patient login with MFA" and "MFA login for patients" land close together.
+    """
+
+    def __init__(self, dimensions=512):
+        self.dimensions = dimensions
+
+    def _features(self, text):
+        for word in _WORD.findall(text.lower()):
+            if word in _STOPWORDS:
+                continue
+            if len(word) > 3 and word.endswith("s"):
+                word = word[:-1]
+            yield word, 1.0
+            padded = f"#{word}#"
+            for i in range(len(padded) - 2):
+                yield padded[i:i + 3], 0.5
+
+    def __call__(self, text):
+        vector = [0.0] * self.dimensions
+        for feature, weight in self._features(text):
+            digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dimensions
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[index] += sign * weight
+        return vector
+
+
+class GenAIEmbedder:
+    """
+    Embedder backed by a Vertex AI / Gemini embedding model
+    """
+
+    def __init__(self, model="text-embedding-004", client=None):
+        from google import genai
+
+        self.model = model
+        self.client = client or genai.Client()
+
+    def __call__(self, text):
+        response = self.client.models.embed_content(model=self.model, contents=text)
+        return list(response.embeddings[0].values)
+
+
+def _normalize(vector):
+    norm = math.sqrt(sum(value * value for value in vector))
+    return [value / norm for value in vector] if norm else vector
+
+
+def _dot(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+
+class SemanticCache:
+    """
+    Per-agent vector index of past requests and their answers
+
+    Only agents with a similarity threshold take part: thresholds maps agent
+    names to a cosine similarity in [0, 1], and default_threshold applies to
+    every other agent when set. Each agent keeps at most
+    max_entries_per_agent entries, evicted least recently used ("lru") or
+    oldest first ("fifo"), and entries expire after ttl_seconds.
+    """
+
+    def __init__(self, embedder=None, thresholds=None, default_threshold=None,
+                 max_entries_per_agent=1000, eviction="lru", ttl_seconds=24 * 3600):
+        if eviction not in ("lru", "fifo"):
+            raise ValueError(f"Unknown eviction policy: {eviction}")
+
+        self.embedder = embedder or HashingEmbedder()
+        self.thresholds = thresholds or {}
+        self.default_threshold = default_threshold
+        self.max_entries_per_agent = max_entries_per_agent
+        self.eviction = eviction
+        self.ttl_seconds = ttl_seconds
+        self.saved_calls = {}
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def threshold_for(self, agent_name):
+        return self.thresholds.get(agent_name, self.default_threshold)
+
+    def _index_key(self, agent):
+        # Answers are only shared between calls to the same agent configuration
+        return (agent.name, model_name(agent), instruction_hash(agent))
+
+    def _text(self, args):
+        return str(args["request"]) if "request" in args else json.dumps(args, sort_keys=True)
+
+    def lookup(self, agent, args):
+        """
+        Returns the answer of the most similar past request, or None
+        """
+        threshold = self.threshold_for(agent.name)
+        if threshold is None:
+            return None
+
+        vector = _normalize(self.embedder(self._text(args)))
+        now = time.time()
+        with self._lock:
+            entries = self._indexes.get(self._index_key(agent), [])
+            entries[:] = [entry for entry in entries if entry["expires_at"] >= now]
+
+            best, best_score = None, threshold
+            for entry in entries:
+                score = _dot(vector, entry["vector"])
+                if score >= best_score:
+                    best, best_score = entry, score
+
+            if best is None:
+                return None
+            best["used_at"] = now
+            self.saved_calls[agent.name] = self.saved_calls.get(agent.name, 0) + 1
+            return best["value"]
+
+    def add(self, agent, args, value):
+        """
+        Stores the answer to a request
+        """
+        if self.threshold_for(agent.name) is None:
+            return
+
+        now = time.time()
+        entry = {
+            "vector": _normalize(self.embedder(self._text(args))),
+            "value": value,
+            "created_at": now,
+            "used_at": now,
+            "expires_at": now + self.ttl_seconds
+        }
+        with self._lock:
+            entries = self._indexes.setdefault(self._index_key(agent), [])
+            entries.append(entry)
+            if len(entries) > self.max_entries_per_agent:
+                order = "used_at" if self.eviction == "lru" else "created_at"
+                entries.remove(min(entries, key=lambda item: item[order]))
+
+    def stats(self):
+        """
+        Returns how many model calls the semantic tier saved, overall and per agent
+        """
+        return {
+            "saved_calls": sum(self.saved_calls.values()),
+            "agents": dict(sorted(self.saved_calls.items())),
+            "entries": sum(len(entries) for entries in self._indexes.values())
+        }
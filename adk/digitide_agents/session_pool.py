@@ -0,0 +1,282 @@
+"""
+Warm session pool for the deployed Digitide engine
+Sessions are created ahead of time per user or tenant, so a query does not
+wait on creating its session, and retired sessions are deleted in the
+background instead of on the query's critical path. A session only carries
+history when the caller asks for it with a conversation key
+"""
+
+import asyncio
+import contextlib
+import time
+import warnings
+
+
+def _session_id(session):
+    # Deployed engines return dicts, local AdkApps return Session objects
+    return session["id"] if isinstance(session, dict) else session.id
+
+
+class _PooledSession:
+
+    def __init__(self, session_id, conversation=None):
+        self.session_id = session_id
+        self.conversation = conversation
+        self.uses = 0
+        self.leased = False
+        self.idle_since = time.monotonic()
+
+
+class SessionPool:
+    """
+    Pool of sessions on an agent engine
+
+    app is anything with async_create_session, async_stream_query and
+    async_delete_session, e.g. agent_engines.get(RESOURCE_NAME) or a local
+    AdkApp. Each user has up to max_sessions_per_user sessions.
+
+    Queries without a conversation key each get a fresh session with no
+    history: it comes from the pre-created ones when available and is
+    deleted in the background after the query, with a fresh one created to
+    replace it. Queries with a conversation key share one session per
+    (user, key), so they see that conversation's earlier turns and nothing
+    else; such a session is retired after max_uses queries so its history
+    does not keep growing, or deleted after max_idle_seconds without use.
+    Unused fresh sessions expire after max_idle_seconds too.
+    """
+
+    def __init__(self, app, max_sessions_per_user=4, max_idle_seconds=600, max_uses=20):
+        self.app = app
+        self.max_sessions_per_user = max_sessions_per_user
+        self.max_idle_seconds = max_idle_seconds
+        self.max_uses = max_uses
+        self._fresh = {}
+        self._conversations = {}
+        self._leased = {}
+        self._available = {}
+        self._background = set()
+        self._reaper = None
+        self.stats = {"created": 0, "prewarmed": 0, "reused": 0, "deleted": 0, "delete_failures": 0, "waits": 0}
+
+    def _condition(self, user_id):
+        if user_id not in self._available:
+            self._available[user_id] = asyncio.Condition()
+        return self._available[user_id]
+
+    def _size(self, user_id):
+        return (
+            len(self._fresh.get(user_id, []))
+            + len(self._conversations.get(user_id, {}))
+            + self._leased.get(user_id, 0)
+        )
+
+    def _spawn(self, coroutine):
+        task = asyncio.create_task(coroutine)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _create(self, user_id, conversation=None):
+        session = await self.app.async_create_session(user_id=user_id)
+        self.stats["created"] += 1
+        return _PooledSession(_session_id(session), conversation)
+
+    async def _delete(self, user_id, pooled):
+        self.stats["deleted"] += 1
+        try:
+            await self.app.async_delete_session(user_id=user_id, session_id=pooled.session_id)
+        except Exception as e:
+            # The engine expires sessions on its own; a failed delete only leaks until then
+            self.stats["delete_failures"] += 1
+            warnings.warn(f"Failed to delete session {pooled.session_id}: {e}", RuntimeWarning)
+
+    def _evict_idle_conversation(self, user_id):
+        # Frees a slot by dropping the least recently used idle conversation session
+        conversations = self._conversations.get(user_id, {})
+        idle = [pooled for pooled in conversations.values() if not pooled.leased]
+        if not idle:
+            return False
+        pooled = min(idle, key=lambda pooled: pooled.idle_since)
+        del conversations[pooled.conversation]
+        self._spawn(self._delete(user_id, pooled))
+        return True
+
+    async def prewarm(self, user_id, count=1):
+        """
+        Creates fresh sessions for a user ahead of their queries
+        """
+        condition = self._condition(user_id)
+        async with condition:
+            count = min(count, self.max_sessions_per_user - self._size(user_id))
+            if count <= 0:
+                return
+            self._leased[user_id] = self._leased.get(user_id, 0) + count
+        results = await asyncio.gather(*(self._create(user_id) for _ in range(count)), return_exceptions=True)
+        created = [pooled for pooled in results if isinstance(pooled, _PooledSession)]
+        async with condition:
+            self._leased[user_id] -= count
+            self._fresh.setdefault(user_id, []).extend(created)
+            condition.notify_all()
+
+    async def lease(self, user_id, conversation=None):
+        """
+        Takes a session for a query, waiting if all of the user's are in use
+
+        Without a conversation key the session is fresh; with one it is the
+        conversation's session, created on its first query.
+        """
+        condition = self._condition(user_id)
+        async with condition:
+            while True:
+                conversations = self._conversations.setdefault(user_id, {})
+                if conversation is not None and conversation in conversations:
+                    pooled = conversations[conversation]
+                    if not pooled.leased:
+                        pooled.leased = True
+                        self.stats["reused"] += 1
+                        return pooled
+                else:
+                    fresh = self._fresh.get(user_id)
+                    if fresh:
+                        pooled = fresh.pop()
+                        pooled.conversation = conversation
+                        pooled.leased = True
+                        self.stats["prewarmed"] += 1
+                        if conversation is None:
+                            self._leased[user_id] = self._leased.get(user_id, 0) + 1
+                        else:
+                            conversations[conversation] = pooled
+                        return pooled
+                    if self._size(user_id) < self.max_sessions_per_user or self._evict_idle_conversation(user_id):
+                        # Reserve the slot before creating outside the lock; a
+                        # placeholder makes other queries of the conversation wait
+                        pooled = _PooledSession(None, conversation)
+                        pooled.leased = True
+                        if conversation is None:
+                            self._leased[user_id] = self._leased.get(user_id, 0) + 1
+                        else:
+                            conversations[conversation] = pooled
+                        break
+                self.stats["waits"] += 1
+                await condition.wait()
+
+        try:
+            pooled.session_id = (await self._create(user_id)).session_id
+        except Exception:
+            async with condition:
+                if conversation is None:
+                    self._leased[user_id] -= 1
+                else:
+                    del self._conversations[user_id][conversation]
+                condition.notify_all()
+            raise
+        return pooled
+
+    async def release(self, user_id, pooled, discard=False):
+        """
+        Returns a leased session to the pool
+
+        Fresh sessions and discarded or worn-out conversation sessions are
+        deleted in the background; a fresh session is created to replace
+        each retired one.
+        """
+        pooled.uses += 1
+        retire = discard or pooled.conversation is None or pooled.uses >= self.max_uses
+
+        condition = self._condition(user_id)
+        async with condition:
+            if pooled.conversation is None:
+                self._leased[user_id] -= 1
+            elif retire:
+                del self._conversations[user_id][pooled.conversation]
+            pooled.leased = False
+            pooled.idle_since = time.monotonic()
+            condition.notify_all()
+
+        if retire:
+            self._spawn(self._delete(user_id, pooled))
+            self._spawn(self.prewarm(user_id))
+
+    @contextlib.asynccontextmanager
+    async def session(self, user_id, conversation=None):
+        """
+        Leases a session for the duration of a block and yields its id
+        """
+        pooled = await self.lease(user_id, conversation)
+        failed = False
+        try:
+            yield pooled.session_id
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            # A session whose query failed midway may hold a broken turn
+            await self.release(user_id, pooled, discard=failed)
+
+    async def stream_query(self, user_id, message, conversation=None):
+        """
+        Streams the events of one query, in a fresh session unless a conversation key is given
+        """
+        async with self.session(user_id, conversation) as session_id:
+            async for event in self.app.async_stream_query(
+                user_id=user_id,
+                session_id=session_id,
+                message=message
+            ):
+                yield event
+
+    async def query(self, user_id, message, conversation=None):
+        """
+        Runs one query and returns all its events
+        """
+        return [event async for event in self.stream_query(user_id, message, conversation)]
+
+    async def reap_idle(self):
+        """
+        Deletes fresh and conversation sessions idle longer than max_idle_seconds
+        """
+        cutoff = time.monotonic() - self.max_idle_seconds
+        expired = []
+        for user_id in set(self._fresh) | set(self._conversations):
+            async with self._condition(user_id):
+                fresh = self._fresh.get(user_id, [])
+                expired.extend((user_id, pooled) for pooled in fresh if pooled.idle_since < cutoff)
+                fresh[:] = [pooled for pooled in fresh if pooled.idle_since >= cutoff]
+                conversations = self._conversations.get(user_id, {})
+                for key, pooled in list(conversations.items()):
+                    if not pooled.leased and pooled.idle_since < cutoff:
+                        expired.append((user_id, conversations.pop(key)))
+                self._condition(user_id).notify_all()
+        await asyncio.gather(*(self._delete(user_id, pooled) for user_id, pooled in expired))
+        return len(expired)
+
+    def start_reaper(self, interval_seconds=60):
+        """
+        Starts a background task that reaps idle sessions periodically
+        """
+        async def reap_forever():
+            while True:
+                await asyncio.sleep(interval_seconds)
+                await self.reap_idle()
+
+        if self._reaper is None:
+            self._reaper = asyncio.create_task(reap_forever())
+        return self._reaper
+
+    async def close(self):
+        """
+        Stops the reaper and deletes every idle session
+        """
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        await asyncio.gather(*self._background, return_exceptions=True)
+        idle = [(user_id, pooled) for user_id, sessions in self._fresh.items() for pooled in sessions]
+        idle.extend(
+            (user_id, pooled)
+            for user_id, conversations in self._conversations.items()
+            for pooled in conversations.values()
+            if not pooled.leased
+        )
+        self._fresh = {}
+        self._conversations = {}
+        await asyncio.gather(*(self._delete(user_id, pooled) for user_id, pooled in idle))
@@ -0,0 +1,482 @@
+"""
+Category-sharded deployment of the Digitide system
+Each category can run as its own engine holding only that category's
+specialists, with its own replica settings, so a hot category scales out
+without dragging the others along. ShardRouter is the thin front that picks a
+category for a message and forwards it to that category's engine; the engines
+it talks to are either deployed ones listed in the deployment manifest or
+local worker processes that reproduce the same topology for testing
+
+    python -m digitide_agents.sharding route "Generate test cases for patient login"
+    python -m digitide_agents.sharding local "Generate test cases for patient login" --categories test compliance
+"""
+
+import argparse
+import asyncio
+import datetime
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import threading
+
+from .registry import CATEGORY_TITLES, agent_specs, resolve_categories
+from .semantic_cache import HashingEmbedder, _dot, _normalize
+from .session_pool import SessionPool
+
+DEFAULT_MANIFEST_PATH = "metadata/deployment.json"
+
+# Replica settings every shard starts from; keys are agent_engines.create() arguments
+DEFAULT_SHARD_SETTINGS = {
+    "min_instances": 1,
+    "max_instances": 10,
+    "container_concurrency": 9,
+    "resource_limits": {"cpu": "4", "memory": "8Gi"}
+}
+
+# Per-category overrides for the categories that take most of the traffic
+SHARD_SETTINGS = {
+    "test": {"min_instances": 2, "max_instances": 40},
+    "requirement": {"max_instances": 20},
+    "compliance": {"max_instances": 20}
+}
+
+# Below this similarity to every category a message goes to the default category
+MIN_ROUTING_SIMILARITY = 0.05
+
+
+def shard_display_name(category):
+    return f"digitide-{category.replace('_', '-')}"
+
+
+def shard_settings(category, overrides=None):
+    """
+    Replica settings of a category's engine
+
+    overrides maps categories to settings that replace the defaults and
+    SHARD_SETTINGS key by key, e.g. {"test": {"max_instances": 80}}.
+    """
+    settings = dict(DEFAULT_SHARD_SETTINGS)
+    settings.update(SHARD_SETTINGS.get(category, {}))
+    settings.update((overrides or {}).get(category, {}))
+    return settings
+
+
+def create_shard_app(category, **app_options):
+    """
+    App of one shard, what its engine deploys; options go to create_digitide_app()
+    """
+    from .orchestrator import create_digitide_app
+
+    return create_digitide_app(categories=[category], **app_options)
+
+
+def write_manifest(shards, path=DEFAULT_MANIFEST_PATH, **deployment):
+    """
+    Writes the deployment manifest
+
+    shards maps categories to {"engine_id", "resource_name", "display_name",
+    "settings"}; deployment holds shared fields such as project and location.
+    """
+    manifest = {
+        **deployment,
+        "updated": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "shards": shards
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+    return manifest
+
+
+def load_manifest(path=DEFAULT_MANIFEST_PATH):
+    if not os.path.exists(path):
+        return {"shards": {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+class CategoryClassifier:
+    """
+    Picks the category of a message without calling a model
+
+    Every category is profiled by its title and its specialists' names and
+    summaries; a message goes to the category whose profile is most similar,
+    or to default_category when none reaches min_similarity.
+    """
+
+    def __init__(self, categories=None, embedder=None, default_category=None,
+                 min_similarity=MIN_ROUTING_SIMILARITY):
+        self.embedder = embedder or HashingEmbedder()
+        self.min_similarity = min_similarity
+        specs = agent_specs(categories)
+        self.categories = list(specs)
+        self.default_category = default_category or self.categories[0]
+        self.profiles = {
+            category: _normalize(self.embedder(" ".join(
+                [CATEGORY_TITLES[category]]
+                + [f"{spec.name.replace('_', ' ')} {spec.summary}" for spec in category_specs]
+            )))
+            for category, category_specs in specs.items()
+        }
+
+    def scores(self, message):
+        vector = _normalize(self.embedder(message))
+        return {category: _dot(vector, profile) for category, profile in self.profiles.items()}
+
+    def classify(self, message):
+        scores = self.scores(message)
+        category = max(scores, key=scores.get)
+        return category if scores[category] >= self.min_similarity else self.default_category
+
+
+class ShardRouter:
+    """
+    Front router dispatching queries to per-category engines
+
+    engines maps categories to anything with async_create_session,
+    async_stream_query and async_delete_session: deployed engines (see
+    from_manifest) or LocalShards (see local). Each engine gets its own
+    SessionPool built with pool_options. A query goes to the category given
+    by the caller, or else to the one the classifier picks.
+    """
+
+    def __init__(self, engines, classifier=None, **pool_options):
+        if not engines:
+            raise ValueError("ShardRouter needs at least one engine")
+        self.engines = dict(engines)
+        self.classifier = classifier or CategoryClassifier(list(self.engines))
+        self.pools = {category: SessionPool(engine, **pool_options) for category, engine in self.engines.items()}
+        self.stats = {category: 0 for category in self.engines}
+
+    @classmethod
+    def from_manifest(cls, path=DEFAULT_MANIFEST_PATH, categories=None, **options):
+        """
+        Router over the deployed engines recorded in a deployment manifest
+        """
+        from vertexai import agent_engines
+
+        shards = load_manifest(path)["shards"]
+        if categories is not None:
+            shards = {category: shards[category] for category in resolve_categories(categories)}
+        if not shards:
+            raise ValueError(f"No deployed shards recorded in {path}")
+        return cls({category: agent_engines.get(shard["resource_name"]) for category, shard in shards.items()},
+                   **options)
+
+    @classmethod
+    def local(cls, categories=None, settings=None, app_options=None, initializer=None, initargs=(), **options):
+        """
+        Router over local worker processes, one LocalShard per category
+
+        Each shard starts as many workers as its min_instances setting, so
+        the local topology matches what the deployment would run at rest.
+        app_options go to create_shard_app().
+        """
+        engines = {}
+        try:
+            for category in resolve_categories(categories):
+                engines[category] = LocalShard(
+                    category,
+                    replicas=shard_settings(category, settings)["min_instances"],
+                    app_options=app_options,
+                    initializer=initializer,
+                    initargs=initargs
+                )
+        except BaseException:
+            for shard in engines.values():
+                shard.close()
+            raise
+        return cls(engines, **options)
+
+    def route(self, message, category=None):
+        """
+        Returns the category a message is dispatched to
+        """
+        if category is not None:
+            if category not in self.engines:
+                raise ValueError(f"No engine for category: {category}")
+            return category
+        category = self.classifier.classify(message)
+        return category if category in self.engines else self.classifier.default_category
+
+    async def stream_query(self, user_id, message, category=None, conversation=None):
+        """
+        Streams the events of one query from the engine of its category
+
+        As with SessionPool, only queries with the same conversation key
+        (and category) share history.
+        """
+        category = self.route(message, category)
+        self.stats[category] += 1
+        async for event in self.pools[category].stream_query(user_id, message, conversation):
+            yield event
+
+    async def query(self, user_id, message, category=None, conversation=None):
+        """
+        Runs one query and returns its category and all its events
+        """
+        category = self.route(message, category)
+        return category, [event async for event in self.stream_query(user_id, message, category, conversation)]
+
+    async def close(self):
+        """
+        Deletes pooled sessions and stops local workers
+        """
+        await asyncio.gather(*(pool.close() for pool in self.pools.values()))
+        for engine in self.engines.values():
+            if isinstance(engine, LocalShard):
+                engine.close()
+
+
+def _serve_shard(category, app_options, initializer, initargs, connection):
+    # Entry point of a worker process
+    if initializer is not None:
+        initializer(*initargs)
+    asyncio.run(_ShardWorker(category, app_options, connection).serve())
+
+
+class _ShardWorker:
+    """
+    Runs one shard's system in a worker process and answers requests over a pipe
+
+    Requests are (request id, operation, arguments) tuples and are handled
+    concurrently; replies are (request id, kind, payload) tuples where kind
+    is "result", "event", "end" or "error".
+    """
+
+    def __init__(self, category, app_options, connection):
+        from google.adk.runners import InMemoryRunner
+
+        self.connection = connection
+        self.app_name = shard_display_name(category)
+        self.runner = InMemoryRunner(app=create_shard_app(category, **app_options), app_name=self.app_name)
+
+    async def serve(self):
+        loop = asyncio.get_running_loop()
+        tasks = set()
+        try:
+            while True:
+                try:
+                    request = await loop.run_in_executor(None, self.connection.recv)
+                except EOFError:
+                    break
+                if request is None:
+                    break
+                task = asyncio.create_task(self.handle(*request))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            await self.runner.close()
+
+    async def handle(self, request_id, operation, arguments):
+        from google.genai import types
+
+        sessions = self.runner.session_service
+        try:
+            if operation == "create_session":
+                session = await sessions.create_session(app_name=self.app_name, user_id=arguments["user_id"])
+                self.connection.send((request_id, "result", {"id": session.id, "user_id": session.user_id}))
+            elif operation == "delete_session":
+                await sessions.delete_session(app_name=self.app_name, **arguments)
+                self.connection.send((request_id, "result", None))
+            elif operation == "stream_query":
+                async for event in self.runner.run_async(
+                    user_id=arguments["user_id"],
+                    session_id=arguments["session_id"],
+                    new_message=types.Content(role="user", parts=[types.Part(text=arguments["message"])])
+                ):
+                    # Dicts, like the events of a deployed engine
+                    self.connection.send((request_id, "event", event.model_dump(mode="json", exclude_none=True)))
+                self.connection.send((request_id, "end", None))
+            else:
+                raise ValueError(f"Unknown operation: {operation}")
+        except Exception as e:
+            self.connection.send((request_id, "error", f"{type(e).__name__}: {e}"))
+
+
+class _WorkerClient:
+    """
+    Parent side of one worker process; replies are read on a background thread
+    """
+
+    def __init__(self, process, connection):
+        self.process = process
+        self.connection = connection
+        self.sessions = 0
+        self._ids = itertools.count()
+        self._send_lock = threading.Lock()
+        self._pending = {}
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+    def _read(self):
+        while True:
+            try:
+                request_id, kind, payload = self.connection.recv()
+            except (EOFError, OSError):
+                break
+            waiter = self._pending.get(request_id)
+            if waiter is not None:
+                loop, queue = waiter
+                loop.call_soon_threadsafe(queue.put_nowait, (kind, payload))
+        for loop, queue in list(self._pending.values()):
+            loop.call_soon_threadsafe(queue.put_nowait, ("error", "Shard worker exited"))
+
+    async def request(self, operation, **arguments):
+        """
+        Sends a request and yields its (kind, payload) replies up to the last one
+        """
+        request_id = next(self._ids)
+        queue = asyncio.Queue()
+        self._pending[request_id] = (asyncio.get_running_loop(), queue)
+        try:
+            with self._send_lock:
+                self.connection.send((request_id, operation, arguments))
+            while True:
+                kind, payload = await queue.get()
+                if kind == "error":
+                    raise RuntimeError(payload)
+                yield kind, payload
+                if kind != "event":
+                    return
+        finally:
+            del self._pending[request_id]
+
+    def stop(self, timeout=5):
+        try:
+            with self._send_lock:
+                self.connection.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.connection.close()
+
+
+class LocalShard:
+    """
+    Engine-like front of one category served by local worker processes
+
+    Stands in for a deployed shard: it has the same async_create_session,
+    async_stream_query and async_delete_session methods, so SessionPool and
+    ShardRouter use it unchanged. Every replica is its own process; a new
+    session goes to the replica holding the fewest sessions and stays there,
+    as sessions live in the replica's memory. Workers run the same App as
+    the deployed shard, built with app_options. initializer(*initargs) runs
+    first in every worker, e.g. to configure models.
+    """
+
+    def __init__(self, category, replicas=1, app_options=None, initializer=None, initargs=()):
+        context = multiprocessing.get_context("spawn")
+        self.category = category
+        self._workers = []
+        self._session_workers = {}
+        try:
+            for replica in range(max(1, replicas)):
+                parent, child = context.Pipe()
+                process = context.Process(
+                    target=_serve_shard,
+                    args=(category, app_options or {}, initializer, initargs, child),
+                    name=f"{shard_display_name(category)}-{replica}",
+                    daemon=True
+                )
+                process.start()
+                child.close()
+                self._workers.append(_WorkerClient(process, parent))
+        except BaseException:
+            self.close()
+            raise
+
+    @property
+    def replicas(self):
+        return len(self._workers)
+
+    async def _call(self, worker, operation, **arguments):
+        result = None
+        async for _, payload in worker.request(operation, **arguments):
+            result = payload
+        return result
+
+    async def async_create_session(self, user_id):
+        worker = min(self._workers, key=lambda worker: worker.sessions)
+        worker.sessions += 1
+        try:
+            session = await self._call(worker, "create_session", user_id=user_id)
+        except BaseException:
+            worker.sessions -= 1
+            raise
+        self._session_workers[session["id"]] = worker
+        return session
+
+    async def async_delete_session(self, user_id, session_id):
+        worker = self._session_workers.pop(session_id, None)
+        if worker is None:
+            return
+        worker.sessions -= 1
+        await self._call(worker, "delete_session", user_id=user_id, session_id=session_id)
+
+    async def async_stream_query(self, user_id, session_id, message):
+        worker = self._session_workers.get(session_id)
+        if worker is None:
+            raise ValueError(f"Unknown session: {session_id}")
+        async for kind, payload in worker.request(
+            "stream_query", user_id=user_id, session_id=session_id, message=message
+        ):
+            if kind == "event":
+                yield payload
+
+    def close(self):
+        for worker in self._workers:
+            worker.stop()
+        self._workers = []
+        self._session_workers = {}
+
+
+def event_text(event):
+    """
+    Visible text of an event dict, skipping thought parts
+    """
+    parts = (event.get("content") or {}).get("parts") or []
+    return "".join(part.get("text") or "" for part in parts if not part.get("thought"))
+
+
+async def _run_local(args):
+    router = ShardRouter.local(args.categories)
+    try:
+        category, events = await router.query("digitide", args.message, args.category)
+        text = next((event_text(event) for event in reversed(events) if event_text(event)), "")
+        print(f"🧭 Routed to {category} ({router.engines[category].replicas} replicas)")
+        print(text)
+    finally:
+        await router.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m digitide_agents.sharding")
+    commands = parser.add_subparsers(dest="command", required=True)
+    route_parser = commands.add_parser("route", help="Show the category a message is dispatched to")
+    route_parser.add_argument("message")
+    local_parser = commands.add_parser("local", help="Run one query through local shard processes")
+    local_parser.add_argument("message")
+    local_parser.add_argument("--categories", nargs="+", help="Categories to start shards for (default: all)")
+    local_parser.add_argument("--category", help="Dispatch to this category instead of classifying")
+    args = parser.parse_args(argv)
+
+    if args.command == "route":
+        classifier = CategoryClassifier()
+        scores = classifier.scores(args.message)
+        print(f"🧭 {classifier.classify(args.message)}")
+        for category, score in sorted(scores.items(), key=lambda item: -item[1]):
+            print(f"   {score:.3f}  {category}")
+    else:
+        asyncio.run(_run_local(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
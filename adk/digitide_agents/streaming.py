@@ -0,0 +1,164 @@
+"""
+Streaming of sub-agent output through the orchestrator
+AgentTool only hands the orchestrator a sub-agent's finished result. While a
+stream_query() call is listening, StreamingAgentTool runs the sub-agent in
+streaming mode and forwards its text chunks as they arrive, tagged with the
+sub-agent's name, so the first tokens show up as soon as the first specialist
+starts answering
+"""
+
+import asyncio
+import contextvars
+import json
+
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.memory import InMemoryMemoryService
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.adk.tools._forwarding_artifact_service import ForwardingArtifactService
+from google.adk.tools.agent_tool import AgentTool
+from google.genai import types
+
+from .cache import CachedAgentTool
+from .runtime import final_text
+
+# Queue of the stream_query() call the current task belongs to, if any
+_listener = contextvars.ContextVar("digitide_sub_agent_listener", default=None)
+
+_DONE = object()
+
+
+class StreamingAgentTool(AgentTool):
+    """
+    AgentTool that forwards the sub-agent's partial text to a listening stream_query()
+
+    Without a listener it behaves exactly like AgentTool.
+    """
+
+    async def run_async(self, *, args, tool_context):
+        listener = _listener.get()
+        if listener is None:
+            return await super().run_async(args=args, tool_context=tool_context)
+
+        if self.skip_summarization:
+            tool_context.actions.skip_summarization = True
+
+        # Same nested run as AgentTool.run_async, except that it streams
+        invocation_context = tool_context._invocation_context
+        request = args["request"] if "request" in args else json.dumps(args, sort_keys=True)
+        app_name = invocation_context.app_name or self.agent.name
+        runner = Runner(
+            app_name=app_name,
+            agent=self.agent,
+            artifact_service=ForwardingArtifactService(tool_context),
+            session_service=InMemorySessionService(),
+            memory_service=InMemoryMemoryService(),
+            credential_service=invocation_context.credential_service,
+            plugins=invocation_context.plugin_manager.plugins if self.include_plugins else None
+        )
+        if self.include_plugins:
+            # The parent runner owns the plugins and closes them
+            runner.plugin_manager.set_skip_closing_plugins(True)
+
+        run_config = invocation_context.run_config or RunConfig()
+        run_config = run_config.model_copy(update={"streaming_mode": StreamingMode.SSE, "support_cfc": False})
+        abort_signal = invocation_context._abort_signal
+        if not isinstance(abort_signal, asyncio.Event):
+            abort_signal = None
+
+        result = ""
+        error_message = None
+        try:
+            session = await runner.session_service.create_session(
+                app_name=app_name,
+                user_id=invocation_context.user_id,
+                state={
+                    key: value
+                    for key, value in tool_context.state.to_dict().items()
+                    if not key.startswith("_adk")
+                }
+            )
+            async for event in runner.run_async(
+                user_id=session.user_id,
+                session_id=session.id,
+                new_message=types.Content(role="user", parts=[types.Part(text=request)]),
+                run_config=run_config,
+                abort_signal=abort_signal
+            ):
+                if event.actions.state_delta:
+                    tool_context.state.update(event.actions.state_delta)
+                if event.error_message:
+                    error_message = event.error_message
+
+                text = final_text(event)
+                if event.partial:
+                    if text:
+                        listener.put_nowait({"type": "partial", "agent": self.agent.name, "text": text})
+                elif text:
+                    result = text
+        finally:
+            await runner.close()
+            listener.put_nowait({"type": "agent_done", "agent": self.agent.name})
+
+        if not result:
+            # Like AgentTool, a failed sub-agent answers with its error message
+            return error_message or ""
+        if self.agent.output_schema:
+            return self.agent.output_schema.model_validate_json(result).model_dump(exclude_none=True)
+        return result
+
+
+class CachedStreamingAgentTool(CachedAgentTool, StreamingAgentTool):
+    """
+    Cached AgentTool that streams the sub-agent's output on cache misses
+    """
+
+
+async def _with_listener(events, wrap):
+    # Iterates events in a task that sees a listener and interleaves what the
+    # sub-agents stream into it with the wrapped events
+    queue = asyncio.Queue()
+
+    async def pump():
+        try:
+            async for event in events:
+                queue.put_nowait(wrap(event))
+        finally:
+            queue.put_nowait(_DONE)
+
+    # The task copies the current context, so tools called from it see the listener
+    token = _listener.set(queue)
+    try:
+        task = asyncio.create_task(pump())
+    finally:
+        _listener.reset(token)
+
+    try:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                break
+            yield item
+        # Surface errors raised by the run
+        await task
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+async def stream_query(runner, user_id, session_id, message):
+    """
+    Runs a query on the orchestrator and yields events as they happen
+
+    Yields dicts of three kinds:
+    - {"type": "partial", "agent": name, "text": chunk} for sub-agent text
+    - {"type": "agent_done", "agent": name} when a sub-agent finishes
+    - {"type": "event", "event": Event} for the orchestrator's own events
+    """
+    events = runner.run_async(
+        user_id=user_id,
+        session_id=session_id,
+        new_message=types.Content(role="user", parts=[types.Part(text=message)])
+    )
+    async for item in _with_listener(events, lambda event: {"type": "event", "event": event}):
+        yield item
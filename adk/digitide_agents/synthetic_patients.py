@@ -0,0 +1,496 @@
+"""
+Local synthetic patient data engine for the synthetic_data_generator agent
+Patients are sampled column by column in seeded batches: demographics first,
+then age- and condition-dependent vitals, labs, conditions and medications
+that all reference the same patient and encounter ids. Batches are written as
+they are generated, as FHIR bundles (NDJSON), HL7 v2, CSV or Parquet, so a
+100k-patient dataset never sits in memory at once
+
+    python -m digitide_agents.synthetic_patients 100000 out/patients.ndjson --format fhir --seed 7
+"""
+
+import argparse
+import csv
+import datetime
+import json
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+FORMATS = ("fhir", "hl7", "csv", "parquet")
+
+DEFAULT_BATCH_SIZE = 1000
+
+GIVEN_NAMES = {
+    "female": ["Emma", "Olivia", "Ava", "Sophia", "Mia", "Amelia", "Harper", "Evelyn", "Abigail", "Ella",
+               "Grace", "Chloe", "Priya", "Mei", "Fatima", "Lucia", "Aaliyah", "Hannah", "Zoe", "Nora"],
+    "male": ["Liam", "Noah", "Oliver", "Elijah", "James", "William", "Benjamin", "Lucas", "Henry", "Mateo",
+             "Ethan", "Daniel", "Arjun", "Wei", "Omar", "Diego", "Malik", "Samuel", "Leo", "Isaac"]
+}
+
+FAMILY_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+    "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin",
+    "Lee", "Perez", "Thompson", "White", "Harris", "Sanchez", "Clark", "Patel", "Nguyen", "Kim"
+]
+
+# City, state and ZIP prefix
+CITIES = [
+    ("Springfield", "IL", "627"), ("Columbus", "OH", "432"), ("Austin", "TX", "787"), ("Denver", "CO", "802"),
+    ("Portland", "OR", "972"), ("Madison", "WI", "537"), ("Raleigh", "NC", "276"), ("Tucson", "AZ", "857"),
+    ("Albany", "NY", "122"), ("Boise", "ID", "837")
+]
+
+STREETS = ["Main St", "Oak Ave", "Maple Dr", "Cedar Ln", "Elm St", "Park Ave", "Pine Rd", "Lake Dr"]
+
+# Conditions: ICD-10, SNOMED CT, display and prevalence as a function of age
+CONDITIONS = {
+    "hypertension": ("I10", "38341003", "Essential hypertension",
+                     lambda age: 0.0 if age < 18 else min(0.7, 0.1 + 0.006 * (age - 18))),
+    "type2_diabetes": ("E11.9", "44054006", "Type 2 diabetes mellitus",
+                       lambda age: 0.0 if age < 18 else min(0.3, 0.02 + 0.0025 * (age - 18))),
+    "hyperlipidemia": ("E78.5", "55822004", "Hyperlipidemia",
+                       lambda age: 0.0 if age < 18 else min(0.5, 0.05 + 0.005 * (age - 18))),
+    "asthma": ("J45.909", "195967001", "Asthma", lambda age: 0.08),
+    "ckd": ("N18.3", "433144002", "Chronic kidney disease stage 3",
+            lambda age: 0.0 if age < 40 else min(0.2, 0.01 + 0.002 * (age - 40)))
+}
+
+# Medications (RxNorm) prescribed for each condition
+MEDICATIONS = {
+    "hypertension": ("314076", "lisinopril 10 MG Oral Tablet"),
+    "type2_diabetes": ("861007", "metformin hydrochloride 500 MG Oral Tablet"),
+    "hyperlipidemia": ("617312", "atorvastatin 20 MG Oral Tablet"),
+    "asthma": ("745679", "albuterol 0.09 MG/ACTUAT Metered Dose Inhaler")
+}
+
+# Observation LOINC codes, display and unit
+VITALS = {
+    "heart_rate": ("8867-4", "Heart rate", "/min"),
+    "systolic_bp": ("8480-6", "Systolic blood pressure", "mm[Hg]"),
+    "diastolic_bp": ("8462-4", "Diastolic blood pressure", "mm[Hg]"),
+    "temperature": ("8310-5", "Body temperature", "Cel"),
+    "respiratory_rate": ("9279-1", "Respiratory rate", "/min"),
+    "oxygen_saturation": ("59408-5", "Oxygen saturation by pulse oximetry", "%"),
+    "height": ("8302-2", "Body height", "cm"),
+    "weight": ("29463-7", "Body weight", "kg"),
+    "bmi": ("39156-5", "Body mass index", "kg/m2")
+}
+
+LABS = {
+    "hba1c": ("4548-4", "Hemoglobin A1c", "%"),
+    "glucose": ("2345-7", "Glucose", "mg/dL"),
+    "creatinine": ("2160-0", "Creatinine", "mg/dL"),
+    "ldl": ("13457-7", "LDL cholesterol (calculated)", "mg/dL")
+}
+
+ENCOUNTER_CLASSES = (("AMB", "ambulatory", 0.8), ("EMER", "emergency", 0.12), ("IMP", "inpatient encounter", 0.08))
+
+
+_UUID_MASK = ~(0xF000 << 64 | 0xC000 << 48) & (1 << 128) - 1
+_UUID_VERSION = 0x4000 << 64 | 0x8000 << 48
+
+
+def _clip(value, low, high, digits=0):
+    value = min(high, max(low, value))
+    return round(value, digits) if digits else int(round(value))
+
+
+class PatientScenario:
+    """
+    Parameters of a synthetic dataset
+
+    Ages are uniform in [min_age, max_age], encounters per patient uniform in
+    encounters, dated between start_date and end_date. prevalence overrides
+    the age-based rate of any condition in CONDITIONS with a flat rate.
+    """
+
+    def __init__(self, count=1000, seed=0, min_age=0, max_age=90, female_ratio=0.5, encounters=(1, 3),
+                 prevalence=None, start_date="2024-01-01", end_date="2024-12-31", batch_size=DEFAULT_BATCH_SIZE):
+        unknown = set(prevalence or {}) - set(CONDITIONS)
+        if unknown:
+            raise ValueError(f"Unknown conditions: {', '.join(sorted(unknown))}")
+        if not 0 <= min_age <= max_age <= 110:
+            raise ValueError("Ages must satisfy 0 <= min_age <= max_age <= 110")
+        if not 0 <= female_ratio <= 1:
+            raise ValueError("female_ratio must be between 0 and 1")
+        self.count = count
+        self.seed = seed
+        self.min_age = min_age
+        self.max_age = max_age
+        self.female_ratio = female_ratio
+        self.encounters = encounters
+        self.prevalence = prevalence or {}
+        self.start_date = datetime.date.fromisoformat(start_date)
+        self.end_date = datetime.date.fromisoformat(end_date)
+        if self.end_date < self.start_date:
+            raise ValueError("end_date must not be earlier than start_date")
+        self.batch_size = batch_size
+
+
+def _uuid(rng):
+    # Version 4 UUID from the seeded generator; formatted by hand, uuid.UUID is slow in bulk
+    value = f"{rng.getrandbits(128) & _UUID_MASK | _UUID_VERSION:032x}"
+    return f"{value[:8]}-{value[8:12]}-{value[12:16]}-{value[16:20]}-{value[20:]}"
+
+
+def generate_batch(scenario, batch_index):
+    """
+    Generates one batch as {table: [row, ...]}
+
+    Each batch has its own seeded generator, so a batch can be regenerated
+    or produced by another worker without generating the ones before it.
+    """
+    rng = random.Random(f"{scenario.seed}:{batch_index}")
+    first = batch_index * scenario.batch_size
+    n = min(scenario.batch_size, scenario.count - first)
+    span_days = (scenario.end_date - scenario.start_date).days
+
+    # Demographic columns, sampled for the whole batch at once
+    ids = [_uuid(rng) for _ in range(n)]
+    genders = ["female" if u < scenario.female_ratio else "male" for u in (rng.random() for _ in range(n))]
+    ages = [rng.randint(scenario.min_age, scenario.max_age) for _ in range(n)]
+    birth_offsets = [rng.randrange(365) for _ in range(n)]
+    cities = rng.choices(CITIES, k=n)
+    house_numbers = [rng.randint(1, 9999) for _ in range(n)]
+    streets = rng.choices(STREETS, k=n)
+    family = rng.choices(FAMILY_NAMES, k=n)
+
+    tables = {"patients": [], "encounters": [], "conditions": [], "medications": [], "observations": []}
+    for i in range(n):
+        age = ages[i]
+        gender = genders[i]
+        birth_date = scenario.start_date - datetime.timedelta(days=365 * age + birth_offsets[i])
+        city, state, zip_prefix = cities[i]
+        patient_id = ids[i]
+        tables["patients"].append({
+            "id": patient_id,
+            "mrn": f"MRN{first + i + 1:08d}",
+            "given": rng.choice(GIVEN_NAMES[gender]),
+            "family": family[i],
+            "gender": gender,
+            "birth_date": birth_date.isoformat(),
+            "address": f"{house_numbers[i]} {streets[i]}",
+            "city": city,
+            "state": state,
+            "postal_code": f"{zip_prefix}{rng.randint(0, 99):02d}",
+            "phone": f"555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}"
+        })
+
+        # Conditions depend on age, medications and labs on conditions
+        conditions = {
+            name
+            for name, (_, _, _, rate) in CONDITIONS.items()
+            if rng.random() < scenario.prevalence.get(name, rate(age))
+        }
+        onset = scenario.start_date - datetime.timedelta(days=rng.randint(30, 3650))
+        for name in sorted(conditions):
+            icd10, snomed, display, _ = CONDITIONS[name]
+            tables["conditions"].append({
+                "id": _uuid(rng), "patient_id": patient_id, "condition": name, "icd10": icd10,
+                "snomed": snomed, "display": display, "onset_date": max(onset, birth_date).isoformat()
+            })
+            if name in MEDICATIONS:
+                rxnorm, medication = MEDICATIONS[name]
+                tables["medications"].append({
+                    "id": _uuid(rng), "patient_id": patient_id, "rxnorm": rxnorm, "medication": medication,
+                    "reason": name, "status": "active", "authored_on": max(onset, birth_date).isoformat()
+                })
+
+        male = gender == "male"
+        if age >= 18:
+            height = rng.gauss(176 if male else 163, 7 if male else 6.5)
+            bmi = rng.gauss(27 if "type2_diabetes" in conditions else 26, 4.5)
+        else:
+            height = min(50 + 6.5 * age + rng.gauss(0, 4), 185)
+            bmi = rng.gauss(16 + 0.2 * age, 2)
+
+        encounter_count = rng.randint(*scenario.encounters)
+        for _ in range(encounter_count):
+            encounter_id = _uuid(rng)
+            when = scenario.start_date + datetime.timedelta(days=rng.randint(0, span_days))
+            code, display, _ = rng.choices(ENCOUNTER_CLASSES, weights=[w for _, _, w in ENCOUNTER_CLASSES])[0]
+            tables["encounters"].append({
+                "id": encounter_id, "patient_id": patient_id, "class": code, "class_display": display,
+                "date": when.isoformat()
+            })
+
+            hypertensive = "hypertension" in conditions
+            systolic = _clip(rng.gauss(112 + 0.4 * max(0, age - 18) + 14 * hypertensive, 11), 80, 210)
+            vitals = {
+                "heart_rate": _clip(rng.gauss(75 if age >= 12 else 110 - 3 * age, 10), 40, 180),
+                "systolic_bp": systolic,
+                "diastolic_bp": min(systolic - 20, _clip(rng.gauss(72 + 0.1 * max(0, age - 18) + 8 * hypertensive, 8), 40, 125)),
+                "temperature": _clip(rng.gauss(36.8, 0.35), 35.5, 40.0, 1),
+                "respiratory_rate": _clip(rng.gauss(16 if age >= 12 else 28 - age, 2), 10, 40),
+                "oxygen_saturation": _clip(rng.gauss(95.5 if "asthma" in conditions else 97.5, 1.3), 85, 100),
+                "height": _clip(height, 45, 210, 1),
+                "weight": _clip(bmi * (height / 100) ** 2, 2.5, 250, 1),
+                "bmi": _clip(bmi, 12, 60, 1)
+            }
+            labs = {}
+            if age >= 18:
+                diabetic = "type2_diabetes" in conditions
+                labs = {
+                    "hba1c": _clip(rng.gauss(7.6 if diabetic else 5.3, 1.1 if diabetic else 0.3), 4.0, 14.0, 1),
+                    "glucose": _clip(rng.gauss(155 if diabetic else 92, 35 if diabetic else 10), 60, 450),
+                    "creatinine": _clip(rng.gauss(2.1 if "ckd" in conditions else 0.8 + 0.15 * male, 0.2), 0.3, 8.0, 2),
+                    "ldl": _clip(rng.gauss(160 if "hyperlipidemia" in conditions else 105, 25), 40, 300)
+                }
+            for category, codes, values in (("vital-signs", VITALS, vitals), ("laboratory", LABS, labs)):
+                for name, value in values.items():
+                    loinc, display, unit = codes[name]
+                    tables["observations"].append({
+                        "id": _uuid(rng), "patient_id": patient_id, "encounter_id": encounter_id,
+                        "category": category, "loinc": loinc, "display": display, "value": value,
+                        "unit": unit, "effective_date": when.isoformat()
+                    })
+    return tables
+
+
+def generate_batches(scenario, workers=1):
+    """
+    Yields the batches of a scenario in order
+
+    With workers > 1 batches are generated in that many processes, at most
+    two per worker ahead of the one being written.
+    """
+    batch_count = (scenario.count + scenario.batch_size - 1) // scenario.batch_size
+    if workers <= 1 or batch_count <= 1:
+        for batch_index in range(batch_count):
+            yield generate_batch(scenario, batch_index)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = []
+        for batch_index in range(batch_count):
+            pending.append(executor.submit(generate_batch, scenario, batch_index))
+            if len(pending) >= 2 * workers:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+# Writers
+
+def _grouped(tables, key="patient_id"):
+    rows = {}
+    for table in ("encounters", "conditions", "medications", "observations"):
+        for row in tables[table]:
+            rows.setdefault(row[key], {}).setdefault(table, []).append(row)
+    return rows
+
+
+def fhir_bundle(patient, related):
+    """
+    Builds a FHIR R4 collection Bundle for one patient and their records
+    """
+    reference = {"reference": f"urn:uuid:{patient['id']}"}
+    synthetic = {"tag": [{"system": "http://terminology.hl7.org/CodeSystem/v3-ActReason", "code": "HTEST",
+                          "display": "test health data"}]}
+    resources = [{
+        "resourceType": "Patient",
+        "id": patient["id"],
+        "meta": synthetic,
+        "identifier": [{"system": "urn:digitide:mrn", "value": patient["mrn"]}],
+        "name": [{"family": patient["family"], "given": [patient["given"]]}],
+        "gender": patient["gender"],
+        "birthDate": patient["birth_date"],
+        "telecom": [{"system": "phone", "value": patient["phone"]}],
+        "address": [{"line": [patient["address"]], "city": patient["city"], "state": patient["state"],
+                     "postalCode": patient["postal_code"]}]
+    }]
+    for encounter in related.get("encounters", []):
+        resources.append({
+            "resourceType": "Encounter", "id": encounter["id"], "meta": synthetic, "status": "finished",
+            "class": {"system": "http://terminology.hl7.org/CodeSystem/v3-ActCode", "code": encounter["class"],
+                      "display": encounter["class_display"]},
+            "subject": reference, "period": {"start": encounter["date"], "end": encounter["date"]}
+        })
+    for condition in related.get("conditions", []):
+        resources.append({
+            "resourceType": "Condition", "id": condition["id"], "meta": synthetic, "subject": reference,
+            "code": {"coding": [
+                {"system": "http://hl7.org/fhir/sid/icd-10-cm", "code": condition["icd10"], "display": condition["display"]},
+                {"system": "http://snomed.info/sct", "code": condition["snomed"], "display": condition["display"]}
+            ]},
+            "onsetDateTime": condition["onset_date"]
+        })
+    for medication in related.get("medications", []):
+        resources.append({
+            "resourceType": "MedicationRequest", "id": medication["id"], "meta": synthetic,
+            "status": medication["status"], "intent": "order", "subject": reference,
+            "medicationCodeableConcept": {"coding": [{"system": "http://www.nlm.nih.gov/research/umls/rxnorm",
+                                                      "code": medication["rxnorm"], "display": medication["medication"]}]},
+            "authoredOn": medication["authored_on"]
+        })
+    for observation in related.get("observations", []):
+        resources.append({
+            "resourceType": "Observation", "id": observation["id"], "meta": synthetic, "status": "final",
+            "category": [{"coding": [{"system": "http://terminology.hl7.org/CodeSystem/observation-category",
+                                      "code": observation["category"]}]}],
+            "code": {"coding": [{"system": "http://loinc.org", "code": observation["loinc"],
+                                 "display": observation["display"]}]},
+            "subject": reference, "encounter": {"reference": f"urn:uuid:{observation['encounter_id']}"},
+            "effectiveDateTime": observation["effective_date"],
+            "valueQuantity": {"value": observation["value"], "unit": observation["unit"],
+                              "system": "http://unitsofmeasure.org", "code": observation["unit"]}
+        })
+    return {
+        "resourceType": "Bundle",
+        "type": "collection",
+        "entry": [{"fullUrl": f"urn:uuid:{resource['id']}", "resource": resource} for resource in resources]
+    }
+
+
+def hl7_messages(patient, related):
+    """
+    Builds an ADT^A04 registration and one ORU^R01 per encounter for a patient
+    """
+    def msh(message_type, control_id, when):
+        return f"MSH|^~\\&|DIGITIDE|SYNTHETIC|TEST|TEST|{when}||{message_type}|{control_id}|T|2.5.1"
+
+    birth = patient["birth_date"].replace("-", "")
+    sex = "F" if patient["gender"] == "female" else "M"
+    pid = (
+        f"PID|1||{patient['mrn']}^^^DIGITIDE^MR||{patient['family']}^{patient['given']}||{birth}|{sex}|||"
+        f"{patient['address']}^^{patient['city']}^{patient['state']}^{patient['postal_code']}||{patient['phone']}"
+    )
+    messages = ["\r".join([
+        msh("ADT^A04^ADT_A01", f"{patient['mrn']}-A04", "20240101000000"),
+        "EVN|A04|20240101000000",
+        pid,
+        "PV1|1|O"
+    ])]
+    observations = {}
+    for observation in related.get("observations", []):
+        observations.setdefault(observation["encounter_id"], []).append(observation)
+    for index, encounter in enumerate(related.get("encounters", []), start=1):
+        when = encounter["date"].replace("-", "") + "090000"
+        segments = [
+            msh("ORU^R01^ORU_R01", f"{patient['mrn']}-{index}", when),
+            pid,
+            f"OBR|1|{encounter['id']}||vitals^Encounter observations|||{when}"
+        ]
+        for number, observation in enumerate(observations.get(encounter["id"], []), start=1):
+            segments.append(
+                f"OBX|{number}|NM|{observation['loinc']}^{observation['display']}^LN||{observation['value']}|"
+                f"{observation['unit']}|||||F|||{when}"
+            )
+        messages.append("\r".join(segments))
+    return messages
+
+
+def _write_fhir(batches, path):
+    with open(path, "w") as f:
+        for tables in batches:
+            related = _grouped(tables)
+            for patient in tables["patients"]:
+                f.write(json.dumps(fhir_bundle(patient, related.get(patient["id"], {}))) + "\n")
+    return [path]
+
+
+def _write_hl7(batches, path):
+    with open(path, "w", newline="") as f:
+        for tables in batches:
+            related = _grouped(tables)
+            for patient in tables["patients"]:
+                for message in hl7_messages(patient, related.get(patient["id"], {})):
+                    f.write(message + "\r\n")
+    return [path]
+
+
+def _write_csv(batches, directory):
+    os.makedirs(directory, exist_ok=True)
+    files = {}
+    writers = {}
+    try:
+        for tables in batches:
+            for table, rows in tables.items():
+                if not rows:
+                    continue
+                if table not in writers:
+                    files[table] = open(os.path.join(directory, f"{table}.csv"), "w", newline="")
+                    writers[table] = csv.DictWriter(files[table], fieldnames=list(rows[0]))
+                    writers[table].writeheader()
+                writers[table].writerows(rows)
+    finally:
+        for f in files.values():
+            f.close()
+    return [f.name for f in files.values()]
+
+
+def _write_parquet(batches, directory):
+    import pyarrow
+    import pyarrow.parquet
+
+    os.makedirs(directory, exist_ok=True)
+    writers = {}
+    try:
+        for tables in batches:
+            for table, rows in tables.items():
+                if not rows:
+                    continue
+                batch = pyarrow.Table.from_pylist(rows)
+                if table not in writers:
+                    writers[table] = pyarrow.parquet.ParquetWriter(
+                        os.path.join(directory, f"{table}.parquet"), batch.schema
+                    )
+                writers[table].write_table(batch.cast(writers[table].schema))
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return [os.path.join(directory, f"{table}.parquet") for table in writers]
+
+
+WRITERS = {"fhir": _write_fhir, "hl7": _write_hl7, "csv": _write_csv, "parquet": _write_parquet}
+
+
+def generate_dataset(scenario, output_format, output_path, workers=1):
+    """
+    Generates a scenario batch by batch into output_path and returns row counts
+
+    fhir writes one Bundle per line (NDJSON) and hl7 one message per line
+    to the file output_path; csv and parquet write one file per table into
+    the directory output_path. Parquet needs pyarrow. The output is the
+    same for any number of workers.
+    """
+    if output_format not in WRITERS:
+        raise ValueError(f"Unknown format: {output_format}. Available: {', '.join(FORMATS)}")
+
+    counts = {}
+
+    def counted(batches):
+        for tables in batches:
+            for table, rows in tables.items():
+                counts[table] = counts.get(table, 0) + len(rows)
+            yield tables
+
+    directory = output_path if output_format in ("csv", "parquet") else os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    files = WRITERS[output_format](counted(generate_batches(scenario, workers)), output_path)
+    return {"format": output_format, "files": files, "rows": counts}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m digitide_agents.synthetic_patients")
+    parser.add_argument("count", type=int, help="Number of patients")
+    parser.add_argument("output", help="Output file (fhir, hl7) or directory (csv, parquet)")
+    parser.add_argument("--format", choices=FORMATS, default="fhir")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-age", type=int, default=0)
+    parser.add_argument("--max-age", type=int, default=90)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    scenario = PatientScenario(args.count, args.seed, args.min_age, args.max_age)
+    summary = generate_dataset(scenario, args.format, args.output, workers=args.workers)
+    for table, rows in summary["rows"].items():
+        print(f"📊 {table}: {rows}")
+    print(f"✅ Wrote {', '.join(summary['files'])}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
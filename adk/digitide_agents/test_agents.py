@@ -3,12 +3,14 @@ Test Case Generation Agents (5 agents)
 Each agent is an AI that handles specific testing tasks
 """
 
-from google import adk
+from .registry import AgentSpec, module_agent
 
 # Agent 1: Test Case Generator
-test_case_generator = adk.Agent(
+test_case_generator_spec = AgentSpec(
     name="test_case_generator",
-    model="gemini-2.5-pro",
+    category="test",
+    summary="Generate comprehensive test cases",
+    output_schema="TestCaseList",
     instruction="""You are a test case generation specialist for healthcare applications.
 
     Your responsibilities:
@@ -21,20 +23,23 @@ test_case_generator = adk.Agent(
     - Assign appropriate priority levels
 
     When given a requirement, create detailed test cases with:
-    - Unique test case ID
-    - Clear description
+    - Clear title and description
+    - Test type (functional/integration/performance/security/usability/regression)
     - Preconditions
     - Step-by-step test procedure
-    - Expected results
+    - Expected result
     - Test data needed
-    - Priority (Critical/High/Medium/Low)
+    - Priority (critical/high/medium/low)
+    - Compliance standards covered
     """
 )
 
 # Agent 2: Negative Test Generator
-negative_test_generator = adk.Agent(
+negative_test_generator_spec = AgentSpec(
     name="negative_test_generator",
-    model="gemini-2.5-pro",
+    category="test",
+    summary="Create edge cases and failure scenarios",
+    output_schema="TestCaseList",
     instruction="""You are a specialist in creating negative test scenarios and edge cases.
 
     Your responsibilities:
@@ -57,9 +62,10 @@ negative_test_generator = adk.Agent(
 )
 
 # Agent 3: Test Optimizer
-test_optimizer = adk.Agent(
+test_optimizer_spec = AgentSpec(
     name="test_optimizer",
-    model="gemini-2.5-pro",
+    category="test",
+    summary="Optimize test coverage and reduce redundancy",
     instruction="""You are a test optimization specialist who improves test coverage and efficiency.
 
     Your responsibilities:
@@ -77,13 +83,20 @@ test_optimizer = adk.Agent(
     - Identify coverage gaps
     - Suggest optimizations
     - Provide coverage metrics
-    """
+
+    Use the find_duplicate_tests tool to find duplicates instead of comparing
+    tests yourself, with the project's name when it is known. Treat its
+    clusters as duplicates to consolidate, and only compare the borderline
+    pairs it returns to decide whether they overlap.
+    """,
+    tools=["find_duplicate_tests"]
 )
 
 # Agent 4: Test Update Validator
-test_update_validator = adk.Agent(
+test_update_validator_spec = AgentSpec(
     name="test_update_validator",
-    model="gemini-2.5-pro",
+    category="test",
+    summary="Validate test updates against compliance",
     instruction="""You are a compliance-focused test validation specialist.
 
     Your responsibilities:
@@ -105,9 +118,10 @@ test_update_validator = adk.Agent(
 )
 
 # Agent 5: Test Improvement Suggester
-test_improvement_suggester = adk.Agent(
+test_improvement_suggester_spec = AgentSpec(
     name="test_improvement_suggester",
-    model="gemini-2.5-pro",
+    category="test",
+    summary="Suggest test improvements",
     instruction="""You are a test improvement specialist who enhances test quality.
 
     Your responsibilities:
@@ -132,4 +146,17 @@ test_improvement_suggester = adk.Agent(
     - Recommended: Should be implemented soon
     - Optional: Nice to have enhancements
     """
-)
\ No newline at end of file
+)
+
+AGENT_SPECS = [
+    test_case_generator_spec,
+    negative_test_generator_spec,
+    test_optimizer_spec,
+    test_update_validator_spec,
+    test_improvement_suggester_spec
+]
+
+
+def __getattr__(name):
+    # Agents are built from their specs on first access
+    return module_agent(__name__, name)
@@ -0,0 +1,458 @@
+"""
+Local function tools for the specialist agents
+Deterministic work (search, parsing, generation, scanning) runs here in
+microseconds instead of in a model call; the agents only decide what to run
+and explain the results. AgentSpec.tools refers to these functions by name
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import os
+import re
+import struct
+import threading
+
+from .audit_log import DEFAULT_LOG_PATH, AuditLog
+from .duplicate_index import DEFAULT_INDEX_PATH as DEFAULT_DUPLICATE_INDEX_PATH, DuplicateIndex, read_test_cases
+from .knowledge_index import DEFAULT_INDEX_PATH, KnowledgeIndex
+from .medical_formats import (
+    MAX_REPORTED_ISSUES,
+    fhir_schema_validator,
+    read_dicom_header,
+    validate_fhir,
+    validate_hl7_stream
+)
+from .phi_scanner import scan_file, scan_stream
+from .synthetic_patients import CONDITIONS, FORMATS, PatientScenario, generate_batch, generate_dataset
+
+# Files read per validate_dicom_files call on a directory
+MAX_DICOM_FILES = 1000
+
+# Clusters and borderline pairs returned by find_duplicate_tests
+MAX_DUPLICATE_RESULTS = 100
+
+# Findings of each confidence returned by scan_for_phi
+MAX_PHI_FINDINGS = 100
+
+# Patients per generate_synthetic_patients call
+MAX_SYNTHETIC_PATIENTS = 1_000_000
+
+# Directory that file path arguments are resolved against and confined to
+DEFAULT_DATA_ROOT = "data"
+
+_knowledge_index = None
+_duplicate_indexes = {}
+_duplicate_indexes_guard = threading.Lock()
+_audit_log = None
+
+# Per output path, so concurrent calls for the same scenario do not interleave their writes
+_synthetic_locks = {}
+_synthetic_locks_guard = threading.Lock()
+
+
+def knowledge_index():
+    """
+    Returns the shared index, opened from DIGITIDE_KNOWLEDGE_INDEX on first use
+    """
+    global _knowledge_index
+    if _knowledge_index is None:
+        _knowledge_index = KnowledgeIndex(os.environ.get("DIGITIDE_KNOWLEDGE_INDEX", DEFAULT_INDEX_PATH))
+    return _knowledge_index
+
+
+def duplicate_index(project):
+    """
+    Returns a project's test case index, opened on first use
+
+    Each project has its own directory under DIGITIDE_DUPLICATE_INDEX, so
+    test cases are only compared within their project.
+    """
+    with _duplicate_indexes_guard:
+        if project not in _duplicate_indexes:
+            name = re.sub(r"[^A-Za-z0-9_-]+", "-", project).strip("-")[:40]
+            digest = hashlib.sha1(project.encode()).hexdigest()[:10]
+            root = os.environ.get("DIGITIDE_DUPLICATE_INDEX", DEFAULT_DUPLICATE_INDEX_PATH)
+            _duplicate_indexes[project] = DuplicateIndex(os.path.join(root, f"{name}-{digest}" if name else digest))
+        return _duplicate_indexes[project]
+
+
+def audit_log():
+    """
+    Returns the shared audit log, opened from DIGITIDE_AUDIT_LOG on first use
+
+    The default path is on the replica's own disk; deployed engines must set
+    DIGITIDE_AUDIT_LOG to persistent storage for the log to survive.
+    """
+    global _audit_log
+    if _audit_log is None:
+        _audit_log = AuditLog(os.environ.get("DIGITIDE_AUDIT_LOG", DEFAULT_LOG_PATH))
+    return _audit_log
+
+
+def data_root():
+    return os.path.realpath(os.environ.get("DIGITIDE_DATA_ROOT", DEFAULT_DATA_ROOT))
+
+
+def data_path(path):
+    """
+    Resolves a path argument inside DIGITIDE_DATA_ROOT
+
+    Relative paths are taken from the data root; paths that lead outside it,
+    through "..", absolute paths or symlinks, raise ValueError, so the
+    agents cannot read arbitrary files of the server.
+    """
+    root = data_root()
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, resolved]) != root:
+        raise ValueError(f"{path} is outside the data directory")
+    return resolved
+
+
+def _read_error(path, error):
+    # The error of a failed read, without the server's absolute path
+    return f"Could not read {path}: {getattr(error, 'strerror', None) or error}"
+
+
+def search_knowledge_base(query: str, kind: str = "", top_k: int = 5) -> dict:
+    """Searches past requirements, test cases and standards excerpts.
+
+    Args:
+      query: What to look for, in natural language or keywords.
+      kind: Optional document kind to restrict to, e.g. "requirement",
+        "test_case" or "standard". Empty searches every kind.
+      top_k: Number of results to return.
+
+    Returns:
+      A dict with "results", each with id, kind, score, text and metadata,
+      best match first.
+    """
+    results = knowledge_index().search(query, top_k=max(1, min(top_k, 20)), kind=kind or None)
+    return {"results": results, "indexed_documents": len(knowledge_index())}
+
+
+def _validate_hl7_file(path):
+    try:
+        with open(data_path(path), newline="") as f:
+            return validate_hl7_stream(f)
+    except (OSError, ValueError) as e:
+        return {"error": _read_error(path, e)}
+
+
+async def validate_hl7_messages(messages: str = "", path: str = "") -> dict:
+    """Parses and validates HL7 v2 messages without a model call.
+
+    Args:
+      messages: HL7 v2 message text, one or more messages, segments
+        separated by carriage returns or newlines.
+      path: Alternatively, a file of HL7 v2 messages in the data directory,
+        streamed from disk.
+
+    Returns:
+      A dict with message counts (messages, valid, invalid), message_types,
+      issue_counts per location and the first issues with message_index,
+      control_id, location and message.
+    """
+    if path:
+        # Files can be large; read them off the event loop serving other sessions
+        return await asyncio.to_thread(_validate_hl7_file, path)
+    return validate_hl7_stream(io.StringIO(messages))
+
+
+def _validate_fhir_resources(resource_json, path):
+    if path:
+        try:
+            with open(data_path(path)) as f:
+                text = f.read()
+        except (OSError, ValueError) as e:
+            return {"error": _read_error(path, e)}
+    else:
+        text = resource_json
+    try:
+        if path.endswith(".ndjson"):
+            resources = [json.loads(line) for line in text.splitlines() if line.strip()]
+        else:
+            resources = [json.loads(text)]
+    except json.JSONDecodeError as e:
+        return {"resources": 0, "valid": False, "issues": [{"severity": "error", "location": "$", "message": f"Invalid JSON: {e}"}]}
+
+    try:
+        validator = fhir_schema_validator()
+    except ImportError as e:
+        return {"error": f"Validation against the FHIR schema needs an optional package: {e}"}
+    except (OSError, ValueError) as e:
+        return {"error": f"Could not load the FHIR schema: {e}"}
+
+    issues = []
+    for number, resource in enumerate(resources, start=1):
+        for found in validate_fhir(resource, validator=validator):
+            issues.append({**found, "resource_index": number} if len(resources) > 1 else found)
+    return {
+        "resources": len(resources),
+        "valid": not any(found["severity"] == "error" for found in issues),
+        "issues": issues[:MAX_REPORTED_ISSUES],
+        "issue_count": len(issues)
+    }
+
+
+async def validate_fhir_resource(resource_json: str = "", path: str = "") -> dict:
+    """Validates FHIR JSON resources (Bundles included) without a model call.
+
+    Args:
+      resource_json: A FHIR resource or Bundle as JSON text.
+      path: Alternatively, a .json file with one resource or an .ndjson file
+        with one resource per line, in the data directory.
+
+    Returns:
+      A dict with the number of resources checked, whether all are valid,
+      and the issues found (severity, location, message).
+    """
+    if path:
+        # Files can be large; read and check them off the event loop serving other sessions
+        return await asyncio.to_thread(_validate_fhir_resources, resource_json, path)
+    return _validate_fhir_resources(resource_json, path)
+
+
+def _validate_dicom_files(path):
+    try:
+        resolved = data_path(path)
+    except ValueError as e:
+        return {"error": str(e)}
+    if os.path.isdir(resolved):
+        paths = sorted(
+            os.path.join(directory, name)
+            for directory, _, names in os.walk(resolved)
+            for name in names
+        )[:MAX_DICOM_FILES]
+    else:
+        paths = [resolved]
+
+    root = data_root()
+    files = []
+    for file_path in paths:
+        relative_path = os.path.relpath(file_path, root)
+        try:
+            header, issues = read_dicom_header(file_path)
+        except (OSError, ValueError, struct.error) as e:
+            header, issues = {}, [{"severity": "error", "location": "file", "message": _read_error(relative_path, e)}]
+        files.append({"path": relative_path, "header": header, "issues": issues})
+    return {
+        "files": len(files),
+        "invalid": sum(1 for file in files if any(found["severity"] == "error" for found in file["issues"])),
+        "results": files
+    }
+
+
+async def validate_dicom_files(path: str) -> dict:
+    """Reads and validates DICOM headers without loading pixel data.
+
+    Args:
+      path: A DICOM Part 10 file, or a directory whose files are checked,
+        in the data directory.
+
+    Returns:
+      A dict with the number of files checked and, per file, its path in
+      the data directory, header attributes (PatientID, Modality, UIDs,
+      Rows, Columns, ...) and issues.
+    """
+    return await asyncio.to_thread(_validate_dicom_files, path)
+
+
+def _write_synthetic_dataset(scenario, output_format, output_path):
+    # Runs in a worker thread; identical scenarios write the same path, one at a time
+    with _synthetic_locks_guard:
+        lock = _synthetic_locks.setdefault(output_path, threading.Lock())
+    with lock:
+        summary = generate_dataset(scenario, output_format, output_path)
+    # Batches are seeded independently, so the first one can be regenerated for a sample
+    summary["sample_patient"] = generate_batch(scenario, 0)["patients"][0]
+    return summary
+
+
+async def generate_synthetic_patients(count: int, output_format: str = "fhir", seed: int = 0, min_age: int = 0,
+                                      max_age: int = 90, female_ratio: float = 0.5, condition_rates: str = "",
+                                      start_date: str = "2024-01-01", end_date: str = "2024-12-31") -> dict:
+    """Generates a reproducible synthetic patient dataset on disk.
+
+    Patients come with encounters, vitals, labs, conditions and medications
+    that reference each other consistently. The same arguments always give
+    the same data, written to the same file.
+
+    Args:
+      count: Number of patients.
+      output_format: "fhir" (NDJSON of Bundles), "hl7" (ADT^A04 and ORU^R01
+        messages), "csv" or "parquet" (one file per table).
+      seed: Random seed; change it for a different dataset.
+      min_age: Youngest patient age in years.
+      max_age: Oldest patient age in years.
+      female_ratio: Share of female patients, between 0 and 1.
+      condition_rates: Optional flat prevalences replacing the age-based
+        ones, e.g. "type2_diabetes=0.4,asthma=0.1". Conditions are
+        hypertension, type2_diabetes, hyperlipidemia, asthma and ckd.
+      start_date: First encounter date, YYYY-MM-DD.
+      end_date: Last encounter date, YYYY-MM-DD.
+
+    Returns:
+      A dict with the files written, row counts per table and one sample
+      patient.
+    """
+    if not 0 < count <= MAX_SYNTHETIC_PATIENTS:
+        return {"error": f"count must be between 1 and {MAX_SYNTHETIC_PATIENTS}"}
+    if output_format not in FORMATS:
+        return {"error": f"Unknown format: {output_format}. Available: {', '.join(FORMATS)}"}
+    try:
+        prevalence = {}
+        for pair in filter(None, (part.strip() for part in condition_rates.split(","))):
+            name, _, rate = pair.partition("=")
+            prevalence[name.strip()] = float(rate)
+        scenario = PatientScenario(count, seed, min_age, max_age, female_ratio, prevalence=prevalence,
+                                   start_date=start_date, end_date=end_date)
+    except ValueError as e:
+        return {"error": str(e), "conditions": list(CONDITIONS)}
+
+    # The name covers every argument, so different scenarios never overwrite each other
+    arguments = [count, output_format, seed, min_age, max_age, female_ratio, sorted(prevalence.items()),
+                 start_date, end_date]
+    digest = hashlib.sha1(json.dumps(arguments).encode()).hexdigest()[:10]
+    directory = os.environ.get("DIGITIDE_SYNTHETIC_OUTPUT", "synthetic_data")
+    extension = {"fhir": ".ndjson", "hl7": ".hl7"}.get(output_format, "")
+    output_path = os.path.join(directory, f"patients_{count}_seed{seed}_{digest}{extension}")
+    try:
+        # Generation takes seconds per 10k patients; keep it off the event loop serving other sessions
+        return await asyncio.to_thread(_write_synthetic_dataset, scenario, output_format, output_path)
+    except ImportError as e:
+        return {"error": f"{output_format} output needs an optional package: {e}"}
+
+
+def _scan_file(path):
+    # One worker: a process pool forked inside the serving process is not fork-safe
+    try:
+        return scan_file(data_path(path), workers=1, max_findings=MAX_PHI_FINDINGS)
+    except (OSError, ValueError) as e:
+        return {"error": _read_error(path, e)}
+
+
+async def scan_for_phi(text: str = "", path: str = "") -> dict:
+    """Scans text or a file for PHI/PII locally, without a model call.
+
+    Finds SSNs, MRNs, phone numbers, emails, dates, street addresses and
+    person names. Found values are returned masked.
+
+    Args:
+      text: Text to scan.
+      path: Alternatively, a file in the data directory to scan, streamed
+        from disk in chunks.
+
+    Returns:
+      A dict with counts per type, total, findings (type, start and end
+      character offsets, masked value) that are certain, and ambiguous
+      findings with their surrounding context that need your judgement.
+    """
+    if path:
+        return await asyncio.to_thread(_scan_file, path)
+    return scan_stream(io.StringIO(text), max_findings=MAX_PHI_FINDINGS)
+
+
+def find_duplicate_tests(test_cases_json: str = "", path: str = "", project: str = "default",
+                         tool_context=None) -> dict:
+    """Finds duplicate and overlapping test cases without reading the suite.
+
+    The test cases are added to the project's test index and compared with
+    each other and with every test of the project added before. Adding the
+    same test cases again updates them instead of duplicating them.
+
+    Args:
+      test_cases_json: Test cases as a JSON list or {"testCases": [...]}.
+      path: Alternatively, a .json or .jsonl file of test cases in the data
+        directory.
+      project: Name of the project the test cases belong to.
+
+    Returns:
+      A dict with clusters of duplicate test ids and titles that can be
+      consolidated, and borderline pairs with their similarity that need
+      your judgement, plus the number of tests checked and indexed.
+    """
+    try:
+        if path:
+            test_cases = read_test_cases(data_path(path))
+        else:
+            data = json.loads(test_cases_json)
+            test_cases = data.get("testCases", []) if isinstance(data, dict) else data
+    except (OSError, ValueError) as e:
+        return {"error": _read_error(path, e) if path else f"Invalid JSON: {e}"}
+    if not isinstance(test_cases, list) or not all(isinstance(test_case, dict) for test_case in test_cases):
+        return {"error": "Test cases must be a JSON list of test case objects"}
+
+    # Projects of different users never share an index
+    index = duplicate_index(f"{tool_context.user_id}/{project}" if tool_context else project)
+    ids = [test_id for test_id in index.add_many(test_cases) if test_id is not None]
+    result = index.clusters(ids)
+    return {
+        "checked": len(ids),
+        "skipped_empty": len(test_cases) - len(ids),
+        "indexed": len(index),
+        "cluster_count": len(result["clusters"]),
+        "clusters": [
+            [{"id": test_id, "title": index.title(test_id)} for test_id in cluster]
+            for cluster in result["clusters"][:MAX_DUPLICATE_RESULTS]
+        ],
+        "borderline_count": len(result["borderline"]),
+        "borderline": [
+            {"first": {"id": first, "title": index.title(first)},
+             "second": {"id": second, "title": index.title(second)},
+             "similarity": similarity}
+            for first, second, similarity in result["borderline"][:MAX_DUPLICATE_RESULTS]
+        ]
+    }
+
+
+def append_audit_events(events_json: str) -> dict:
+    """Appends events to the tamper-evident audit log.
+
+    Args:
+      events_json: A JSON list of event objects, e.g. [{"actor": "...",
+        "action": "...", "resource": "...", "standard": "21 CFR Part 11"}].
+
+    Returns:
+      A dict with the index of the first appended event, the new log size
+      and the new Merkle root (hex SHA-256) to cite as the integrity hash.
+    """
+    try:
+        events = json.loads(events_json)
+    except json.JSONDecodeError as e:
+        return {"error": f"Invalid JSON: {e}"}
+    if isinstance(events, dict):
+        events = [events]
+    if not all(isinstance(event, dict) for event in events):
+        return {"error": "Events must be JSON objects"}
+    return audit_log().append_many(events)
+
+
+async def verify_audit_log() -> dict:
+    """Re-checks every audit log entry against its hash chain and Merkle root.
+
+    Returns:
+      A dict with valid (true if nothing was altered, removed or reordered),
+      size, root and the errors found.
+    """
+    # Verification re-reads the whole log
+    return await asyncio.to_thread(audit_log().verify)
+
+
+def prove_audit_entry(index: int, size: int = 0) -> dict:
+    """Returns an audit log entry with its Merkle inclusion proof.
+
+    Args:
+      index: Index of the entry, starting at 0.
+      size: Log size the proof is for; 0 for the current size.
+
+    Returns:
+      A dict with the entry, its leaf hash, the root and the proof hashes
+      (RFC 6962) that show the entry is part of the log.
+    """
+    log = audit_log()
+    try:
+        return {"entry": log.get(index), **log.inclusion_proof(index, size or None)}
+    except (IndexError, ValueError) as e:
+        return {"error": f"No such entry: {e}"}
@@ -0,0 +1,324 @@
+"""
+Per-request tracing for the Digitide agents
+Records a span for every agent run, model call (orchestrator turns included)
+and tool call, with model, token counts, latency and cache hits, and exports
+them as OpenTelemetry-style JSON lines or through the OpenTelemetry API
+
+    python -m digitide_agents.tracing summary traces.jsonl
+"""
+
+import argparse
+import contextvars
+import itertools
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+
+from .callbacks import add_callbacks
+
+# Span the current task is running under
+_current_span = contextvars.ContextVar("digitide_current_span", default=None)
+
+ORCHESTRATOR_NAME = "digitide_orchestrator"
+
+
+class Span:
+
+    def __init__(self, name, kind, agent, parent=None):
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent.span_id if parent else None
+        self.name = name
+        self.kind = kind
+        self.agent = agent
+        self.attributes = {}
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.token = None
+
+    @property
+    def latency_ms(self):
+        return (self.end_ns - self.start_ns) / 1e6 if self.end_ns else None
+
+    def to_dict(self):
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_span_id,
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "attributes": {
+                "digitide.kind": self.kind,
+                "digitide.agent": self.agent,
+                "digitide.latency_ms": self.latency_ms,
+                **self.attributes
+            }
+        }
+
+
+def annotate(**attributes):
+    """
+    Adds attributes to the span the caller runs under, if it is traced
+    """
+    span = _current_span.get()
+    if span is not None:
+        span.attributes.update({f"digitide.{key}": value for key, value in attributes.items()})
+
+
+class JsonlSpanExporter:
+    """
+    Appends finished spans to a JSON lines file, one OTLP-style span per line
+    """
+
+    def __init__(self, path="traces/spans.jsonl"):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def on_start(self, span):
+        pass
+
+    def on_end(self, span):
+        line = json.dumps(span.to_dict())
+        with self._lock, open(self.path, "a") as f:
+            f.write(line + "\n")
+
+
+class OpenTelemetryExporter:
+    """
+    Mirrors spans into the OpenTelemetry API, for any configured OTel exporter
+    """
+
+    def __init__(self, tracer_name="digitide_agents"):
+        from opentelemetry import trace
+
+        self._trace = trace
+        self._tracer = trace.get_tracer(tracer_name)
+        self._spans = {}
+
+    def on_start(self, span):
+        parent = self._spans.get(span.parent_span_id)
+        context = self._trace.set_span_in_context(parent) if parent else None
+        self._spans[span.span_id] = self._tracer.start_span(
+            span.name, context=context, start_time=span.start_ns
+        )
+
+    def on_end(self, span):
+        otel_span = self._spans.pop(span.span_id, None)
+        if otel_span is None:
+            return
+        for key, value in span.to_dict()["attributes"].items():
+            if value is not None:
+                otel_span.set_attribute(key, value)
+        if "digitide.error" in span.attributes:
+            otel_span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, span.attributes["digitide.error"]))
+        otel_span.end(end_time=span.end_ns)
+
+
+class Tracer:
+    """
+    Collects spans from agent, model and tool callbacks
+
+    Attach it to every agent of a system with create_digitide_system(tracer=...).
+    Finished spans are kept in memory (up to max_spans) and sent to exporters.
+    Model and tool calls that raise end their span with an error status.
+    """
+
+    def __init__(self, exporters=None, max_spans=10000):
+        self.exporters = exporters or []
+        self.max_spans = max_spans
+        self.spans = []
+        self._model_spans = {}
+        self._lock = threading.Lock()
+
+    def _start(self, name, kind, agent):
+        span = Span(name, kind, agent, parent=_current_span.get())
+        for exporter in self.exporters:
+            exporter.on_start(span)
+        return span
+
+    def _end(self, span):
+        span.end_ns = time.time_ns()
+        with self._lock:
+            self.spans.append(span)
+            del self.spans[:-self.max_spans]
+        for exporter in self.exporters:
+            exporter.on_end(span)
+
+    def _fail(self, span, error):
+        span.attributes["digitide.status"] = "error"
+        span.attributes["digitide.error"] = f"{type(error).__name__}: {error}"[:500]
+
+    def _enter(self, span):
+        span.token = _current_span.set(span)
+
+    def _exit(self, span):
+        try:
+            _current_span.reset(span.token)
+        except ValueError:
+            # Reset from a different context; the context ends with the task anyway
+            pass
+        self._end(span)
+
+    # Agent callbacks
+
+    def before_agent(self, callback_context):
+        name = callback_context.agent_name
+        kind = "request" if _current_span.get() is None else "agent"
+        self._enter(self._start(f"{kind} {name}", kind, name))
+
+    def after_agent(self, callback_context):
+        span = _current_span.get()
+        if span is not None and span.agent == callback_context.agent_name and span.kind in ("request", "agent"):
+            self._exit(span)
+
+    # Model callbacks
+
+    def before_model(self, callback_context, llm_request):
+        name = callback_context.agent_name
+        kind = "orchestrator_turn" if name == ORCHESTRATOR_NAME else "model_call"
+        span = self._start(f"{kind} {name}", kind, name)
+        model = llm_request.model
+        span.attributes["digitide.model"] = model if isinstance(model, str) else getattr(model, "model", str(model))
+        # A span still open under the same key belongs to a call that was cancelled without an error callback
+        abandoned = self._model_spans.pop((callback_context.invocation_id, name), None)
+        if abandoned is not None:
+            self._fail(abandoned, TimeoutError("model call abandoned"))
+            self._end(abandoned)
+        self._model_spans[(callback_context.invocation_id, name)] = span
+
+    def after_model(self, callback_context, llm_response):
+        if llm_response.partial:
+            return
+        span = self._model_spans.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        if span is None:
+            return
+        usage = llm_response.usage_metadata
+        if usage is not None:
+            span.attributes["digitide.input_tokens"] = usage.prompt_token_count or 0
+            span.attributes["digitide.output_tokens"] = usage.candidates_token_count or 0
+            span.attributes["digitide.cached_tokens"] = usage.cached_content_token_count or 0
+        self._end(span)
+
+    def on_model_error(self, callback_context, llm_request, error):
+        span = self._model_spans.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        if span is not None:
+            self._fail(span, error)
+            self._end(span)
+        # Let the error propagate to the caller's retry logic
+
+    # Tool callbacks
+
+    def before_tool(self, tool, args, tool_context):
+        span = self._start(f"tool {tool.name}", "tool_call", tool.name)
+        span.attributes["digitide.cache_hit"] = False
+        self._enter(span)
+
+    def after_tool(self, tool, args, tool_context, tool_response):
+        span = _current_span.get()
+        if span is not None and span.kind == "tool_call" and span.agent == tool.name:
+            self._exit(span)
+
+    def on_tool_error(self, tool, args, tool_context, error):
+        span = _current_span.get()
+        if span is not None and span.kind == "tool_call" and span.agent == tool.name:
+            self._fail(span, error)
+            self._exit(span)
+
+    def attach(self, agent, tools=False):
+        """
+        Adds the tracing callbacks to an agent; tools=True also traces its tool calls
+        """
+        add_callbacks(
+            agent,
+            before_agent=self.before_agent,
+            after_agent=self.after_agent,
+            before_model=self.before_model,
+            after_model=self.after_model,
+            on_model_error=self.on_model_error,
+            before_tool=self.before_tool if tools else None,
+            after_tool=self.after_tool if tools else None,
+            on_tool_error=self.on_tool_error if tools else None
+        )
+        return agent
+
+    def summary(self):
+        """
+        Aggregates the recorded spans per agent, see summarize()
+        """
+        return summarize(span.to_dict() for span in self.spans)
+
+
+def summarize(spans):
+    """
+    Aggregates span dicts into per-agent call counts, latency and tokens
+    """
+    rows = {}
+    for span in spans:
+        attributes = span["attributes"]
+        kind = attributes["digitide.kind"]
+        if kind not in ("orchestrator_turn", "model_call", "tool_call"):
+            continue
+
+        key = (kind, attributes["digitide.agent"])
+        row = rows.setdefault(key, {
+            "kind": kind,
+            "agent": attributes["digitide.agent"],
+            "calls": 0,
+            "latencies": [],
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "cache_hits": 0,
+            "errors": 0
+        })
+        row["calls"] += 1
+        row["latencies"].append(attributes["digitide.latency_ms"] or 0)
+        row["input_tokens"] += attributes.get("digitide.input_tokens", 0)
+        row["output_tokens"] += attributes.get("digitide.output_tokens", 0)
+        row["cache_hits"] += bool(attributes.get("digitide.cache_hit"))
+        row["errors"] += attributes.get("digitide.status") == "error"
+
+    summary = []
+    for row in rows.values():
+        latencies = sorted(row.pop("latencies"))
+        row["total_ms"] = round(sum(latencies), 1)
+        row["p95_ms"] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 1)
+        summary.append(row)
+    return sorted(summary, key=lambda row: row["total_ms"], reverse=True)
+
+
+def _read_spans(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m digitide_agents.tracing")
+    commands = parser.add_subparsers(dest="command", required=True)
+    summary_parser = commands.add_parser("summary", help="Print latency and token totals per agent")
+    summary_parser.add_argument("path", help="JSON lines file written by JsonlSpanExporter")
+    summary_parser.add_argument("--top", type=int, default=20, help="Number of rows to show")
+    args = parser.parse_args(argv)
+
+    spans = _read_spans(args.path)
+    requests = [span for span in spans if span["attributes"]["digitide.kind"] == "request"]
+    print(f"{len(spans)} spans, {len(requests)} requests\n")
+
+    header = f"{'kind':<18} {'agent':<32} {'calls':>6} {'total ms':>10} {'p95 ms':>9} {'in tok':>9} {'out tok':>9} {'cached':>7} {'errors':>7}"
+    print(header)
+    print("-" * len(header))
+    for row in itertools.islice(summarize(spans), args.top):
+        print(
+            f"{row['kind']:<18} {row['agent']:<32} {row['calls']:>6} {row['total_ms']:>10} "
+            f"{row['p95_ms']:>9} {row['input_tokens']:>9} {row['output_tokens']:>9} {row['cache_hits']:>7} {row['errors']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,27 @@ const PROJECT_ID = "cloud-billed-1";
 const LOCATION = "us-central1";
 const ENGINE_ID = "6580291219216138240"; // Same as test_one_agent.py
 
+async function deleteSession(baseUrl: string, accessToken: string, userId: string, sessionId: string) {
+  const deleteResponse = await fetch(`${baseUrl}:query`, {
+    method: 'POST',
+    headers: {
+      'Authorization': `Bearer ${accessToken}`,
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify({
+      class_method: 'async_delete_session',
+      input: {
+        user_id: userId,
+        session_id: sessionId
+      }
+    }),
+  });
+
+  if (!deleteResponse.ok) {
+    console.error('Failed to delete session, but continuing');
+  }
+}
+
 export async function POST(request: Request) {
   try {
     // Get access token
@@ -77,6 +98,19 @@ export async function POST(request: Request) {
       throw new Error(`Failed to query: ${queryResponse.statusText}`);
     }
 
+    // With ?stream=1 the engine's NDJSON is passed through as it arrives, including
+    // the {"type": "partial", "agent", "text"} lines sub-agents stream while answering
+    if (new URL(request.url).searchParams.get('stream') === '1' && queryResponse.body) {
+      const cleanup = new TransformStream({
+        async flush() {
+          await deleteSession(baseUrl, accessToken, userId, sessionId);
+        }
+      });
+      return new Response(queryResponse.body.pipeThrough(cleanup), {
+        headers: { 'Content-Type': 'application/x-ndjson' }
+      });
+    }
+
     // Parse NDJSON response
     const responseText = await queryResponse.text();
     const jsonLines = responseText.trim().split('\n').filter(line => line.trim());
@@ -89,6 +123,11 @@ export async function POST(request: Request) {
       try {
         const event = JSON.parse(line);
 
+        // Streamed sub-agent chunks; the final function_response carries the full output
+        if (event.type) {
+          continue;
+        }
+
         if (event.content && event.content.parts) {
           for (const part of event.content.parts) {
             // Check for function_response (agent output)
@@ -112,24 +151,7 @@ export async function POST(request: Request) {
     }
 
     // Step 3: Clean up session (matches remote_app.async_delete_session)
-    const deleteResponse = await fetch(`${baseUrl}:query`, {
-      method: 'POST',
-      headers: {
-        'Authorization': `Bearer ${accessToken}`,
-        'Content-Type': 'application/json',
-      },
-      body: JSON.stringify({
-        class_method: 'async_delete_session',
-        input: {
-          user_id: userId,
-          session_id: sessionId
-        }
-      }),
-    });
-
-    if (!deleteResponse.ok) {
-      console.error('Failed to delete session, but continuing');
-    }
+    await deleteSession(baseUrl, accessToken, userId, sessionId);
 
     // Return response matching test_one_agent.py output format
     return NextResponse.json({